@@ -0,0 +1,383 @@
+"""
+Benchmarks html2ans on the test fixtures (``tests/fixtures/input``) and the embed snippets used
+by the embed parser tests (``tests/parsers/embeds``).
+
+Seven things are timed separately:
+
+* ``import``: importing each of ``IMPORT_MODULES`` in a new interpreter (the cold start of a
+  short-lived worker)
+* ``tree``: building the document tree (``build_tree``, i.e. ``BeautifulSoup`` for the default parser)
+* ``convert``: converting an already built tree (``_parse_elements``)
+* ``parser``: each of the ``DEFAULT_PARSERS`` on the elements it applies to (``is_applicable`` plus
+  ``parse`` when applicable)
+* ``text_fixing``: converting every document with each of the ``TEXT_FIXERS`` configurations
+  (``html2ans.text_fixing``)
+* ``serialization``: converting every document and writing its JSON, either with ``json.dumps``
+  on the ``generate_ans`` output or streamed by ``generate_ans_json`` (with ``orjson`` when
+  it is installed and with the standard library's ``json``)
+* ``threads``: each of ``THREAD_COUNTS`` threads converting every document with one shared, frozen
+  parser (``BaseHtmlAnsParser.freeze``); without a GIL, the time should stay roughly flat as threads
+  are added
+
+The results are written as JSON and can be compared against a saved baseline::
+
+    python benchmarks/run.py --output baseline.json
+    # make changes
+    python benchmarks/run.py --baseline baseline.json
+
+When comparing, the exit status is 1 if any benchmark got slower than the threshold.
+"""
+from __future__ import print_function
+
+import argparse
+import ast
+import gc
+import glob
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import timeit
+
+import bs4
+import lxml.etree
+from bs4 import NavigableString, Tag
+
+from html2ans.corpus import CorpusGenerator
+from html2ans.default import DefaultHtmlAnsParser, LxmlHtmlAnsParser, SourceSpanHtmlAnsParser
+from html2ans.text_fixing import HEURISTIC_PRECHECK, TextFixer
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(ROOT_DIR, 'tests', 'fixtures', 'input')
+EMBED_TESTS_DIR = os.path.join(ROOT_DIR, 'tests', 'parsers', 'embeds')
+PARSER_CLASSES = {
+    'default': DefaultHtmlAnsParser,
+    'lxml': LxmlHtmlAnsParser,
+    'spans': SourceSpanHtmlAnsParser,
+}
+THREAD_COUNTS = (1, 2, 4)
+IMPORT_MODULES = ('html2ans.default',)
+IMPORT_SCRIPT = (
+    'import timeit\n'
+    'start = timeit.default_timer()\n'
+    'import {}\n'
+    'print(timeit.default_timer() - start)\n'
+)
+TEXT_FIXERS = {
+    'ftfy': lambda: TextFixer(precheck=None),
+    'ascii_precheck': lambda: TextFixer(),
+    'heuristic_precheck': lambda: TextFixer(precheck=HEURISTIC_PRECHECK),
+    'cache': lambda: TextFixer(precheck=None, cache_size=10000),
+    'whole_document': lambda: TextFixer(whole_document=True),
+    'disabled': lambda: TextFixer(enabled=False),
+}
+
+
+def _string_value(node):
+    value = getattr(node, 's', None) if type(node).__name__ == 'Str' else getattr(node, 'value', None)
+    return value if isinstance(value, str) else None
+
+
+def load_embed_snippets():
+    """
+    :return: the html snippets (string literals containing tags) from the embed parser tests
+    :rtype: list
+    """
+    snippets = []
+    for path in sorted(glob.glob(os.path.join(EMBED_TESTS_DIR, 'test_*.py'))):
+        with io.open(path, encoding='utf-8') as test_file:
+            tree = ast.parse(test_file.read())
+        for node in ast.walk(tree):
+            value = _string_value(node)
+            if value and '<' in value and '>' in value:
+                snippets.append(value)
+    return snippets
+
+
+def load_documents(synthetic=0, synthetic_blocks=30):
+    """
+    :param synthetic: how many synthetic documents (see ``html2ans.corpus``) to add
+    :type synthetic: int
+    :param synthetic_blocks: how many top-level blocks each synthetic document has
+    :type synthetic_blocks: int
+    :return: a list of ``(name, html)`` tuples to benchmark with: one per html fixture,
+        one holding every embed snippet and any synthetic documents
+    :rtype: list
+    """
+    documents = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.html'))):
+        with io.open(path, encoding='utf-8') as html_file:
+            documents.append((os.path.basename(path), html_file.read()))
+    documents.append(('embeds', '<body>{}</body>'.format('\n'.join(load_embed_snippets()))))
+    documents.extend(CorpusGenerator(blocks=synthetic_blocks).documents(synthetic))
+    return documents
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    middle = len(timings) // 2
+    median = timings[middle] if len(timings) % 2 else (timings[middle - 1] + timings[middle]) / 2.0
+    return {'min': timings[0], 'median': median, 'runs': len(timings)}
+
+
+def measure(function, *args):
+    """
+    :return: how long (in seconds) ``function(*args)`` takes, with garbage collection
+        disabled (like ``timeit``)
+    :rtype: float
+    """
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = timeit.default_timer()
+        function(*args)
+        return timeit.default_timer() - start
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def time_import(module, repeat):
+    """
+    Times importing ``module`` in a new interpreter each time, so none of its
+    dependencies have already been imported.
+    """
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, '-c', IMPORT_SCRIPT.format(module)])
+        timings.append(float(output.decode('utf-8').split()[-1]))
+    return summarize(timings)
+
+
+def time_tree(parser, html, repeat):
+    parser.build_tree(html)  # warm up
+    return summarize([measure(parser.build_tree, html) for _ in range(repeat)])
+
+
+def time_convert(parser, html, repeat):
+    timings = []
+    for _ in range(repeat + 1):
+        # the tree is rebuilt each time since parsers can modify it
+        root, elements = parser.find_start(parser.build_tree(html), 'body')
+        timings.append(measure(parser._parse_elements, list(elements)))
+    # the first run is a warm up
+    return summarize(timings[1:])
+
+
+def _element_key(element):
+    return element.name if isinstance(element, Tag) else type(element)
+
+
+def _run_element_parser(element_parser, elements):
+    for element in elements:
+        if element_parser.is_applicable(element):
+            element_parser.parse(element)
+
+
+def time_element_parsers(parser, documents, repeat):
+    """
+    Times each of the parser's ``DEFAULT_PARSERS`` on every element (in every document) it
+    could apply to.
+
+    :return: a dictionary of parser class names to timings
+    :rtype: dict
+    """
+    timings = {}
+    for _ in range(repeat):
+        elements = []
+        for name, html in documents:
+            elements.extend(parser.build_tree(html).descendants)
+        for element_parser in parser.DEFAULT_PARSERS:
+            applicable_elements = element_parser.applicable_elements
+            candidates = [element for element in elements if _element_key(element) in applicable_elements]
+            timings.setdefault(type(element_parser).__name__, []).append(
+                measure(_run_element_parser, element_parser, candidates))
+    return {name: summarize(parser_timings) for name, parser_timings in timings.items()}
+
+
+def _convert_documents(parser, documents):
+    for name, html in documents:
+        parser.generate_ans(html)
+
+
+def time_text_fixers(parser_class, documents, repeat):
+    """
+    Times converting every document with each of the ``TEXT_FIXERS`` configurations.
+
+    :return: a dictionary of configuration names to timings
+    :rtype: dict
+    """
+    timings = {}
+    for name, text_fixer in TEXT_FIXERS.items():
+        parser = parser_class(text_fixer=text_fixer())
+        _convert_documents(parser, documents)  # warm up (and fill the cache)
+        timings[name] = summarize([measure(_convert_documents, parser, documents) for _ in range(repeat)])
+    return timings
+
+
+def _dump_documents(parser, documents):
+    for name, html in documents:
+        json.dumps(parser.generate_ans(html))
+
+
+def _stream_documents(parser, documents, fast_encoder):
+    for name, html in documents:
+        parser.generate_ans_json(html, io.BytesIO(), fast_encoder=fast_encoder)
+
+
+def time_serialization(parser, documents, repeat):
+    """
+    Times converting and serializing every document with ``json.dumps`` and with
+    ``generate_ans_json``.
+
+    :return: a dictionary of serialization methods to timings
+    :rtype: dict
+    """
+    methods = {
+        'dumps': (_dump_documents, parser, documents),
+        'stream': (_stream_documents, parser, documents, True),
+        'stream_json': (_stream_documents, parser, documents, False),
+    }
+    timings = {}
+    for name, arguments in methods.items():
+        arguments[0](*arguments[1:])  # warm up
+        timings[name] = summarize([measure(*arguments) for _ in range(repeat)])
+    return timings
+
+
+def _convert_in_threads(parser, documents, thread_count):
+    threads = [threading.Thread(target=_convert_documents, args=(parser, documents)) for _ in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def time_threads(parser_class, documents, repeat):
+    """
+    Times ``THREAD_COUNTS`` threads each converting every document with one shared parser.
+
+    :return: a dictionary of thread counts to timings
+    :rtype: dict
+    """
+    parser = parser_class().freeze()
+    _convert_documents(parser, documents)  # warm up
+    return {
+        thread_count: summarize([measure(_convert_in_threads, parser, documents, thread_count) for _ in range(repeat)])
+        for thread_count in THREAD_COUNTS
+    }
+
+
+def run(parser_name='default', repeat=20, documents=None):
+    """
+    Runs the benchmarks.
+
+    :param parser_name: the document parser to benchmark (see ``PARSER_CLASSES``)
+    :type parser_name: str
+    :param repeat: how many times to run each benchmark
+    :type repeat: int
+    :param documents: the ``(name, html)`` documents to use (defaults to ``load_documents()``)
+    :type documents: list
+    :return: the report
+    :rtype: dict
+
+    """
+    documents = documents if documents is not None else load_documents()
+    parser = PARSER_CLASSES[parser_name]()
+    results = {}
+    for module in IMPORT_MODULES:
+        results['import/{}'.format(module)] = time_import(module, repeat)
+    for name, html in documents:
+        results['tree/{}'.format(name)] = time_tree(parser, html, repeat)
+        results['convert/{}'.format(name)] = time_convert(parser, html, repeat)
+    for name, timings in time_element_parsers(parser, documents, repeat).items():
+        results['parser/{}'.format(name)] = timings
+    for name, timings in time_text_fixers(PARSER_CLASSES[parser_name], documents, repeat).items():
+        results['text_fixing/{}'.format(name)] = timings
+    for name, timings in time_serialization(parser, documents, repeat).items():
+        results['serialization/{}'.format(name)] = timings
+    for thread_count, timings in time_threads(PARSER_CLASSES[parser_name], documents, repeat).items():
+        results['threads/{}'.format(thread_count)] = timings
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'gil': getattr(sys, '_is_gil_enabled', lambda: True)(),
+            'beautifulsoup4': bs4.__version__,
+            'lxml': '.'.join(str(part) for part in lxml.etree.LXML_VERSION),
+            'parser': parser_name,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold=0.1, min_time=1e-5, statistic='min'):
+    """
+    Compares the timings in ``report`` to those in ``baseline``.
+
+    :param threshold: how much slower (as a fraction) a benchmark can get before it counts
+        as a regression
+    :type threshold: float
+    :param min_time: benchmarks taking less than this (in seconds) are too noisy to count
+        as regressions
+    :type min_time: float
+    :param statistic: which timing to compare (``min`` or ``median``); the minimum is the
+        least affected by other load on the machine
+    :type statistic: str
+    :return: a list of ``(name, baseline time, time, ratio, regressed)`` tuples for the
+        benchmarks in both reports
+    :rtype: list
+
+    """
+    comparisons = []
+    for name in sorted(report['results']):
+        if name in baseline['results']:
+            old = baseline['results'][name][statistic]
+            new = report['results'][name][statistic]
+            ratio = new / old if old else 1.0
+            comparisons.append((name, old, new, ratio, ratio > 1 + threshold and new > min_time))
+    return comparisons
+
+
+def main(args=None):
+    argument_parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    argument_parser.add_argument('--parser', choices=sorted(PARSER_CLASSES), default='default')
+    argument_parser.add_argument('--repeat', type=int, default=20, help="how many times to run each benchmark")
+    argument_parser.add_argument(
+        '--synthetic', type=int, default=0, help="how many synthetic documents (see html2ans.corpus) to add")
+    argument_parser.add_argument(
+        '--synthetic-blocks', type=int, default=30, help="how many top-level blocks each synthetic document has")
+    argument_parser.add_argument('--output', help="where to write the JSON report (defaults to stdout)")
+    argument_parser.add_argument('--baseline', help="a saved JSON report to compare against")
+    argument_parser.add_argument(
+        '--threshold', type=float, default=0.1, help="the slowdown (as a fraction) that counts as a regression")
+    argument_parser.add_argument(
+        '--min-time', type=float, default=1e-5, help="benchmarks faster than this (in seconds) never count as regressions")
+    argument_parser.add_argument(
+        '--statistic', choices=['min', 'median'], default='min', help="which timing to compare against the baseline")
+    options = argument_parser.parse_args(args)
+
+    report = run(options.parser, options.repeat, load_documents(options.synthetic, options.synthetic_blocks))
+    if options.output:
+        with open(options.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2, sort_keys=True)
+    elif not options.baseline:
+        print(json.dumps(report, indent=2, sort_keys=True))
+
+    if options.baseline:
+        with open(options.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        comparisons = compare(report, baseline, options.threshold, options.min_time, options.statistic)
+        for name, old, new, ratio, regressed in comparisons:
+            print('{:<50} {:>10.3f}ms {:>10.3f}ms {:>7.2f}x{}'.format(
+                name, old * 1000, new * 1000, ratio, '  REGRESSED' if regressed else ''))
+        return 1 if any(comparison[-1] for comparison in comparisons) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
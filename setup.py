@@ -21,7 +21,8 @@ TESTS_REQUIRE = ('pytest<5',)
 SETUP_REQUIRES = (('pytest-runner',) if NEEDS_PYTEST else ()) + (DOCS_REQUIRE if NEEDS_DOCS else ())
 EXTRAS_REQUIRE = {
     'dev': DOCS_REQUIRE + TESTS_REQUIRE,
-    'tests': TESTS_REQUIRE
+    'tests': TESTS_REQUIRE,
+    'json': ('orjson;python_version>="3.6"',),
 }
 THIS_FILE_DIR = os.path.dirname(__file__)
 
@@ -79,6 +80,11 @@ setup(
     setup_requires=SETUP_REQUIRES,
     tests_require=TESTS_REQUIRE,
     extras_require=EXTRAS_REQUIRE,
+    entry_points={
+        'console_scripts': [
+            'html2ans = html2ans.cli:main',
+        ],
+    },
     command_options={
         'build_sphinx': {
             'project': ('setup.py', PROJECT),
@@ -0,0 +1,259 @@
+"""
+Element adapters that let the element parsers work directly on ``lxml`` trees.
+
+Building a ``BeautifulSoup`` tree means running a Python callback for every node
+``lxml`` parses. The adapters here instead wrap an ``lxml.html`` tree that was built
+entirely by ``lxml`` and only create Python objects for the nodes the parsers
+actually visit. Adapted tags subclass ``bs4.element.Tag`` and adapted strings are
+regular ``NavigableString``/``Comment`` objects, so parsers written against the
+``BeautifulSoup`` API (``name``, ``attrs``, ``children``, ``find``, ``find_all``,
+``text``, ``next_sibling``, ``decompose``, ``str(tag)``, etc.) work unchanged and
+produce the same output.
+"""
+import six
+from bs4.builder import HTMLTreeBuilder
+from bs4.dammit import EncodingDetector
+from bs4.element import CData, Comment, NavigableString, ProcessingInstruction, Tag
+from lxml import etree
+
+_BUILDER = HTMLTreeBuilder()
+# older BeautifulSoup releases (e.g. 4.9.3, the last to support Python 2) don't have these
+_STRING_CONTAINERS = getattr(_BUILDER, 'string_containers', {})
+_DEFAULT_INTERESTING_STRING_TYPES = getattr(Tag, 'DEFAULT_INTERESTING_STRING_TYPES', (NavigableString, CData))
+_ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+_DETECTION_SIZE = 2048
+_CHUNK_SIZE = 64 * 1024
+
+
+def _make_string(text, parent, container=None):
+    # mirrors BeautifulSoup.endData: whitespace-only strings are collapsed
+    # to a single newline/space unless whitespace is preserved
+    if not parent._preserve_whitespace and not text.strip(_ASCII_SPACES):
+        text = '\n' if '\n' in text else ' '
+    if container is None:
+        container = parent._string_container or NavigableString
+    string = container(text)
+    string.parent = parent
+    return string
+
+
+class LxmlTagAdapter(Tag):
+    """
+    Presents an ``lxml`` element as a ``bs4.element.Tag``. Children are adapted lazily
+    the first time ``contents`` (or anything built on it) is accessed.
+
+    :param element: the ``lxml`` element to adapt
+    :type element: lxml.etree._Element
+    :param parent: the adapted parent tag
+    :type parent: LxmlTagAdapter
+
+    """
+
+    def __init__(self, element, parent=None):
+        name = element.tag
+        attrs = dict(element.attrib)
+        if attrs:
+            _BUILDER._replace_cdata_list_attribute_values(name, attrs)
+        self._element = element
+        self._setup(name, attrs, parent)
+
+    def _setup(self, name, attrs, parent):
+        # Tag.__init__ isn't called, so everything the Tag methods rely
+        # on has to be set here (Tag.__getattr__ would treat anything
+        # missing as a search for a child tag of that name)
+        self._contents = None
+        self.name = name
+        self.attrs = attrs
+        self.namespace = None
+        self.prefix = None
+        self.hidden = False
+        self.known_xml = False
+        self.parser_class = None
+        self.parent = parent
+        self.next_sibling = None
+        self.previous_sibling = None
+        self.next_element = None
+        self.previous_element = None
+        self.can_be_empty_element = _BUILDER.can_be_empty_element(name)
+        self.cdata_list_attributes = _BUILDER.cdata_list_attributes
+        self.preserve_whitespace_tags = _BUILDER.preserve_whitespace_tags
+        string_container = _STRING_CONTAINERS.get(name)
+        self.interesting_string_types = string_container or _DEFAULT_INTERESTING_STRING_TYPES
+        if parent is not None:
+            self._preserve_whitespace = parent._preserve_whitespace or name in _BUILDER.preserve_whitespace_tags
+            self._string_container = string_container or parent._string_container
+        else:
+            self._preserve_whitespace = name in _BUILDER.preserve_whitespace_tags
+            self._string_container = string_container
+
+    @property
+    def contents(self):
+        contents = self._contents
+        if contents is None:
+            contents = self._contents = self._adapt_children()
+        return contents
+
+    def _adapt_children(self):
+        element = self._element
+        contents = []
+        if element.text:
+            contents.append(_make_string(element.text, self))
+        for child in element:
+            adapted = _adapt(child, self)
+            if adapted is not None:
+                contents.append(adapted)
+            if child.tail:
+                contents.append(_make_string(child.tail, self))
+        _link_siblings(contents)
+        return contents
+
+    @property
+    def descendants(self):
+        stack = [iter(self.contents)]
+        while stack:
+            for child in stack[-1]:
+                yield child
+                if isinstance(child, Tag):
+                    stack.append(iter(child.contents))
+                    break
+            else:
+                stack.pop()
+
+    def extract(self, _self_index=None):
+        parent = self.parent
+        if parent is not None:
+            contents = parent.contents
+            for index, child in enumerate(contents):
+                if child is self:
+                    del contents[index]
+                    break
+        if self.previous_sibling is not None:
+            self.previous_sibling.next_sibling = self.next_sibling
+        if self.next_sibling is not None:
+            self.next_sibling.previous_sibling = self.previous_sibling
+        self.parent = self.previous_sibling = self.next_sibling = None
+        return self
+
+    def decompose(self):
+        # like Tag.decompose, leaves this tag and the tags under it empty so that
+        # any remaining references to them (e.g. from find_all) are skipped as empty
+        self.extract()
+        for element in [self] + list(self.descendants):
+            if isinstance(element, LxmlTagAdapter):
+                element._contents = []
+                element.name = None
+                element.attrs = {}
+                element._decomposed = True
+
+
+class LxmlDocumentAdapter(LxmlTagAdapter):
+    """
+    The adapted equivalent of a ``BeautifulSoup`` object: a hidden tag holding the root
+    element of an ``lxml`` tree along with any top-level comments around it.
+
+    :param root: the root element of the tree (``None`` for an empty document)
+    :type root: lxml.etree._Element
+    :param include_siblings: whether the elements around ``root`` are part of the document
+    :type include_siblings: bool
+
+    """
+
+    def __init__(self, root, include_siblings=True):
+        self._element = None
+        self._root = root
+        self._include_siblings = include_siblings
+        self._setup('[document]', {}, None)
+        self.hidden = True
+
+    def _adapt_children(self):
+        contents = []
+        root = self._root
+        if root is not None:
+            siblings = [root]
+            if self._include_siblings:
+                siblings = list(reversed(list(root.itersiblings(preceding=True)))) + \
+                    siblings + list(root.itersiblings())
+            for sibling in siblings:
+                adapted = _adapt(sibling, self)
+                if adapted is not None:
+                    contents.append(adapted)
+        _link_siblings(contents)
+        return contents
+
+
+def _adapt(element, parent):
+    if isinstance(element, etree._Comment):
+        return _make_string(element.text or '', parent, Comment)
+    elif isinstance(element, etree._ProcessingInstruction):
+        return _make_string(element.text or '', parent, ProcessingInstruction)
+    elif isinstance(element.tag, six.string_types):
+        return LxmlTagAdapter(element, parent)
+    # entities are resolved by the HTML parser; anything else is skipped
+    return None
+
+
+def _link_siblings(contents):
+    previous = None
+    for child in contents:
+        child.previous_sibling = previous
+        if previous is not None:
+            previous.next_sibling = child
+        previous = child
+
+
+def build_lxml_tree(html, start_tag=None):
+    """
+    Parses html with ``lxml`` (feeding it to the parser the same way ``BeautifulSoup``'s
+    ``lxml`` tree builder does) and returns the adapted document. Bytes-like html (see
+    ``html2ans.inputs``) is decoded by ``lxml`` using the encoding ``BeautifulSoup`` would
+    detect, and fed to it in chunks, so memory-mapped documents are never copied whole.
+
+    :param html: the html to parse
+    :type html: str or bytes
+    :param start_tag: if provided, the adapted document only holds the first ``start_tag``
+        element, like a ``BeautifulSoup`` tree built with ``SoupStrainer(start_tag)``. If there
+        is no such element, the whole document is returned.
+    :type start_tag: str
+    :return: the adapted document
+    :rtype: LxmlDocumentAdapter
+
+    """
+    root = None
+    if html:
+        try:
+            if isinstance(html, six.text_type):
+                if html[0] == u'\N{BYTE ORDER MARK}':
+                    html = html[1:]
+                parser = etree.HTMLParser(recover=True, strip_cdata=False)
+                parser.feed(html)
+                root = parser.close()
+            else:
+                root = _parse_bytes(html)
+        except etree.XMLSyntaxError:
+            # e.g. a document with no elements at all
+            root = None
+    if root is not None and start_tag and isinstance(start_tag, six.string_types):
+        for element in root.iter(start_tag):
+            return LxmlDocumentAdapter(element, include_siblings=False)
+    return LxmlDocumentAdapter(root)
+
+
+def _parse_bytes(html):
+    # the declared encoding is looked for in the same part of the document as BeautifulSoup
+    # does, without copying the rest of it
+    view = memoryview(html)
+    head = view[:max(_DETECTION_SIZE, len(view) // 20)].tobytes()
+    detector = EncodingDetector(head, is_html=True)
+    start = len(head) - len(detector.markup)
+    error = None
+    for encoding in detector.encodings:
+        parser = etree.HTMLParser(recover=True, strip_cdata=False, encoding=encoding)
+        try:
+            for offset in range(start, len(view), _CHUNK_SIZE):
+                parser.feed(view[offset:offset + _CHUNK_SIZE].tobytes())
+            return parser.close()
+        except (UnicodeDecodeError, LookupError, etree.ParserError) as exc:
+            error = exc
+    if error is not None:
+        raise error
+    return None
@@ -0,0 +1,112 @@
+"""
+``asyncio`` front-end for document parsers (Python 3.6+). Conversion is CPU-bound, so
+by default it runs in an executor, which keeps the event loop free to serve other
+requests while a large document is converted.
+"""
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from html2ans.batch import convert_document
+from html2ans.inputs import read_html
+
+
+async def agenerate_ans(parser, html, start_tag="body", executor=None, yield_every=None):
+    """
+    Converts a document without blocking the event loop for the whole conversion.
+
+    :param parser: the document parser to use
+    :type parser: html2ans.base.BaseHtmlAnsParser
+    :param html: the html to parse
+    :type html: str
+    :param start_tag: where to start parsing
+    :type start_tag: str
+    :param executor: the executor to convert in (defaults to the loop's default executor);
+        with ``yield_every``, only the document's tree is built in it
+    :type executor: concurrent.futures.Executor
+    :param yield_every: if provided, the document's tree is built in the executor and then
+        converted in the event loop itself, yielding control back to the loop after every
+        ``yield_every`` parsed elements (including those inside wrapper elements)
+    :type yield_every: int
+    :return: a list of ANS elements as dictionaries
+
+    """
+    loop = asyncio.get_event_loop()
+    if yield_every:
+        root, elements = await loop.run_in_executor(executor, _build_start, parser, html, start_tag)
+        output_elements = []
+        for count, parsed_elements in enumerate(parser._iter_ans_steps(root, elements), 1):
+            output_elements.extend(parsed_elements)
+            if count % yield_every == 0:
+                await asyncio.sleep(0)
+        return output_elements
+    return await loop.run_in_executor(executor, parser.generate_ans, html, start_tag)
+
+
+def _build_start(parser, html, start_tag):
+    return parser._build_start(read_html(html, parser.memory_map), start_tag)
+
+
+async def _iterate(documents):
+    if hasattr(documents, '__aiter__'):
+        async for html in documents:
+            yield html
+    else:
+        for html in documents:
+            yield html
+
+
+async def agenerate_ans_many(parser, documents, start_tag="body", concurrency=4, executor=None, ordered=True):
+    """
+    Converts many documents in an executor, with at most ``concurrency`` documents being
+    converted at a time. Documents are only read from ``documents`` as earlier results are
+    consumed, so a slow consumer holds back the producer. Like
+    ``html2ans.batch.generate_ans_many``, an error converting one document is returned in
+    its result rather than raised.
+
+    :param parser: the document parser to use
+    :type parser: html2ans.base.BaseHtmlAnsParser
+    :param documents: an iterable or async iterable of html documents
+    :param start_tag: where to start parsing in each document
+    :type start_tag: str
+    :param concurrency: the most documents to convert at a time
+    :type concurrency: int
+    :param executor: the executor to convert in; if not provided, a thread pool with
+        ``concurrency`` threads is created and shut down when iteration finishes
+    :type executor: concurrent.futures.Executor
+    :param ordered: whether results are yielded in the same order as ``documents``; if
+        ``False``, results are yielded as soon as they are ready
+    :type ordered: bool
+    :return: an async generator of ``html2ans.batch.BatchResult`` (one per document)
+
+    """
+    loop = asyncio.get_event_loop()
+    owned_executor = executor is None
+    if owned_executor:
+        executor = ThreadPoolExecutor(concurrency)
+    pending = deque()
+    index = 0
+    try:
+        async for html in _iterate(documents):
+            pending.append(loop.run_in_executor(executor, convert_document, parser, index, html, start_tag))
+            index += 1
+            while len(pending) >= concurrency:
+                for result in await _next_results(pending, ordered):
+                    yield result
+        while pending:
+            for result in await _next_results(pending, ordered):
+                yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        if owned_executor:
+            executor.shutdown(wait=False)
+
+
+async def _next_results(pending, ordered):
+    if ordered:
+        return [await pending.popleft()]
+    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    for future in done:
+        pending.remove(future)
+    return sorted((future.result() for future in done), key=lambda result: result.index)
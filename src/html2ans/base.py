@@ -1,6 +1,47 @@
-from bs4 import BeautifulSoup, NavigableString, Tag
-from html2ans.parsers.base import AbstractParserUtilities, ParseResult
-from html2ans.exc import ParsingException
+import hashlib
+
+import six
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer, Tag
+from html2ans.parsers.base import AbstractParserUtilities, BaseElementParser, ParseResult
+from html2ans.parsers.utils import NodeFacts, activate_node_facts
+from html2ans.batch import generate_ans_many
+from html2ans.cache import document_cache_key, fragment_cache_key
+from html2ans.compact import compact_element
+from html2ans.inputs import as_markup, read_html
+from html2ans.serialization import write_json_array
+from html2ans.instrumentation import ConversionStats, activate_conversion_stats, get_active_conversion_stats
+from html2ans.text_fixing import activate_text_fixer
+from html2ans.exc import FrozenParserException, ParsingException
+from html2ans.parsers.embeds import EMBED_PROVIDERS, EmbedScan, activate_embed_scan
+
+
+_BASE_IS_APPLICABLE = six.get_unbound_function(BaseElementParser.is_applicable)
+_BASE_IS_CLASS_APPLICABLE = six.get_unbound_function(BaseElementParser.is_class_applicable)
+
+
+def _get_required_classes(parser):
+    """
+    Returns the classes an element must have for the given parser to be applicable, or
+    ``None`` if that can't be known without calling ``is_applicable`` (i.e. the parser
+    has no ``applicable_classes`` or overrides ``is_applicable`` or ``is_class_applicable``).
+    """
+    applicable_classes = getattr(parser, 'applicable_classes', None)
+    parser_class = type(parser)
+    if applicable_classes and \
+            six.get_unbound_function(parser_class.is_applicable) is _BASE_IS_APPLICABLE and \
+            six.get_unbound_function(parser_class.is_class_applicable) is _BASE_IS_CLASS_APPLICABLE:
+        return frozenset(applicable_classes)
+    return None
+
+
+def _describe_parser(parser):
+    parser_class = type(parser)
+    return (
+        '{}.{}'.format(parser_class.__module__, parser_class.__name__),
+        [getattr(element, '__name__', element) for element in getattr(parser, 'applicable_elements', ())],
+        list(getattr(parser, 'applicable_classes', ())),
+        getattr(parser, 'version_required', False),
+    )
 
 
 class AbstractHtmlAnsParser(object):
@@ -20,6 +61,17 @@ class AbstractHtmlAnsParser(object):
         """
         raise NotImplementedError()
 
+    def generate_ans_iter(self, html, *args, **kwargs):
+        """
+        Parses html and yields ANS elements in a jsonify-able format.
+
+        :param html: the html to parse
+        :type html: str
+        :return: an iterator of ANS elements as dictionaries
+
+        """
+        return iter(self.generate_ans(html, *args, **kwargs))
+
 
 class BaseHtmlAnsParser(AbstractHtmlAnsParser, AbstractParserUtilities):
     """
@@ -46,6 +98,11 @@ class BaseHtmlAnsParser(AbstractHtmlAnsParser, AbstractParserUtilities):
     With ``suppress_exceptions``, when exceptions are thrown, the next parser will be tried (as
     though ``is_applicable`` returned ``False``).
 
+    Once ``freeze`` has been called, a document parser can be shared by any number of threads:
+    each conversion builds (and modifies) its own tree, state that depends on the document is
+    kept per thread, and the caches and text fixer lock around their changes. Only the
+    ``instrumentation`` counters aren't synchronized.
+
     :keyword ans_version: the ANS version to apply to the output of parsers that require a version
     :type ans_version: str
     :keyword bs_parse_lib: the BeautifulSoup parsing library to use
@@ -54,6 +111,42 @@ class BaseHtmlAnsParser(AbstractHtmlAnsParser, AbstractParserUtilities):
     :type suppress_exceptions: bool
     :keyword default_parsers: The default parsers to populate ``parsers`` with. Order matters here!
     :type default_parsers: list
+    :keyword precompute_node_facts: whether to compute emptiness/text-only facts for the whole
+        tree in one pass before parsing (see ``html2ans.parsers.utils.NodeFacts``). This makes
+        conversion linear in the size of the tree, but shouldn't be used when ``is_empty`` or
+        ``is_text_only`` are overridden.
+    :type precompute_node_facts: bool
+    :keyword parse_start_tag_only: whether to only build the tree for the ``start_tag`` subtree
+        (using a ``SoupStrainer``) rather than the whole document. If ``start_tag`` isn't found,
+        the whole document is parsed as usual. Not supported by the ``html5lib`` parsing library.
+    :type parse_start_tag_only: bool
+    :keyword instrumentation: records per-parser counts and timings for (a sample of) element
+        parse attempts
+    :type instrumentation: html2ans.instrumentation.ParserInstrumentation
+    :keyword document_cache: a cache of converted documents (see ``html2ans.cache``); documents
+        are looked up by their html, ``start_tag`` and this parser's configuration
+        (``get_config_fingerprint``)
+    :type document_cache: html2ans.cache.AbstractDocumentCache
+    :keyword fragment_cache: a cache of parsed elements (``html2ans.cache.LRUFragmentCache``)
+        looked up by the element's markup, so elements repeated within or across documents
+        are only converted once. Looking an element up means serializing its markup, which
+        costs about as much as converting it, so this only pays off when markup repeats
+        (e.g. boilerplate or re-converted documents) and slows down documents that are all
+        new (see ``LRUFragmentCache``). Only results from parsers that are all ``cacheable`` are cached, and elements
+        whose first parser isn't ``cacheable`` aren't looked up. Not used while collecting
+        ``ConversionStats`` and elements converted with it aren't recorded by
+        ``instrumentation``.
+    :type fragment_cache: html2ans.cache.LRUFragmentCache
+    :keyword text_fixer: how the text parsers fix text (defaults to
+        ``html2ans.text_fixing.DEFAULT_TEXT_FIXER``)
+    :type text_fixer: html2ans.text_fixing.TextFixer
+    :keyword memory_map: whether html given as an open binary file or a path is memory-mapped
+        rather than read (see ``html2ans.inputs.read_html``)
+    :type memory_map: bool
+    :keyword compact_output: whether ANS elements are returned as the compact objects in
+        ``html2ans.compact`` (which use much less memory and serialize to the same JSON)
+        instead of dictionaries
+    :type compact_output: bool
 
     """
 
@@ -73,16 +166,39 @@ class BaseHtmlAnsParser(AbstractHtmlAnsParser, AbstractParserUtilities):
             soup_parse_lib='lxml',
             suppress_exceptions=False,
             default_parsers=None,
+            precompute_node_facts=False,
+            parse_start_tag_only=False,
+            instrumentation=None,
+            document_cache=None,
+            fragment_cache=None,
+            text_fixer=None,
+            memory_map=False,
+            compact_output=False,
             *args,
             **kwargs):
         self.ans_version = ans_version
         self.soup_parse_lib = soup_parse_lib
         self.suppress_exceptions = suppress_exceptions
+        self.precompute_node_facts = precompute_node_facts
+        self.parse_start_tag_only = parse_start_tag_only
+        self.instrumentation = instrumentation
+        self.document_cache = document_cache
+        self.fragment_cache = fragment_cache
+        self.text_fixer = text_fixer
+        self.memory_map = memory_map
+        self.compact_output = compact_output
         self.parsers = {}
         """
         A mapping of potential HTML elements to a list of
         parsers to use to attempt to parse elements of that type
         """
+        self._dispatch_table = None
+        self._backup_candidates = ()
+        self._unclassed_table = {}
+        self._class_index = {}
+        self._class_candidates = {}
+        self._parsers_fingerprint = None
+        self.frozen = False
 
         default_parsers = default_parsers or []
         for parser in default_parsers:
@@ -93,19 +209,236 @@ class BaseHtmlAnsParser(AbstractHtmlAnsParser, AbstractParserUtilities):
         """
         Parses html and produces ANS in a jsonify-able format.
 
+        :param html: the html to parse: text, bytes (decoded by the tree builder using the
+            document's declared charset), a bytes-like object, an open binary file or a path
+            (see ``html2ans.inputs``)
+        :type html: str or bytes
+        :param start_tag: where to start parsing (if not provided, all tags will be parsed)
+        :type start_tag: str
+        :keyword with_stats: whether to also return ``ConversionStats`` for the document (the
+            ``document_cache`` isn't used when collecting stats)
+        :type with_stats: bool
+        :return: a list of ANS elements as dictionaries (or, with ``with_stats``, a tuple of
+            that list and a ``html2ans.instrumentation.ConversionStats``)
+
+        """
+        with_stats = kwargs.pop('with_stats', False)
+        html = read_html(html, self.memory_map)
+        if not with_stats:
+            document_cache = self.document_cache
+            if document_cache is None:
+                return list(self.generate_ans_iter(html, start_tag, *args, **kwargs))
+            cache_key = document_cache_key(self.get_config_fingerprint(), html, start_tag)
+            output_elements = document_cache.get(cache_key)
+            if output_elements is None:
+                output_elements = list(self.generate_ans_iter(html, start_tag, *args, **kwargs))
+                document_cache.set(cache_key, output_elements)
+            elif self.compact_output:
+                output_elements = [compact_element(output_element) for output_element in output_elements]
+            return output_elements
+
+        conversion_stats = ConversionStats()
+        timer = conversion_stats.timer
+        start_time = timer()
+        root, elements = self._build_start(html, start_tag)
+        conversion_stats.tree_build_time = timer() - start_time
+        conversion_stats.node_count = sum(1 for _ in root.descendants)
+
+        start_time = timer()
+        output_elements = list(self._iter_ans(root, elements, conversion_stats))
+        conversion_stats.conversion_time = timer() - start_time
+        elements_by_type = conversion_stats.elements_by_type
+        for output_element in output_elements:
+            ans_type = output_element.get('type')
+            elements_by_type[ans_type] = elements_by_type.get(ans_type, 0) + 1
+        return output_elements, conversion_stats
+
+    def generate_ans_iter(self, html, start_tag="body", *args, **kwargs):
+        """
+        Parses html and yields ANS elements in a jsonify-able format as each element (each
+        child of ``start_tag``, or of a wrapper element within it) is converted, rather than
+        once the whole document has been converted.
+
+        :param html: the html to parse (see ``generate_ans``)
+        :type html: str or bytes
+        :param start_tag: where to start parsing (if not provided, all tags will be parsed)
+        :type start_tag: str
+        :return: a generator of ANS elements as dictionaries
+
+        """
+        root, elements = self._build_start(read_html(html, self.memory_map), start_tag)
+        return self._iter_ans(root, elements)
+
+    def _build_start(self, html, start_tag):
+        """
+        Builds the document tree (see ``build_tree``) and finds where parsing should start
+        (see ``find_start``).
+        """
+        if self.text_fixer is not None:
+            html = self.text_fixer.fix_document(html)
+        if self.parse_start_tag_only and start_tag:
+            tree = self.build_tree(html, start_tag)
+            root, elements = self.find_start(tree, start_tag)
+            if root is tree:
+                # start_tag isn't in the document, so every tag needs to be parsed
+                root, elements = self.find_start(self.build_tree(html), start_tag)
+            return root, elements
+        return self.find_start(self.build_tree(html), start_tag)
+
+    def _iter_ans(self, root, elements, conversion_stats=None):
+        """
+        Converts the given top-level ``elements`` (under ``root``), yielding the ANS elements
+        each element produces as soon as it's converted (see ``_iter_ans_steps``).
+        """
+        for output_elements in self._iter_ans_steps(root, elements, conversion_stats):
+            for output_element in output_elements:
+                yield output_element
+
+    def _iter_ans_steps(self, root, elements, conversion_stats=None):
+        """
+        Converts the given top-level ``elements`` (under ``root``) one element at a time
+        (descending into wrappers, see ``_iter_parsed_elements``), yielding the list of ANS
+        elements each one produced (which may be empty).
+        """
+        node_facts = NodeFacts(root, type(self)) if self.precompute_node_facts else None
+        text_fixer = self.text_fixer
+        compact_output = self.compact_output
+        embed_scan = EmbedScan()
+        parsed_elements = self._iter_parsed_elements(elements)
+        while True:
+            # only active while this generator is running so that interleaved
+            # generators don't see each other's facts/stats/fixers/embed scans
+            if node_facts is None and conversion_stats is None and text_fixer is None:
+                with activate_embed_scan(embed_scan):
+                    output_elements = next(parsed_elements, None)
+            else:
+                with activate_node_facts(node_facts), activate_conversion_stats(conversion_stats), \
+                        activate_text_fixer(text_fixer), activate_embed_scan(embed_scan):
+                    output_elements = next(parsed_elements, None)
+            if output_elements is None:
+                return
+            if compact_output:
+                output_elements = [compact_element(output_element) for output_element in output_elements]
+            yield output_elements
+
+    def generate_ans_json(self, html, fp, start_tag="body", fast_encoder=True):
+        """
+        Parses html and writes the ANS elements to ``fp`` as a JSON array, serializing each
+        top-level element as soon as it's converted (see ``html2ans.serialization``) rather than
+        building the whole list and then its JSON. The ``document_cache`` isn't used.
+
+        :param html: the html to parse (see ``generate_ans``)
+        :type html: str or bytes
+        :param fp: a binary or text file-like object, or a ``bytearray`` to append to
+        :param start_tag: where to start parsing (if not provided, all tags will be parsed)
+        :type start_tag: str
+        :param fast_encoder: whether to serialize with ``orjson`` if it is installed
+        :type fast_encoder: bool
+        :return: the number of ANS elements written
+        :rtype: int
+
+        """
+        return write_json_array(self.generate_ans_iter(html, start_tag), fp, fast_encoder)
+
+    def generate_ans_many(self, documents, start_tag="body", workers=None, chunksize=1, ordered=True):
+        """
+        Converts many documents using a pool of worker processes, each with its own copy
+        of this parser. An error converting one document doesn't stop the others; it is
+        returned in that document's result instead.
+
+        :param documents: an iterable of html documents
+        :param start_tag: where to start parsing in each document
+        :type start_tag: str
+        :param workers: the number of worker processes (defaults to the number of CPUs); if 0,
+            documents are converted in the current process
+        :type workers: int
+        :param chunksize: how many documents to send to a worker at a time
+        :type chunksize: int
+        :param ordered: whether results are yielded in the same order as ``documents``
+        :type ordered: bool
+        :return: a generator of ``html2ans.batch.BatchResult`` (``index``, ``output``, ``error``)
+
+        """
+        return generate_ans_many(self, documents, start_tag, workers, chunksize, ordered)
+
+    def agenerate_ans(self, html, start_tag="body", executor=None, yield_every=None):
+        """
+        Returns a coroutine that converts html without blocking the event loop for the whole
+        conversion (Python 3.6+, see ``html2ans.aio.agenerate_ans``).
+
         :param html: the html to parse
         :type html: str
-        :param start_tag: where to start parsing (if not provided, all tags will be parsed)
+        :param start_tag: where to start parsing
         :type start_tag: str
-        :return: a list of ANS elements as dictionaries
+        :param executor: the executor to convert in (defaults to the loop's default executor)
+        :type executor: concurrent.futures.Executor
+        :param yield_every: if provided, the document's tree is built in the executor and then
+            converted in the event loop itself, yielding control back to the loop after every
+            ``yield_every`` parsed elements
+        :type yield_every: int
+        :return: a coroutine returning a list of ANS elements as dictionaries
+
+        """
+        # imported here since html2ans.aio can't be imported on Python 2
+        from html2ans.aio import agenerate_ans
+        return agenerate_ans(self, html, start_tag, executor, yield_every)
+
+    def agenerate_ans_many(self, documents, start_tag="body", concurrency=4, executor=None, ordered=True):
+        """
+        Returns an async generator that converts many documents in an executor with at most
+        ``concurrency`` documents being converted at a time (Python 3.6+, see
+        ``html2ans.aio.agenerate_ans_many``).
+
+        :param documents: an iterable or async iterable of html documents
+        :param start_tag: where to start parsing in each document
+        :type start_tag: str
+        :param concurrency: the most documents to convert at a time
+        :type concurrency: int
+        :param executor: the executor to convert in (defaults to a thread pool with
+            ``concurrency`` threads)
+        :type executor: concurrent.futures.Executor
+        :param ordered: whether results are yielded in the same order as ``documents``
+        :type ordered: bool
+        :return: an async generator of ``html2ans.batch.BatchResult`` (``index``, ``output``, ``error``)
+
+        """
+        from html2ans.aio import agenerate_ans_many
+        return agenerate_ans_many(self, documents, start_tag, concurrency, executor, ordered)
+
+    def build_tree(self, html, start_tag=None):
+        """
+        Builds the document tree the element parsers will work on.
+
+        :param html: the html to parse (bytes-like html is passed to ``BeautifulSoup`` as
+            ``bytes``, see ``html2ans.inputs.as_markup``)
+        :type html: str or bytes
+        :param start_tag: if provided, only ``start_tag`` elements (and their contents) are
+            added to the tree
+        :type start_tag: str
+        :return: the parsed document
+        :rtype: bs4.BeautifulSoup
+
+        """
+        html = as_markup(html)
+        if start_tag:
+            return BeautifulSoup(html, self.soup_parse_lib, parse_only=SoupStrainer(start_tag))
+        return BeautifulSoup(html, self.soup_parse_lib)
+
+    def find_start(self, tree, start_tag):
+        """
+        Finds where parsing should start in the given document tree.
+
+        :param tree: the parsed document (see ``build_tree``)
+        :param start_tag: the name of the tag to start parsing at
+        :type start_tag: str
+        :return: a tuple of the tag parsing starts at and the elements to parse; if
+            ``start_tag`` isn't found, every tag in the document is parsed
 
         """
-        soup = BeautifulSoup(html, self.soup_parse_lib)
-        main_tag = soup.find(start_tag)
+        main_tag = tree.find(start_tag)
         if main_tag:
-            return self._parse_elements(main_tag.children)
-        else:
-            return self._parse_elements(soup.find_all(True))
+            return main_tag, main_tag.children
+        return tree, tree.find_all(True)
 
     def insert_parser(self, element_key, parser, position=None, *args, **kwargs):
         """
@@ -119,12 +452,18 @@ class BaseHtmlAnsParser(AbstractHtmlAnsParser, AbstractParserUtilities):
         :type position: int
 
         """
+        if self.frozen:
+            raise FrozenParserException("Parsers can't be added to a frozen document parser")
         applicable_parsers = self.parsers.get(element_key, [])
         if position is not None:
             applicable_parsers.insert(position, parser)
         else:
             applicable_parsers.append(parser)
         self.parsers[element_key] = applicable_parsers
+        self._dispatch_table = None
+        self._parsers_fingerprint = None
+        if self.fragment_cache is not None:
+            self.fragment_cache.clear()
 
     def add_parser(self, parser, *args, **kwargs):
         """
@@ -137,6 +476,129 @@ class BaseHtmlAnsParser(AbstractHtmlAnsParser, AbstractParserUtilities):
         for element_key in parser.applicable_elements:
             self.insert_parser(element_key, parser)
 
+    def get_config_fingerprint(self):
+        """
+        Describes everything about this parser's configuration that affects its output: its
+        class, ``ans_version``, ``soup_parse_lib``, ``suppress_exceptions``, ``text_fixer`` and
+        the class and applicability settings of each of its parsers. Used as part of document
+        and fragment cache keys.
+
+        :return: the fingerprint
+        :rtype: str
+        """
+        if self._parsers_fingerprint is None:
+            parsers = [
+                (element_key if isinstance(element_key, six.string_types) else element_key.__name__,
+                 [_describe_parser(parser) for parser in self.parsers[element_key]])
+                for element_key in self.parsers
+            ]
+            parsers.sort()
+            parsers.append(('backup', [_describe_parser(parser) for parser in self.BACKUP_PARSERS]))
+            self._parsers_fingerprint = hashlib.sha256(repr(parsers).encode('utf-8')).hexdigest()
+        return '{}.{}:{}:{}:{}:{}:{}'.format(
+            type(self).__module__, type(self).__name__, self.ans_version, self.soup_parse_lib,
+            self.suppress_exceptions, self.text_fixer, self._parsers_fingerprint)
+
+    def compile_parsers(self):
+        """
+        Builds the dispatch table used by ``_parse_element``: a mapping of each key in
+        ``self.parsers`` to a tuple of its parsers followed by ``BACKUP_PARSERS``. The table
+        is built lazily and rebuilt after ``add_parser``/``insert_parser``; call this directly
+        if ``parsers`` or ``BACKUP_PARSERS`` are modified by other means.
+
+        Parsers gated on ``applicable_classes`` (that use the default ``is_applicable``) are
+        also indexed by (element key, CSS class) so that elements without a matching class
+        skip them entirely.
+
+        :return: the compiled dispatch table
+        :rtype: dict
+
+        """
+        backup_parsers = tuple(self.BACKUP_PARSERS)
+        dispatch_table = {}
+        unclassed_table = {}
+        class_index = {}
+        for element_key, applicable_parsers in self.parsers.items():
+            candidates = tuple(applicable_parsers) + backup_parsers
+            dispatch_table[element_key] = candidates
+            indexed_classes = set()
+            for parser in applicable_parsers:
+                required_classes = _get_required_classes(parser)
+                if required_classes:
+                    indexed_classes.update(required_classes)
+            if indexed_classes:
+                unclassed_table[element_key] = tuple(
+                    parser for parser in candidates if not _get_required_classes(parser))
+                class_index[element_key] = frozenset(indexed_classes)
+        self._backup_candidates = backup_parsers
+        self._unclassed_table = unclassed_table
+        self._class_index = class_index
+        self._class_candidates = {}
+        self._dispatch_table = dispatch_table
+        return dispatch_table
+
+    def freeze(self):
+        """
+        Builds everything that is otherwise built lazily on first use (the dispatch table, the
+        configuration fingerprint and the merged embed pattern) and stops parsers from being
+        added, so that this document parser can be shared between threads without any of
+        them changing its configuration. ``parsers`` becomes a mapping of element keys to
+        tuples.
+
+        :return: this document parser
+        :rtype: BaseHtmlAnsParser
+        """
+        if not self.frozen:
+            self.parsers = {element_key: tuple(parsers) for element_key, parsers in self.parsers.items()}
+            self.compile_parsers()
+            self.get_config_fingerprint()
+            if not EMBED_PROVIDERS.compiled:
+                EMBED_PROVIDERS.compile()
+            self.frozen = True
+        return self
+
+    def get_parser_candidates(self, element_key, element_classes=None):
+        """
+        Returns the parsers to try, in order, for elements with the given key
+        (e.g. ``'p'`` or ``NavigableString``).
+
+        :param element_key: the tag name or node type of the element
+        :param element_classes: the CSS classes of the element; if provided, parsers
+            that require classes the element doesn't have are left out
+        :type element_classes: list
+        :return: the parsers for this key followed by ``BACKUP_PARSERS``
+        :rtype: tuple
+
+        """
+        dispatch_table = self._dispatch_table
+        if dispatch_table is None:
+            dispatch_table = self.compile_parsers()
+        if element_classes is not None:
+            indexed_classes = self._class_index.get(element_key)
+            if indexed_classes:
+                return self._get_class_candidates(element_key, indexed_classes, element_classes)
+        return dispatch_table.get(element_key, self._backup_candidates)
+
+    def _get_class_candidates(self, element_key, indexed_classes, element_classes):
+        """
+        Returns the parsers for ``element_key`` that are either not gated on classes or
+        whose ``applicable_classes`` are all present in ``element_classes``. Results are
+        cached per combination of indexed classes.
+        """
+        if isinstance(element_classes, six.string_types):
+            element_classes = element_classes.split()
+        matched_classes = indexed_classes.intersection(element_classes)
+        if not matched_classes:
+            return self._unclassed_table[element_key]
+        cache_key = (element_key, matched_classes)
+        candidates = self._class_candidates.get(cache_key)
+        if candidates is None:
+            candidates = tuple(
+                parser for parser in self._dispatch_table[element_key]
+                if (_get_required_classes(parser) or frozenset()).issubset(matched_classes))
+            self._class_candidates[cache_key] = candidates
+        return candidates
+
     def _parse_elements(self, elements, *args, **kwargs):
         """
         Parses a list of html elements (produced by ``BeautifulSoup``) to ANS.
@@ -146,28 +608,52 @@ class BaseHtmlAnsParser(AbstractHtmlAnsParser, AbstractParserUtilities):
 
         """
         output_elements = []
+        for parsed_elements in self._iter_parsed_elements(elements):
+            output_elements.extend(parsed_elements)
+        return output_elements
+
+    def _iter_parsed_elements(self, elements):
+        """
+        Parses html elements (produced by ``BeautifulSoup``) to ANS one at a time; the
+        children of wrapper elements are parsed in place of the wrapper.
+
+        :param elements: the children to parse
+        :return: a generator of the list of ANS elements produced by each parsed element
+
+        """
         for item in elements:
             if not self.is_empty(item):
                 if self.is_wrapper(item) and isinstance(item, Tag):
-                    output_elements.extend(self._parse_elements(item.children))
-                elif isinstance(item, Tag):
+                    for output_elements in self._iter_parsed_elements(item.children):
+                        yield output_elements
+                    continue
+                output_elements = []
+                if isinstance(item, Tag):
                     self._parse_element(item.name, item, output_elements)
                 else:
                     self._parse_element(type(item), item, output_elements)
-        return output_elements
+                yield output_elements
 
     def _parse_element(self, element_key, element, output_elements):
         """
-        Builds a list of parsers for the given element (using ``self.parsers`` and
-        ``self.BACKUP_PARSERS``). If ``_attempt_element_parse`` returns a
-        successful result, adds that result to the list of ``output_elements``.
+        Looks up the parsers for the given element (``self.parsers`` followed by
+        ``self.BACKUP_PARSERS``, see ``compile_parsers``). If ``_attempt_element_parse``
+        returns a successful result, adds that result to the list of ``output_elements``.
         """
-        parser_candidates = self.parsers.get(element_key, [])
         # if none of the parser_candidates work, we want to check for embeds or
         # lastly, use raw_html
         # the BACKUP_PARSERS handle this logic
-        parser_candidates.extend(self.BACKUP_PARSERS)
-        parser_result = self._attempt_element_parse(element, parser_candidates)
+        if isinstance(element, Tag):
+            parser_candidates = self.get_parser_candidates(element_key, element.attrs.get('class') or ())
+        else:
+            parser_candidates = self.get_parser_candidates(element_key)
+        conversion_stats = get_active_conversion_stats()
+        if conversion_stats is not None:
+            parser_result = self._attempt_counted_element_parse(element, parser_candidates, conversion_stats)
+        elif self.fragment_cache is not None:
+            parser_result = self._attempt_memoized_element_parse(element, parser_candidates, self.fragment_cache)
+        else:
+            parser_result = self._attempt_element_parse(element, parser_candidates)
         if parser_result.match and parser_result.output:
             if isinstance(parser_result.output, list):
                 # allows parsers to parser out multiple elements
@@ -175,23 +661,118 @@ class BaseHtmlAnsParser(AbstractHtmlAnsParser, AbstractParserUtilities):
             else:
                 output_elements.append(parser_result.output)
 
+    def _attempt_counted_element_parse(self, element, parser_candidates, conversion_stats):
+        """
+        Same as ``_attempt_element_parse``, but tries the backup parsers (which come last
+        in ``parser_candidates``) separately so that ``conversion_stats`` can count the
+        elements only they matched.
+        """
+        backup_parsers = self._backup_candidates
+        split_index = len(parser_candidates)
+        while split_index and parser_candidates[split_index - 1] in backup_parsers:
+            split_index -= 1
+        parser_result = ParseResult(None, False)
+        if split_index:
+            parser_result = self._attempt_element_parse(element, parser_candidates[:split_index])
+        if not parser_result.match and split_index < len(parser_candidates):
+            parser_result = self._attempt_element_parse(element, parser_candidates[split_index:])
+            if parser_result.match and parser_result.output:
+                conversion_stats.backup_elements += 1
+        return parser_result
+
     def _attempt_element_parse(self, element, parser_candidates):
         """
         Tries to parse the given ``element`` using each parser in ``parser_candidates``
         until one is a match. If the parser has ``version_required`` set to true, the
         ANS version is added to the output.
         """
+        instrumentation = self.instrumentation
+        if instrumentation is not None and instrumentation.sample():
+            return self._attempt_instrumented_element_parse(element, parser_candidates, instrumentation)
+        for parser in parser_candidates:
+            try:
+                if parser.is_applicable(element):
+                    parser_result = parser.parse(element)
+                    if parser_result.match:
+                        if parser_result.output and parser.version_required:
+                            parser_result.output.setdefault("version", self.ans_version)
+                        return parser_result
+            except Exception as exc:
+                if self.suppress_exceptions:
+                    continue
+                else:
+                    raise ParsingException(exc)
+        return ParseResult(None, False)
+
+    def _attempt_memoized_element_parse(self, element, parser_candidates, fragment_cache):
+        """
+        Same as ``_attempt_element_parse``, but looks the element up in ``fragment_cache``
+        first. Results are only cached if every parser tried is ``cacheable`` and none of
+        them raised an exception. When a cached result is used, the parsers whose ``parse``
+        was called for it are given the element with ``repeat_side_effects``. If the first
+        candidate isn't ``cacheable``, nothing can be cached for the element, so it's parsed
+        without computing its cache key.
+        """
+        if not parser_candidates or not getattr(parser_candidates[0], 'cacheable', False):
+            return self._attempt_element_parse(element, parser_candidates)
+        cache_key = fragment_cache_key(self.get_config_fingerprint(), element)
+        cached = fragment_cache.get(cache_key)
+        if cached is not None:
+            match, output, parsed_by = cached
+            for parser in parsed_by:
+                parser.repeat_side_effects(element)
+            return ParseResult(output, match)
+
+        parsed_by = []
+        cacheable = True
+        parser_result = ParseResult(None, False)
+        for parser in parser_candidates:
+            cacheable = cacheable and getattr(parser, 'cacheable', False)
+            try:
+                if parser.is_applicable(element):
+                    parsed_by.append(parser)
+                    parser_result = parser.parse(element)
+                    if parser_result.match:
+                        if parser_result.output and parser.version_required:
+                            parser_result.output.setdefault("version", self.ans_version)
+                        break
+            except Exception as exc:
+                cacheable = False
+                if self.suppress_exceptions:
+                    continue
+                else:
+                    raise ParsingException(exc)
+        else:
+            parser_result = ParseResult(None, False)
+        if cacheable:
+            fragment_cache.set(cache_key, parser_result.match, parser_result.output, tuple(parsed_by))
+        return parser_result
+
+    def _attempt_instrumented_element_parse(self, element, parser_candidates, instrumentation):
+        """
+        Same as ``_attempt_element_parse``, but records each parser's use in ``instrumentation``.
+        """
+        timer = instrumentation.timer
         for parser in parser_candidates:
+            stats = instrumentation.get_stats(parser)
+            start = timer()
             try:
+                stats.applicable_calls += 1
                 if parser.is_applicable(element):
+                    stats.applicable_hits += 1
+                    stats.parse_calls += 1
                     parser_result = parser.parse(element)
                     if parser_result.match:
+                        stats.matches += 1
                         if parser_result.output and parser.version_required:
                             parser_result.output.setdefault("version", self.ans_version)
                         return parser_result
             except Exception as exc:
+                stats.exceptions += 1
                 if self.suppress_exceptions:
                     continue
                 else:
                     raise ParsingException(exc)
+            finally:
+                stats.time += timer() - start
         return ParseResult(None, False)
@@ -0,0 +1,105 @@
+"""
+Batch conversion of many documents with a pool of worker processes. Each worker gets
+its own copy of the document parser once, when the worker starts, and reuses it for
+every document it converts.
+"""
+import pickle
+from collections import namedtuple
+
+from html2ans.exc import ParsingException
+
+BatchResult = namedtuple('BatchResult', ['index', 'output', 'error'])
+"""
+The result of converting one document in a batch: the ``index`` of the document in the
+input, the ANS ``output`` (``None`` if conversion failed) and the ``error`` raised while
+converting it (``None`` if conversion succeeded).
+"""
+
+_worker_parser = None
+
+
+def _init_worker(parser):
+    global _worker_parser
+    _worker_parser = parser
+
+
+def _picklable_error(error):
+    # results are sent back from the workers by pickling them
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return ParsingException(repr(error))
+
+
+def convert_document(parser, index, html, start_tag="body"):
+    """
+    Converts one document, catching any error raised so that it only affects this
+    document's result.
+
+    :param parser: the document parser to use
+    :type parser: html2ans.base.BaseHtmlAnsParser
+    :param index: the index of the document in the batch
+    :type index: int
+    :param html: the html to parse
+    :type html: str
+    :param start_tag: where to start parsing
+    :type start_tag: str
+    :return: the result for this document
+    :rtype: BatchResult
+
+    """
+    try:
+        return BatchResult(index, parser.generate_ans(html, start_tag=start_tag), None)
+    except Exception as error:
+        return BatchResult(index, None, error)
+
+
+def _convert_in_worker(task):
+    index, html, start_tag = task
+    result = convert_document(_worker_parser, index, html, start_tag)
+    if result.error is not None:
+        result = result._replace(error=_picklable_error(result.error))
+    return result
+
+
+def generate_ans_many(parser, documents, start_tag="body", workers=None, chunksize=1, ordered=True):
+    """
+    Converts many documents with ``parser``, using a pool of worker processes.
+
+    :param parser: the document parser to use (it is pickled and sent to each worker once)
+    :type parser: html2ans.base.BaseHtmlAnsParser
+    :param documents: an iterable of html documents
+    :param start_tag: where to start parsing in each document
+    :type start_tag: str
+    :param workers: the number of worker processes (defaults to the number of CPUs); if 0,
+        documents are converted in the current process
+    :type workers: int
+    :param chunksize: how many documents to send to a worker at a time
+    :type chunksize: int
+    :param ordered: whether results are yielded in the same order as ``documents``; if
+        ``False``, results are yielded as soon as they are ready
+    :type ordered: bool
+    :return: a generator of ``BatchResult`` (one per document)
+
+    """
+    tasks = ((index, html, start_tag) for index, html in enumerate(documents))
+    if workers == 0:
+        for index, html, start_tag in tasks:
+            yield convert_document(parser, index, html, start_tag)
+        return
+
+    # imported here since most conversions don't need it
+    import multiprocessing
+    pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(parser,))
+    try:
+        imap = pool.imap if ordered else pool.imap_unordered
+        for result in imap(_convert_in_worker, tasks, chunksize):
+            yield result
+        pool.close()
+    except BaseException:
+        # includes the generator being closed before all the results are consumed
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
@@ -0,0 +1,311 @@
+"""
+Caches for ``BaseHtmlAnsParser``:
+
+* document caches (see its ``document_cache`` option) store converted documents as JSON, keyed by
+  a hash of the html, where parsing started and the document parser's configuration (see
+  ``BaseHtmlAnsParser.get_config_fingerprint``)
+* ``LRUFragmentCache`` (see its ``fragment_cache`` option) stores the ANS produced for individual
+  elements, keyed by a hash of the element's markup, so blocks repeated across documents (embeds,
+  sign-up boxes, disclaimers, etc.) are only converted once
+
+Every hit is decoded from JSON, so callers get their own copy of the cached ANS and can modify it
+freely.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import six
+from html2ans.compact import json_default
+from html2ans.source_spans import outer_html
+
+
+def document_cache_key(config_fingerprint, html, start_tag):
+    """
+    :param config_fingerprint: the fingerprint of the document parser's configuration
+    :type config_fingerprint: str
+    :param html: the html being converted
+    :type html: str
+    :param start_tag: where parsing starts
+    :type start_tag: str
+    :return: the cache key for the converted document
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    digest.update(u'{}\0{}\0'.format(config_fingerprint, start_tag).encode('utf-8'))
+    digest.update(html.encode('utf-8') if isinstance(html, six.text_type) else html)
+    return digest.hexdigest()
+
+
+def fragment_cache_key(config_fingerprint, element):
+    """
+    :param config_fingerprint: the fingerprint of the document parser's configuration
+    :type config_fingerprint: str
+    :param element: the element being parsed
+    :type element: bs4.element.Tag or bs4.element.NavigableString
+    :return: the cache key for the element: a hash of its type and markup (as serialized by
+        the tree, so differences in quoting, attribute spacing, etc. in the original html
+        don't matter, or as written if the tree has source spans)
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    digest.update(u'{}\0{}\0'.format(config_fingerprint, type(element).__name__).encode('utf-8'))
+    digest.update(outer_html(element).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class AbstractDocumentCache(object):
+    """
+    The interface for document caches. Subclasses store and look up serialized (JSON)
+    documents with ``get_serialized`` and ``set_serialized``.
+    """
+
+    def get(self, key):
+        """
+        :param key: the document's cache key (see ``document_cache_key``)
+        :type key: str
+        :return: a copy of the cached ANS elements, or ``None`` if the document isn't cached
+        :rtype: list
+        """
+        serialized = self.get_serialized(key)
+        if serialized is None:
+            return None
+        return json.loads(serialized)
+
+    def set(self, key, ans_elements):
+        """
+        Caches converted ANS elements. Elements that can't be serialized to JSON (e.g. from a
+        custom parser that returns dates) aren't cached.
+
+        :param key: the document's cache key (see ``document_cache_key``)
+        :type key: str
+        :param ans_elements: the converted ANS elements (dictionaries or ``html2ans.compact``
+            objects)
+        :type ans_elements: list
+        """
+        try:
+            serialized = json.dumps(ans_elements, separators=(',', ':'), default=json_default)
+        except (TypeError, ValueError):
+            return
+        self.set_serialized(key, serialized)
+
+    def get_serialized(self, key):
+        raise NotImplementedError()
+
+    def set_serialized(self, key, serialized):
+        raise NotImplementedError()
+
+    def clear(self):
+        raise NotImplementedError()
+
+
+class LRUDocumentCache(AbstractDocumentCache):
+    """
+    An in-memory cache that evicts the least recently used documents once the total size
+    of the cached (serialized) documents goes over ``max_size``.
+
+    :param max_size: the most characters of serialized ANS to keep
+    :type max_size: int
+
+    """
+
+    def __init__(self, max_size=64 * 1024 * 1024):
+        self.max_size = max_size
+        self.size = 0
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def __getstate__(self):
+        # locks can't be pickled (e.g. when sent to generate_ans_many workers)
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get_serialized(self, key):
+        with self._lock:
+            serialized = self._documents.pop(key, None)
+            if serialized is not None:
+                self._documents[key] = serialized
+            return serialized
+
+    def set_serialized(self, key, serialized):
+        if len(serialized) > self.max_size:
+            return
+        with self._lock:
+            previous = self._documents.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._documents[key] = serialized
+            self.size += len(serialized)
+            while self.size > self.max_size:
+                _, evicted = self._documents.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+            self.size = 0
+
+
+class SqliteDocumentCache(AbstractDocumentCache):
+    """
+    A cache stored in a local sqlite database, so it can be shared between processes and
+    kept between runs.
+
+    :param path: the database file
+    :type path: str
+    :param max_entries: if provided, the oldest documents are removed once there are more
+        than this many
+    :type max_entries: int
+
+    """
+
+    def __init__(self, path, max_entries=None):
+        self.path = path
+        self.max_entries = max_entries
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # each process opens its own connection
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['_connection'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._connection is None:
+            import sqlite3
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS documents (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def get_serialized(self, key):
+        with self._lock:
+            row = self._connect().execute('SELECT value FROM documents WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_serialized(self, key, serialized):
+        with self._lock:
+            connection = self._connect()
+            # deleting first moves the document to the end of the rowid order
+            connection.execute('DELETE FROM documents WHERE key = ?', (key,))
+            connection.execute('INSERT INTO documents (key, value) VALUES (?, ?)', (key, serialized))
+            if self.max_entries is not None:
+                connection.execute(
+                    'DELETE FROM documents WHERE rowid NOT IN '
+                    '(SELECT rowid FROM documents ORDER BY rowid DESC LIMIT ?)', (self.max_entries,))
+            connection.commit()
+
+    def clear(self):
+        with self._lock:
+            connection = self._connect()
+            connection.execute('DELETE FROM documents')
+            connection.commit()
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class LRUFragmentCache(object):
+    """
+    An in-memory cache of parsed elements that evicts the least recently used entries once
+    there are more than ``max_entries``. Each entry holds whether the element was a match,
+    its serialized ANS and the element parsers whose ``parse`` was called (so their
+    ``repeat_side_effects`` can be called on hits).
+
+    Every lookup serializes the element's markup to compute its key (see
+    ``fragment_cache_key``), which takes about as long as converting most elements, so hits
+    save little and misses cost about twice as much. The cache only pays off when the same
+    markup is converted again, within a document or across documents (and only for elements
+    that are expensive to convert); on documents that are all new, whole documents are
+    converted 20% or more slower (more with newer ``BeautifulSoup`` releases, which serialize
+    more slowly).
+
+    :param max_entries: the most elements to keep
+    :type max_entries: int
+
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        :param key: the element's cache key (see ``fragment_cache_key``)
+        :type key: str
+        :return: a tuple of whether the element was a match, a copy of its ANS (or ``None``)
+            and the element parsers whose ``parse`` was called; ``None`` if the element isn't cached
+        :rtype: tuple
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self._entries[key] = entry
+        match, serialized, parsed_by = entry
+        return match, None if serialized is None else json.loads(serialized), parsed_by
+
+    def set(self, key, match, output, parsed_by):
+        """
+        Caches the result of parsing an element. Results that can't be serialized as JSON
+        aren't cached.
+
+        :param key: the element's cache key (see ``fragment_cache_key``)
+        :type key: str
+        :param match: whether the element was a match
+        :type match: bool
+        :param output: the element's ANS
+        :type output: dict or list
+        :param parsed_by: the element parsers whose ``parse`` was called, in order
+        :type parsed_by: tuple
+        """
+        try:
+            serialized = None if output is None else json.dumps(output, separators=(',', ':'))
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (match, serialized, parsed_by)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,205 @@
+"""
+The ``html2ans`` command: converts html files (or JSONL streams of html) to JSONL ANS,
+one line per document, using a pool of worker processes.
+"""
+import argparse
+import glob
+import gzip
+import io
+import json
+import os
+import sys
+
+import six
+from html2ans.default import DefaultHtmlAnsParser, LxmlHtmlAnsParser, SourceSpanHtmlAnsParser
+
+HTML_EXTENSIONS = ('.html', '.htm')
+JSONL_EXTENSIONS = ('.jsonl', '.ndjson')
+PARSER_CLASSES = {
+    'default': DefaultHtmlAnsParser,
+    'lxml': LxmlHtmlAnsParser,
+    'spans': SourceSpanHtmlAnsParser,
+}
+
+
+def open_text(path, mode='r'):
+    """
+    Opens a utf-8 text file for reading or writing (``mode`` is ``'r'`` or ``'w'``),
+    compressing/decompressing it with gzip if its name ends in ``.gz``. ``-`` is
+    stdin/stdout.
+    """
+    if path == '-':
+        stream = sys.stdin if mode == 'r' else sys.stdout
+        return io.TextIOWrapper(getattr(stream, 'buffer', stream), encoding='utf-8')
+    if path.endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path, mode + 'b'), encoding='utf-8')
+    return io.open(path, mode, encoding='utf-8')
+
+
+def read_binary(path):
+    """
+    Reads a whole file (decompressing it with gzip if its name ends in ``.gz``) without
+    decoding it.
+    """
+    with (gzip.open(path, 'rb') if path.endswith('.gz') else io.open(path, 'rb')) as binary_file:
+        return binary_file.read()
+
+
+def close_text(text_file, path):
+    """
+    Closes a file opened with ``open_text``, leaving stdin/stdout open.
+    """
+    if path == '-':
+        text_file.flush()
+        text_file.detach()
+    else:
+        text_file.close()
+
+
+def _base_name(path):
+    return path[:-3] if path.endswith('.gz') else path
+
+
+def _is_jsonl(path):
+    return path == '-' or _base_name(path).endswith(JSONL_EXTENSIONS)
+
+
+def expand_inputs(inputs):
+    """
+    Expands the input arguments (files, directories, glob patterns or ``-``) into a list
+    of file paths. Directories are searched recursively for html and JSONL files
+    (optionally gzipped).
+
+    :param inputs: the input arguments
+    :type inputs: list
+    :return: the paths, in order
+    :rtype: list
+
+    """
+    paths = []
+    for input_path in inputs:
+        if input_path == '-' or os.path.isfile(input_path):
+            paths.append(input_path)
+        elif os.path.isdir(input_path):
+            for directory, directory_names, file_names in os.walk(input_path):
+                directory_names.sort()
+                paths.extend(
+                    os.path.join(directory, file_name) for file_name in sorted(file_names)
+                    if _base_name(file_name).endswith(HTML_EXTENSIONS + JSONL_EXTENSIONS)
+                )
+        else:
+            matches = sorted(glob.glob(input_path))
+            if not matches:
+                raise ValueError("No files found for {}".format(input_path))
+            paths.extend(matches)
+    return paths
+
+
+def iter_documents(paths, html_key='html', id_key='id'):
+    """
+    Reads documents from html files (the whole file is one document, identified by its
+    path and left undecoded so the tree builder can use its declared charset) and JSONL
+    files (each line is a JSON object holding one document, identified by its ``id_key``
+    value or its file path and line number).
+
+    :param paths: the paths to read
+    :type paths: list
+    :param html_key: the key holding the html in JSONL objects
+    :type html_key: str
+    :param id_key: the key holding the document id in JSONL objects
+    :type id_key: str
+    :return: a generator of ``(id, html)`` tuples
+
+    """
+    for path in paths:
+        if not _is_jsonl(path):
+            yield path, read_binary(path)
+            continue
+        input_file = open_text(path)
+        try:
+            for line_number, line in enumerate(input_file, 1):
+                if line.strip():
+                    document = json.loads(line)
+                    yield document.get(id_key, '{}:{}'.format(path, line_number)), document[html_key]
+        finally:
+            close_text(input_file, path)
+
+
+def get_argument_parser():
+    """
+    :return: the argument parser for the ``html2ans`` command
+    :rtype: argparse.ArgumentParser
+    """
+    argument_parser = argparse.ArgumentParser(prog='html2ans', description=__doc__.strip())
+    argument_parser.add_argument(
+        'inputs', nargs='*', default=['-'],
+        help="html or JSONL files (optionally gzipped), directories or glob patterns; - (the default) reads JSONL "
+             "from stdin")
+    argument_parser.add_argument(
+        '-o', '--output', default='-', help="the JSONL file to write (gzipped if it ends in .gz); defaults to stdout")
+    argument_parser.add_argument(
+        '-w', '--workers', type=int, default=None,
+        help="the number of worker processes (defaults to the number of CPUs; 0 converts in this process)")
+    argument_parser.add_argument(
+        '--chunksize', type=int, default=1, help="how many documents to send to a worker at a time")
+    argument_parser.add_argument(
+        '--unordered', action='store_true', help="write documents as they are converted rather than in input order")
+    argument_parser.add_argument('--start-tag', default='body', help="where to start parsing (default: body)")
+    argument_parser.add_argument('--ans-version', default=None, help="the ANS version to include in the output")
+    argument_parser.add_argument(
+        '--suppress-exceptions', action='store_true', help="skip elements that fail to parse instead of failing the document")
+    argument_parser.add_argument(
+        '--parser', choices=sorted(PARSER_CLASSES), default='default', help="the document parser to use (default: default)")
+    argument_parser.add_argument('--html-key', default='html', help="the key holding the html in JSONL input (default: html)")
+    argument_parser.add_argument('--id-key', default='id', help="the key holding the document id in JSONL input (default: id)")
+    return argument_parser
+
+
+def main(args=None):
+    """
+    Runs the ``html2ans`` command. Each output line is a JSON object with the document's
+    ``id`` and either its ``content_elements`` or the ``error`` that stopped it from being
+    converted.
+
+    :param args: the command line arguments (defaults to ``sys.argv[1:]``)
+    :type args: list
+    :return: the exit status: 0 if every document was converted, 1 otherwise
+    :rtype: int
+
+    """
+    argument_parser = get_argument_parser()
+    options = argument_parser.parse_args(args)
+    try:
+        paths = expand_inputs(options.inputs)
+    except ValueError as error:
+        argument_parser.error(str(error))
+
+    parser = PARSER_CLASSES[options.parser](options.ans_version, suppress_exceptions=options.suppress_exceptions)
+    document_ids = {}
+
+    def documents():
+        for index, (document_id, html) in enumerate(iter_documents(paths, options.html_key, options.id_key)):
+            document_ids[index] = document_id
+            yield html
+
+    failed = False
+    output_file = open_text(options.output, 'w')
+    try:
+        results = parser.generate_ans_many(
+            documents(), start_tag=options.start_tag, workers=options.workers, chunksize=options.chunksize,
+            ordered=not options.unordered)
+        for result in results:
+            output = {'id': document_ids.pop(result.index)}
+            if result.error is None:
+                output['content_elements'] = result.output
+            else:
+                output['error'] = str(result.error) or repr(result.error)
+                failed = True
+            output_file.write(six.text_type(json.dumps(output)) + u'\n')
+    finally:
+        close_text(output_file, options.output)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
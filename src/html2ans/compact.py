@@ -0,0 +1,287 @@
+"""
+Compact ANS elements for ``BaseHtmlAnsParser``'s ``compact_output`` option. The element parsers
+build plain dictionaries; with ``compact_output``, each converted element is turned into an
+instance of one of the ``__slots__`` classes here (see ``compact_element``) before it's returned,
+which takes a fraction of the memory when many converted documents are kept around (e.g.
+buffered for a bulk upload).
+
+Compact elements don't store their ANS ``type`` (it's a class attribute) and intern the values
+and keys that repeat across elements (``list_type``, referent providers and types, attribute
+names in ``additional_properties``, etc.). They can be read like the dictionaries they replace
+(``element['content']``, ``element.get('caption')``), but nested elements stay compact (and lists
+of them are tuples). ``to_dict`` returns the same dictionary the parsers built, and ``to_json``
+(or ``json.dumps(..., default=json_default)``) serializes them.
+
+Dictionaries of types without a compact class (e.g. from custom parsers) are left as they are;
+classes for other types can be added to ``ELEMENT_CLASSES``.
+"""
+import json
+
+import six
+
+_MISSING = object()
+_interned = {}
+
+INTERN_LIMIT = 10000
+"""
+The most strings ``intern_string`` keeps. Interned keys include attribute names taken from the
+converted html, so once this many strings are kept, new strings are no longer interned (and the
+table stops growing).
+"""
+
+
+def intern_string(value):
+    """
+    :param value: a string that repeats across elements
+    :return: the one copy of ``value`` kept for all elements (``value`` itself if it isn't a string
+        or ``INTERN_LIMIT`` other strings are already kept)
+    """
+    if not isinstance(value, six.string_types):
+        return value
+    interned = _interned.get(value)
+    if interned is not None:
+        return interned
+    if len(_interned) >= INTERN_LIMIT:
+        return value
+    return _interned.setdefault(value, value)
+
+
+def _intern_keys(mapping):
+    if not isinstance(mapping, dict):
+        return mapping
+    return {intern_string(key): value for key, value in mapping.items()}
+
+
+class CompactObject(object):
+    """
+    The base class for compact ANS objects. ``fields`` are the keys stored in slots (in the order
+    ``to_dict`` adds them); any other keys are kept in the ``extra`` dictionary.
+    """
+
+    __slots__ = ('extra',)
+    fields = ()
+    interned_fields = ()
+    """The fields whose (string) values are interned"""
+    element_fields = ()
+    """The fields holding lists of ANS elements, which are compacted too"""
+
+    @classmethod
+    def from_dict(cls, ans_dict):
+        """
+        :param ans_dict: the dictionary built by an element parser
+        :type ans_dict: dict
+        :return: the compact equivalent of ``ans_dict``
+        """
+        compact_object = cls.__new__(cls)
+        extra = None
+        fields = cls.fields
+        for key, value in ans_dict.items():
+            if key in fields:
+                setattr(compact_object, key, compact_object._compact_value(key, value))
+            elif not compact_object._is_implied(key, value):
+                if extra is None:
+                    extra = {}
+                extra[intern_string(key)] = value
+        compact_object.extra = extra
+        return compact_object
+
+    def _is_implied(self, key, value):
+        return False
+
+    def _compact_value(self, key, value):
+        if key in self.interned_fields:
+            return intern_string(value)
+        if key == 'additional_properties':
+            return _intern_keys(value)
+        if key in self.element_fields and isinstance(value, list):
+            return tuple(compact_element(element) for element in value)
+        return value
+
+    def to_dict(self):
+        """
+        :return: the dictionary this object was made from (nested compact objects are converted
+            too)
+        :rtype: dict
+        """
+        result = {}
+        for key in self.fields:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                result[key] = _to_dict_value(value)
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+    def to_json(self, **kwargs):
+        """
+        :return: the JSON serialization of ``to_dict`` (``kwargs`` are passed to ``json.dumps``)
+        :rtype: str
+        """
+        return json.dumps(self, default=json_default, **kwargs)
+
+    def __getitem__(self, key):
+        if key in self.fields:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __eq__(self, other):
+        if isinstance(other, CompactObject):
+            other = other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.to_dict())
+
+
+class AnsElement(CompactObject):
+    """
+    The base class for compact ANS elements of type ``ans_type``.
+    """
+
+    __slots__ = ()
+    ans_type = None
+
+    def _is_implied(self, key, value):
+        return key == 'type' and value == self.ans_type
+
+    def __getitem__(self, key):
+        if key == 'type':
+            return self.ans_type
+        return super(AnsElement, self).__getitem__(key)
+
+    def to_dict(self):
+        result = {'type': self.ans_type}
+        result.update(super(AnsElement, self).to_dict())
+        return result
+
+
+class TextElement(AnsElement):
+    __slots__ = fields = ('content', 'additional_properties', 'version')
+    ans_type = 'text'
+
+
+class HeaderElement(AnsElement):
+    __slots__ = fields = ('content', 'level', 'additional_properties', 'version')
+    ans_type = 'header'
+
+
+class ImageElement(AnsElement):
+    __slots__ = fields = ('url', 'caption', 'width', 'height', 'additional_properties', 'version')
+    ans_type = 'image'
+
+
+class Referent(CompactObject):
+    """
+    The ``referent`` of a ``ReferenceElement``.
+    """
+
+    __slots__ = fields = ('provider', 'type', 'id', 'service')
+    interned_fields = ('provider', 'type', 'service')
+
+
+class ReferenceElement(AnsElement):
+    __slots__ = fields = ('referent', 'additional_properties', 'version')
+    ans_type = 'reference'
+
+    def _compact_value(self, key, value):
+        if key == 'referent' and isinstance(value, dict):
+            return Referent.from_dict(value)
+        return super(ReferenceElement, self)._compact_value(key, value)
+
+
+class ListElement(AnsElement):
+    __slots__ = fields = ('list_type', 'items', 'additional_properties', 'version')
+    ans_type = 'list'
+    interned_fields = ('list_type',)
+    element_fields = ('items',)
+
+
+class QuoteElement(AnsElement):
+    __slots__ = fields = ('content_elements', 'additional_properties', 'version')
+    ans_type = 'quote'
+    element_fields = ('content_elements',)
+
+
+class RawHtmlElement(AnsElement):
+    __slots__ = fields = ('content', 'additional_properties', 'version')
+    ans_type = 'raw_html'
+
+
+class AudioElement(AnsElement):
+    __slots__ = fields = ('streams', 'additional_properties', 'version')
+    ans_type = 'audio'
+
+
+class InterstitialLinkElement(AnsElement):
+    __slots__ = fields = ('url', 'content', 'additional_properties', 'version')
+    ans_type = 'interstitial_link'
+
+
+ELEMENT_CLASSES = {
+    element_class.ans_type: element_class
+    for element_class in [
+        TextElement,
+        HeaderElement,
+        ImageElement,
+        ReferenceElement,
+        ListElement,
+        QuoteElement,
+        RawHtmlElement,
+        AudioElement,
+        InterstitialLinkElement,
+    ]
+}
+"""
+The compact class for each ANS type.
+"""
+
+
+def compact_element(ans_element):
+    """
+    :param ans_element: an ANS element built by an element parser
+    :return: the compact equivalent of ``ans_element``, or ``ans_element`` itself if it isn't
+        a dictionary or there's no compact class for its type
+    """
+    if isinstance(ans_element, dict):
+        element_class = ELEMENT_CLASSES.get(ans_element.get('type'))
+        if element_class is not None:
+            return element_class.from_dict(ans_element)
+    return ans_element
+
+
+def _to_dict_value(value):
+    if isinstance(value, CompactObject):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [_to_dict_value(item) for item in value]
+    return value
+
+
+def json_default(value):
+    """
+    Serializes compact objects with ``json.dumps(..., default=json_default)``.
+    """
+    if isinstance(value, CompactObject):
+        return value.to_dict()
+    raise TypeError("{!r} is not JSON serializable".format(value))
@@ -0,0 +1,275 @@
+"""
+Generates synthetic html articles for benchmarking and scaling tests. Documents are
+deterministic for a given seed and set of options, and can be tuned in size, nesting,
+paragraph length, inline formatting, list nesting and embed mix (every embed provider
+handled by ``html2ans.parsers.embeds`` has a template).
+
+From the command line, ``python -m html2ans.corpus`` writes generated documents as JSONL
+that the ``html2ans`` command can read::
+
+    python -m html2ans.corpus --count 100 --blocks 300 | html2ans > ans.jsonl
+"""
+import argparse
+import json
+import random
+import sys
+
+WORDS = (
+    'the city council voted on tuesday to approve a new budget that includes funding for schools parks roads '
+    'and public safety officials said residents have waited years for repairs while critics argued the plan '
+    'does not go far enough to address housing costs in neighborhoods across the region during a long hearing'
+).split()
+
+INLINE_TAGS = ('strong', 'em', 'b', 'i', 'u', 'a')
+
+EMBED_TEMPLATES = {
+    'arcplayer': '<div class="arc-player" data-org="washingtonpost" data-uuid="{uuid}"></div>',
+    'dailymotion': '<iframe src="https://www.dailymotion.com/embed/video/x{id}"></iframe>',
+    'facebook-post': (
+        '<iframe src="https://www.facebook.com/plugins/post.php?href='
+        'https://www.facebook.com/zuck/posts/{number}&width=500"></iframe>'
+    ),
+    'facebook-video': (
+        '<iframe src="https://www.facebook.com/plugins/video.php?href='
+        'https://www.facebook.com/chicagotribune/videos/{number}/&show_text=0&width=560"></iframe>'
+    ),
+    'flickr': (
+        '<a data-flickr-embed="true" href="https://www.flickr.com/photos/16177003@N03/{number}/in/photolist-{id}" '
+        'title="Photo"><img src="https://farm9.staticflickr.com/8066/{number}_{id}_k.jpg" alt="Photo"></a>'
+        '<script async src="//embedr.flickr.com/assets/client-code.js" charset="utf-8"></script>'
+    ),
+    'iframe': '<iframe src="https://www.example.com/widgets/{id}" width="600" height="400"></iframe>',
+    'imgur': (
+        '<blockquote class="imgur-embed-pub" lang="en" data-id="{id}">'
+        '<a href="https://imgur.com/{id}">View post on imgur.com</a></blockquote>'
+        '<script async src="//s.imgur.com/min/embed.js" charset="utf-8"></script>'
+    ),
+    'instagram': (
+        '<blockquote class="instagram-media" data-instgrm-permalink="https://www.instagram.com/p/{id}/" '
+        'data-instgrm-version="12"><div><p><a href="https://www.instagram.com/p/{id}/" target="_blank">'
+        'A post shared by CNN (@cnn)</a></p></div></blockquote>'
+        '<script async src="//www.instagram.com/embed.js"></script>'
+    ),
+    'polldaddy': (
+        '<noscript><b>Click here to see this poll: '
+        '<a href="https://poll.fm/{number}">https://poll.fm/{number}</a></b></noscript>'
+    ),
+    'reddit': (
+        '<blockquote class="reddit-card" data-card-created="1549834040">'
+        '<a href="https://www.reddit.com/r/programming/comments/{id}/a_post/">A post</a> from '
+        '<a href="http://www.reddit.com/r/programming">r/programming</a></blockquote>'
+        '<script async src="//embed.redditmedia.com/widgets/platform.js" charset="UTF-8"></script>'
+    ),
+    'spotify': '<iframe src="https://open.spotify.com/user/{number}/playlist/{id}"></iframe>',
+    'tumblr': (
+        '<div class="tumblr-post" data-href="https://embed.tumblr.com/embed/post/{id}/{number}">'
+        '<a href="https://herepet.tumblr.com/post/{number}/source">https://herepet.tumblr.com/post/{number}/source</a>'
+        '</div><script async src="https://assets.tumblr.com/post.js"></script>'
+    ),
+    'twitter-tweet': (
+        '<blockquote class="twitter-tweet" data-lang="en"><p lang="en" dir="ltr">{text} '
+        '<a href="https://t.co/{id}">https://t.co/{id}</a></p>&mdash; Los Angeles Times (@latimes) '
+        '<a href="https://twitter.com/latimes/status/{number}?ref_src=twsrc%5Etfw">November 21, 2018</a></blockquote>'
+        '<script async src="https://platform.twitter.com/widgets.js" charset="utf-8"></script>'
+    ),
+    'twitter-video': (
+        '<blockquote class="twitter-video" data-lang="en"><p lang="en" dir="ltr">{text} '
+        '<a href="https://t.co/{id}">pic.twitter.com/{id}</a></p>&mdash; HAZ (@HAZ) '
+        '<a href="https://twitter.com/HAZ/status/{number}?ref_src=twsrc%5Etfw">August 10, 2018</a></blockquote>'
+        '<script async src="https://platform.twitter.com/widgets.js" charset="utf-8"></script>'
+    ),
+    'vimeo': '<iframe src="https://player.vimeo.com/video/{number}"></iframe>',
+    'vine': '<iframe class="vine-embed" src="https://vine.co/v/{id}/embed/simple"></iframe>',
+    'youtube': '<iframe src="https://www.youtube.com/embed/{id}"></iframe>',
+}
+"""
+Html templates for each embed provider (with ``id``, ``number``, ``uuid`` and ``text`` placeholders).
+"""
+
+_ID_CHARACTERS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+
+
+class CorpusGenerator(object):
+    """
+    Generates synthetic html articles.
+
+    :param seed: the seed that determines the generated documents
+    :type seed: int
+    :param blocks: how many top-level blocks (paragraphs, headers, lists, embeds, etc.) each document has
+    :type blocks: int
+    :param paragraph_words: the average number of words in a paragraph
+    :type paragraph_words: int
+    :param inline_density: the fraction of words wrapped in inline formatting (``strong``, ``em``, ``a``, etc.)
+    :type inline_density: float
+    :param depth: how many levels of ``div`` wrappers blocks are nested in
+    :type depth: int
+    :param list_depth: how deeply lists are nested
+    :type list_depth: int
+    :param list_items: how many items each list has
+    :type list_items: int
+    :param embed_ratio: the fraction of blocks that are embeds
+    :type embed_ratio: float
+    :param embed_providers: which ``EMBED_TEMPLATES`` to use (defaults to all of them); embeds
+        cycle through the providers so every provider appears once there are enough embeds
+    :type embed_providers: list
+
+    """
+
+    def __init__(
+            self,
+            seed=0,
+            blocks=30,
+            paragraph_words=50,
+            inline_density=0.1,
+            depth=1,
+            list_depth=2,
+            list_items=4,
+            embed_ratio=0.1,
+            embed_providers=None):
+        self.seed = seed
+        self.blocks = blocks
+        self.paragraph_words = paragraph_words
+        self.inline_density = inline_density
+        self.depth = depth
+        self.list_depth = list_depth
+        self.list_items = list_items
+        self.embed_ratio = embed_ratio
+        self.embed_providers = sorted(embed_providers or EMBED_TEMPLATES)
+        self._random = random.Random(seed)
+        self._embed_count = 0
+
+    # random.random() produces the same sequence on every Python version (unlike
+    # choice/randint), so everything else is built on it
+    def _chance(self, probability):
+        return self._random.random() < probability
+
+    def _pick(self, items):
+        return items[int(self._random.random() * len(items))]
+
+    def _number(self, digits=10):
+        return str(int(self._random.random() * 10 ** digits))
+
+    def _id(self, length=11):
+        return ''.join(self._pick(_ID_CHARACTERS) for _ in range(length))
+
+    def _words(self, count):
+        words = []
+        for _ in range(max(count, 1)):
+            word = self._pick(WORDS)
+            if self._chance(self.inline_density):
+                tag = self._pick(INLINE_TAGS)
+                if tag == 'a':
+                    word = '<a href="https://www.example.com/{}">{}</a>'.format(self._id(8), word)
+                else:
+                    word = '<{0}>{1}</{0}>'.format(tag, word)
+            words.append(word)
+        return ' '.join(words)
+
+    def _paragraph_length(self):
+        # vary paragraph length between half and one and a half times the average
+        return int(self.paragraph_words * (0.5 + self._random.random()))
+
+    def paragraph(self):
+        return '<p>{}.</p>'.format(self._words(self._paragraph_length()))
+
+    def header(self):
+        level = 2 + int(self._random.random() * 3)
+        return '<h{0}>{1}</h{0}>'.format(level, self._words(6))
+
+    def nested_list(self, depth=None):
+        depth = self.list_depth if depth is None else depth
+        list_tag = self._pick(('ul', 'ol'))
+        items = []
+        for index in range(self.list_items):
+            item = self._words(8)
+            if depth > 1 and index == self.list_items - 1:
+                item += self.nested_list(depth - 1)
+            items.append('<li>{}</li>'.format(item))
+        return '<{0}>{1}</{0}>'.format(list_tag, ''.join(items))
+
+    def blockquote(self):
+        return '<blockquote><p>{}</p></blockquote>'.format(self._words(20))
+
+    def image(self):
+        image = '<img src="https://www.example.com/images/{}.jpg" alt="{}">'.format(self._id(), self._words(3))
+        if self._chance(0.5):
+            return '<figure>{}<figcaption>{}</figcaption></figure>'.format(image, self._words(10))
+        return image
+
+    def embed(self, provider=None):
+        if provider is None:
+            provider = self.embed_providers[self._embed_count % len(self.embed_providers)]
+            self._embed_count += 1
+        uuid = '-'.join(self._id(length).lower() for length in (8, 4, 4, 4, 12))
+        return EMBED_TEMPLATES[provider].format(
+            id=self._id(), number=self._number(), uuid=uuid, text=self._words(12))
+
+    def block(self):
+        if self._chance(self.embed_ratio):
+            return self.embed()
+        roll = self._random.random()
+        if roll < 0.65:
+            return self.paragraph()
+        elif roll < 0.75:
+            return self.header()
+        elif roll < 0.85:
+            return self.nested_list()
+        elif roll < 0.92:
+            return self.blockquote()
+        return self.image()
+
+    def _wrap(self, blocks, depth):
+        if depth <= 0 or len(blocks) < 2:
+            return ''.join(blocks)
+        middle = len(blocks) // 2
+        return '<div class="section-{}">{}</div><div>{}</div>'.format(
+            depth, self._wrap(blocks[:middle], depth - 1), self._wrap(blocks[middle:], depth - 1))
+
+    def document(self):
+        """
+        :return: the next generated document
+        :rtype: str
+        """
+        blocks = [self.block() for _ in range(self.blocks)]
+        return (
+            '<!DOCTYPE html><html><head><title>{}</title>'
+            '<script>window.analytics = {{}};</script></head>'
+            '<body>{}</body></html>'
+        ).format(self._words(6), self._wrap(blocks, self.depth))
+
+    def documents(self, count):
+        """
+        :param count: how many documents to generate
+        :type count: int
+        :return: a generator of ``(name, html)`` tuples
+        """
+        for index in range(count):
+            yield 'synthetic-{}-{}'.format(self.seed, index), self.document()
+
+
+def main(args=None):
+    argument_parser = argparse.ArgumentParser(
+        prog='python -m html2ans.corpus', description="Writes synthetic html articles as JSONL (id and html keys).")
+    argument_parser.add_argument('--count', type=int, default=10, help="how many documents to generate")
+    argument_parser.add_argument('--seed', type=int, default=0)
+    argument_parser.add_argument('--blocks', type=int, default=30, help="top-level blocks per document")
+    argument_parser.add_argument('--paragraph-words', type=int, default=50)
+    argument_parser.add_argument('--inline-density', type=float, default=0.1)
+    argument_parser.add_argument('--depth', type=int, default=1, help="levels of div wrappers")
+    argument_parser.add_argument('--list-depth', type=int, default=2)
+    argument_parser.add_argument('--list-items', type=int, default=4)
+    argument_parser.add_argument('--embed-ratio', type=float, default=0.1)
+    argument_parser.add_argument(
+        '--embed-providers', nargs='+', choices=sorted(EMBED_TEMPLATES), help="defaults to every provider")
+    options = argument_parser.parse_args(args)
+
+    generator = CorpusGenerator(
+        options.seed, options.blocks, options.paragraph_words, options.inline_density, options.depth,
+        options.list_depth, options.list_items, options.embed_ratio, options.embed_providers)
+    for name, html in generator.documents(options.count):
+        sys.stdout.write(json.dumps({'id': name, 'html': html}) + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
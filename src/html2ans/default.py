@@ -1,3 +1,5 @@
+from html2ans.adapters import build_lxml_tree
+from html2ans.inputs import as_markup
 from html2ans.base import BaseHtmlAnsParser
 from html2ans.parsers.base import NullParser
 from html2ans.parsers.text import (
@@ -34,6 +36,7 @@ from html2ans.parsers.embeds import (
 )
 from html2ans.parsers.audio import AudioParser
 from html2ans.parsers.raw_html import RawHtmlParser
+from html2ans.source_spans import build_source_span_tree
 
 
 class DefaultHtmlAnsParser(BaseHtmlAnsParser):
@@ -100,6 +103,61 @@ class DefaultHtmlAnsParser(BaseHtmlAnsParser):
         super(DefaultHtmlAnsParser, self).__init__(*args, default_parsers=self.DEFAULT_PARSERS, **kwargs)
 
 
+class LxmlHtmlAnsParser(DefaultHtmlAnsParser):
+    """
+    A ``DefaultHtmlAnsParser`` that parses HTML with ``lxml`` directly instead of building a
+    ``BeautifulSoup`` tree. The element parsers work on ``lxml`` elements through the adapters
+    in ``html2ans.adapters`` and produce the same ANS as ``DefaultHtmlAnsParser``, with one
+    known exception: attributes written without a value (e.g. ``<input disabled>``) get their
+    name as their value (``disabled="disabled"``) rather than an empty string. The
+    ``soup_parse_lib`` option is ignored.
+
+    Building the tree takes a fraction of the time ``BeautifulSoup`` takes (over ten times
+    less on the benchmark documents), but nodes are then adapted as the element parsers visit
+    them and element conversion dominates, so whole documents are converted only about 10%
+    faster (see the ``tree`` and ``convert`` timings of ``benchmarks/run.py --parser lxml``).
+
+    """
+
+    def build_tree(self, html, start_tag=None):
+        return build_lxml_tree(html, start_tag)
+
+
+class SourceSpanHtmlAnsParser(DefaultHtmlAnsParser):
+    """
+    A ``DefaultHtmlAnsParser`` that builds its tree with ``html.parser`` while recording where
+    each tag is in the input (see ``html2ans.source_spans``), so ``raw_html`` content and the
+    content of text elements are sliced from the input instead of being re-serialized. Sliced
+    html is the markup as written, so it can differ from re-serialized html in details like
+    entities and attribute order. The ``soup_parse_lib`` option is ignored.
+
+    The tree follows ``html.parser``'s handling of broken markup (e.g. malformed attributes or
+    unclosed tags) rather than ``lxml``'s, so output can also differ from
+    ``DefaultHtmlAnsParser`` in which elements are found and what attributes they have (7 of
+    the 22 benchmark documents convert differently, counting attribute order). Building the
+    tree with ``html.parser`` also takes about 1.5 to 2 times as long as with ``lxml``, which
+    usually outweighs the time saved by not re-serializing: whole documents are converted a
+    little slower than with ``DefaultHtmlAnsParser``, and table-heavy documents (where most of
+    the time is spent building the tree) up to 40% slower. Use it when output has to keep the
+    markup as written, not for speed.
+
+    :keyword fall_back_on_repair: whether elements with markup the tree builder had to repair
+        (e.g. unclosed or stray tags) are re-serialized rather than sliced from the input
+    :type fall_back_on_repair: bool
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.fall_back_on_repair = kwargs.pop('fall_back_on_repair', True)
+        super(SourceSpanHtmlAnsParser, self).__init__(*args, **kwargs)
+
+    def build_tree(self, html, start_tag=None):
+        return build_source_span_tree(as_markup(html), start_tag, self.fall_back_on_repair)
+
+    def get_config_fingerprint(self):
+        return '{}:{}'.format(super(SourceSpanHtmlAnsParser, self).get_config_fingerprint(), self.fall_back_on_repair)
+
+
 # kind of for backwards compatibility
 # but more for being succint
 Html2Ans = DefaultHtmlAnsParser
@@ -1,2 +1,10 @@
 class ParsingException(Exception):
     pass
+
+
+class FrozenParserException(Exception):
+    """
+    Raised when changing the parsers of a frozen document parser (see
+    ``BaseHtmlAnsParser.freeze``).
+    """
+    pass
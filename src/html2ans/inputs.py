@@ -0,0 +1,75 @@
+"""
+Input handling for ``BaseHtmlAnsParser.generate_ans``. Besides ``str``, documents can be given as
+``bytes`` (or another bytes-like object such as a ``memoryview``), an open binary file or a path
+(any object with ``__fspath__``, e.g. a ``pathlib.Path``; plain strings are always html).
+
+Bytes are passed to the tree builder undecoded, so the document's encoding is detected once,
+from its byte order mark or declared charset (``<meta charset>``), falling back to utf-8 and
+then windows-1252 like ``BeautifulSoup`` does. Files and paths can also be memory-mapped rather
+than read, which ``html2ans.adapters.build_lxml_tree`` feeds to ``lxml`` in chunks without ever
+holding a copy of the whole document.
+"""
+import io
+import mmap
+
+import six
+
+BUFFER_TYPES = (bytearray, memoryview, mmap.mmap)
+"""
+Bytes-like inputs that are passed through as is (and only copied to ``bytes`` by tree
+builders that need them).
+"""
+
+
+def read_html(source, memory_map=False):
+    """
+    :param source: the html: ``str``, ``bytes``, a bytes-like object, an open (binary) file or a path
+    :param memory_map: whether to memory-map files and paths (when the file has a descriptor
+        and isn't empty) instead of reading them
+    :type memory_map: bool
+    :return: ``source`` if it is text or bytes-like, otherwise the contents of the file it
+        refers to (``bytes``, text if a text file was given, or an ``mmap.mmap``)
+    """
+    if isinstance(source, (six.text_type, six.binary_type) + BUFFER_TYPES):
+        return source
+    if hasattr(source, 'read'):
+        if memory_map:
+            mapped = _map_file(source)
+            if mapped is not None:
+                return mapped
+        return source.read()
+    if hasattr(source, '__fspath__'):
+        with io.open(source.__fspath__(), 'rb') as html_file:
+            if memory_map:
+                # the map keeps its own handle, so it outlives the file
+                mapped = _map_file(html_file)
+                if mapped is not None:
+                    return mapped
+            return html_file.read()
+    return source
+
+
+def _map_file(html_file):
+    try:
+        file_number = html_file.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        # e.g. BytesIO
+        return None
+    if 'b' not in getattr(html_file, 'mode', 'b'):
+        return None
+    try:
+        return mmap.mmap(file_number, 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        # empty files can't be mapped
+        return None
+
+
+def as_markup(html):
+    """
+    :param html: the html, as returned by ``read_html``
+    :return: ``html`` as ``str`` or ``bytes`` (copying bytes-like objects), for tree builders
+        that only accept those
+    """
+    if isinstance(html, BUFFER_TYPES):
+        return html[:] if isinstance(html, mmap.mmap) else bytes(html)
+    return html
@@ -0,0 +1,167 @@
+"""
+Instrumentation for ``BaseHtmlAnsParser``:
+
+* ``ParserInstrumentation`` (see the ``instrumentation`` option) records, for each element parser,
+  how often it was checked for applicability and used, how often it matched, how long it took and
+  how many exceptions it raised
+* ``ConversionStats`` (see ``generate_ans(..., with_stats=True)``) describes the conversion of a
+  single document
+"""
+import random
+import threading
+import timeit
+from contextlib import contextmanager
+
+
+class ParserStats(object):
+    """
+    Counters for one element parser class.
+    """
+
+    __slots__ = ('applicable_calls', 'applicable_hits', 'parse_calls', 'matches', 'exceptions', 'time')
+
+    def __init__(self):
+        self.applicable_calls = 0
+        """How many times ``is_applicable`` was called"""
+        self.applicable_hits = 0
+        """How many times ``is_applicable`` returned ``True``"""
+        self.parse_calls = 0
+        """How many times ``parse`` was called"""
+        self.matches = 0
+        """How many times ``parse`` returned a match"""
+        self.exceptions = 0
+        """How many exceptions were raised (including ones suppressed by ``suppress_exceptions``)"""
+        self.time = 0.0
+        """The total time (in seconds) spent in ``is_applicable`` and ``parse``"""
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ParserInstrumentation(object):
+    """
+    Collects ``ParserStats`` for the element parsers used by a document parser. To keep
+    the overhead low, only a sample of element parse attempts can be instrumented (with
+    ``sample_rate``); the other elements are parsed exactly as they would be without
+    instrumentation.
+
+    ``elements_seen`` counts element parse attempts; when collecting ``ConversionStats``,
+    elements that fall through to ``BACKUP_PARSERS`` are attempted twice (once with the
+    primary parsers and once with the backups).
+
+    Counters aren't synchronized, so use one instance per thread for exact counts when
+    converting in several threads. When converting with worker processes (e.g.
+    ``generate_ans_many``), each worker records into its own copy.
+
+    :param sample_rate: the fraction (between 0 and 1) of elements to instrument
+    :type sample_rate: float
+    :param seed: the seed for choosing which elements are sampled
+    :type seed: int
+
+    """
+
+    timer = staticmethod(timeit.default_timer)
+
+    def __init__(self, sample_rate=1.0, seed=None):
+        self.sample_rate = sample_rate
+        self._random = random.Random(seed)
+        self.reset()
+
+    def reset(self):
+        """
+        Clears everything recorded so far.
+        """
+        self.elements_seen = 0
+        self.elements_sampled = 0
+        self.parser_stats = {}
+        """
+        A mapping of element parser class names to their ``ParserStats``
+        """
+
+    def sample(self):
+        """
+        Decides whether the next element parse attempt should be instrumented.
+
+        :rtype: bool
+        """
+        self.elements_seen += 1
+        if self.sample_rate >= 1 or self._random.random() < self.sample_rate:
+            self.elements_sampled += 1
+            return True
+        return False
+
+    def get_stats(self, parser):
+        """
+        :param parser: an element parser
+        :return: the stats for the parser's class
+        :rtype: ParserStats
+        """
+        name = type(parser).__name__
+        stats = self.parser_stats.get(name)
+        if stats is None:
+            stats = self.parser_stats[name] = ParserStats()
+        return stats
+
+    def report(self):
+        """
+        :return: the stats for each parser (as dictionaries), slowest parser first, along with
+            how many elements were seen and sampled
+        :rtype: dict
+        """
+        return {
+            'elements_seen': self.elements_seen,
+            'elements_sampled': self.elements_sampled,
+            'parsers': sorted(
+                (dict(stats.as_dict(), parser=name) for name, stats in self.parser_stats.items()),
+                key=lambda stats: stats['time'], reverse=True),
+        }
+
+
+class ConversionStats(object):
+    """
+    Statistics about the conversion of one document.
+    """
+
+    __slots__ = ('node_count', 'tree_build_time', 'conversion_time', 'elements_by_type', 'backup_elements')
+
+    timer = staticmethod(timeit.default_timer)
+
+    def __init__(self):
+        self.node_count = 0
+        """How many nodes (tags, strings, comments, etc.) are under the tag parsing started at"""
+        self.tree_build_time = 0.0
+        """The time (in seconds) spent building the document tree and finding the start tag"""
+        self.conversion_time = 0.0
+        """The time (in seconds) spent converting the tree to ANS"""
+        self.elements_by_type = {}
+        """A mapping of ANS types to how many top-level ANS elements of that type were produced"""
+        self.backup_elements = 0
+        """How many html elements were only matched by ``BACKUP_PARSERS`` (e.g. converted to ``raw_html``)"""
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+_active_conversion_stats = threading.local()
+
+
+@contextmanager
+def activate_conversion_stats(conversion_stats):
+    """
+    Makes ``conversion_stats`` available to the document parser (in the current thread)
+    for the duration of the block.
+    """
+    previous = getattr(_active_conversion_stats, 'stats', None)
+    _active_conversion_stats.stats = conversion_stats
+    try:
+        yield conversion_stats
+    finally:
+        _active_conversion_stats.stats = previous
+
+
+def get_active_conversion_stats():
+    """
+    :return: the ``ConversionStats`` being collected in the current thread, if any
+    :rtype: ConversionStats
+    """
+    return getattr(_active_conversion_stats, 'stats', None)
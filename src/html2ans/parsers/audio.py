@@ -27,6 +27,7 @@ class AudioParser(BaseElementParser):
     """
     applicable_elements = ['audio']
     version_required = True
+    cacheable = True
 
     def parse(self, element, *args, **kwargs):
         result = None
@@ -1,5 +1,4 @@
 from collections import namedtuple
-from functools import reduce
 
 from bs4.element import Comment, Tag
 
@@ -67,6 +66,14 @@ class BaseElementParser(ElementParser, AbstractParserUtilities):
     output in the root document parser
     """
 
+    cacheable = False
+    """
+    Whether this parser's ``is_applicable`` and ``parse`` depend only on the element's
+    markup (and don't modify it), so the root document parser can reuse their results for
+    identical elements (see its ``fragment_cache`` option). Changes ``parse`` makes
+    elsewhere in the tree must be repeated by ``repeat_side_effects``.
+    """
+
     applicable_elements = []
     """
     The types of elements this parser should be used on. For example,
@@ -104,9 +111,17 @@ class BaseElementParser(ElementParser, AbstractParserUtilities):
 
     def is_class_applicable(self, tag):
         classes = tag.attrs.get('class')
-        return classes and reduce(
-            lambda x, y: x and y,
-            list(applicable_class in classes for applicable_class in self.applicable_classes))
+        return classes and all(applicable_class in classes for applicable_class in self.applicable_classes)
+
+    def repeat_side_effects(self, element, *args, **kwargs):
+        """
+        Called instead of ``parse`` when the root document parser reuses a cached result for
+        the given element (see ``cacheable``). Does nothing by default.
+
+        :param element: the element that would have been parsed
+        :type element: bs4.element.Tag or bs4.element.Comment or bs4.element.NavigableString
+        """
+        pass
 
     def construct_output(self, element, ans_type=None, content=None, version=None, *args, **kwargs):
         """
@@ -144,6 +159,7 @@ class NullParser(BaseElementParser):
     """
 
     applicable_elements = [Comment, 'br']
+    cacheable = True
 
     def is_applicable(self, element, *args, **kwargs):
         return True
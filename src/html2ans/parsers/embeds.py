@@ -1,10 +1,286 @@
+import os
 import re
+import threading
+from contextlib import contextmanager
 from six.moves.urllib_parse import urlparse, unquote
 from bs4.element import Tag
 
 from html2ans.parsers.base import BaseElementParser, ParseResult
 from html2ans.parsers.raw_html import RawHtmlParser
 from html2ans.parsers.utils import parse_dimensions
+from html2ans.source_spans import invalidate_source_spans
+
+
+class EmbedProviderRegistry(object):
+    """
+    A registry of embed parsers that merges every registered parser's ``regex`` into a
+    single precompiled pattern, so a URL can be checked against all providers in one regex
+    pass (``match``). During a conversion, that pass is made once per URL and shared by every
+    embed parser that checks the URL (see ``get_tag_id``).
+
+    :param parsers: the embed parser classes (or instances) to register
+    :type parsers: list
+
+    """
+
+    def __init__(self, parsers=None):
+        self._parsers = []
+        self._compiled = None
+        self._lock = threading.Lock()
+        for parser in parsers or []:
+            self.register(parser)
+
+    def register(self, parser):
+        """
+        Adds an embed parser class (or instance) to this registry. Parsers without a
+        ``regex`` are ignored since their IDs are read directly from ``attr``.
+
+        :param parser: the embed parser to register
+        :type parser: AbstractEmbedParser
+
+        """
+        with self._lock:
+            if parser.regex and parser not in self._parsers:
+                self._parsers.append(parser)
+                self._compiled = None
+
+    @property
+    def compiled(self):
+        """
+        Whether the merged pattern is built (``compile`` has been called since the last
+        ``register``)
+        """
+        return self._compiled is not None
+
+    def compile(self):
+        """
+        Builds the merged pattern. Each unique provider regex is wrapped in its own group;
+        because the wrapping group always closes last, ``match.lastindex`` identifies the
+        provider that matched and the provider's ID is the group immediately after it.
+        If every provider regex starts with the same literal text (e.g. ``http``), the
+        pattern starts with a lookahead for it: ``re`` tries every alternative at every
+        position of the URL, so without it one search of the merged pattern is slower than
+        searching each provider regex in turn. Called lazily by ``match`` and ``get_tag_id``.
+
+        The pattern and the group mappings are built first and then published together, so
+        threads using the registry while it's (re)compiled see either the old or the new
+        pattern, never a mix of the two.
+
+        :return: the merged pattern (``None`` if nothing can be merged)
+
+        """
+        return self._publish()[0]
+
+    def _publish(self):
+        with self._lock:
+            compiled = self._compiled = self._build()
+        return compiled
+
+    def _build(self):
+        alternatives = []
+        prefixes = []
+        group_indexes = {}
+        group_parsers = {}
+        group_index = 1
+        for parser in self._parsers:
+            regex = parser.regex
+            if regex in group_indexes:
+                continue
+            compiled = _compile_regex(regex)
+            if not compiled.groups or compiled.groupindex:
+                # the ID is read from group 1 and named groups can't be repeated
+                # in the merged pattern, so leave these to ``get_tag_id`` to search
+                continue
+            alternatives.append('({})'.format(regex))
+            prefixes.append(_get_literal_prefix(regex))
+            group_indexes[regex] = group_index
+            group_parsers[group_index] = parser
+            group_index += compiled.groups + 1
+        pattern = None
+        if alternatives:
+            pattern = '|'.join(alternatives)
+            common_prefix = os.path.commonprefix(prefixes)
+            if common_prefix:
+                pattern = '(?={})(?:{})'.format(re.escape(common_prefix), pattern)
+            pattern = re.compile(pattern)
+        return pattern, group_indexes, group_parsers
+
+    def _get_compiled(self):
+        compiled = self._compiled
+        if compiled is None:
+            compiled = self._publish()
+        return compiled
+
+    def match(self, url):
+        """
+        Finds the registered provider whose regex matches earliest in the given URL (ties
+        go to the provider registered first).
+
+        :param url: the URL (or other attribute value) to check
+        :type url: str
+        :return: a tuple of the matching parser and the embed ID, or ``(None, None)``
+
+        """
+        pattern, _, group_parsers = self._get_compiled()
+        match = pattern.search(url) if pattern else None
+        if match:
+            group_index = match.lastindex
+            return group_parsers[group_index], match.group(group_index + 1)
+        return None, None
+
+    def get_tag_id(self, regex, url, url_matches=None):
+        """
+        Equivalent to ``re.search(regex, url).group(1)`` (or ``None`` if there is no match).
+
+        Without ``url_matches``, ``regex`` itself is searched. With it, the URL's ``match``
+        is looked up in (or added to) ``url_matches``, so however many providers check a
+        URL, the merged pattern is only searched once; ``regex`` only needs to be searched
+        separately if it isn't registered or the URL is a different provider's (since a URL
+        can match more than one provider, e.g. a Facebook post of an Imgur URL).
+
+        :param regex: the provider regex to check
+        :type regex: str
+        :param url: the URL (or other attribute value) to check
+        :type url: str
+        :param url_matches: a mapping of URLs to their ``match`` (see ``EmbedScan``)
+        :type url_matches: dict
+        :return: the embed ID or ``None``
+
+        """
+        if url_matches is not None:
+            if regex in self._get_compiled()[1]:
+                url_match = url_matches.get(url)
+                if url_match is None:
+                    url_match = url_matches[url] = self.match(url)
+                matched_parser, tag_id = url_match
+                if matched_parser is None:
+                    # no registered provider matches this URL anywhere
+                    return None
+                if matched_parser.regex == regex:
+                    return tag_id
+        match = _compile_regex(regex).search(url)
+        return match.group(1) if match else None
+
+
+def _get_literal_prefix(regex):
+    """
+    Returns the literal text every match of ``regex`` starts with (only looking as far
+    as the first character that isn't a letter, digit or one of ``:/_-``). Errs on the side
+    of returning nothing when the regex has alternatives or optional groups.
+    """
+    if '|' in regex:
+        return ''
+    index = 0
+    while regex[index:index + 1] == '(' and regex[index + 1:index + 2] != '?':
+        # capturing groups don't change where a match starts (unless they're optional)
+        index += 1
+    if index and _OPTIONAL_GROUP_RE.search(regex):
+        return ''
+    prefix = []
+    for position in range(index, len(regex)):
+        character = regex[position]
+        if not (character.isalnum() or character in ':/_-') or regex[position + 1:position + 2] in ('?', '*', '{'):
+            break
+        prefix.append(character)
+    return ''.join(prefix)
+
+
+_COMPILED_REGEXES = {}
+
+_OPTIONAL_GROUP_RE = re.compile(r'\)[?*{]')
+
+
+def _compile_regex(regex):
+    compiled = _COMPILED_REGEXES.get(regex)
+    if compiled is None:
+        compiled = _COMPILED_REGEXES[regex] = re.compile(regex)
+    return compiled
+
+
+EMBED_PROVIDERS = EmbedProviderRegistry()
+"""
+The registry of the embed parsers defined in this module. ``AbstractEmbedParser``
+subclasses defined elsewhere can be added with ``EMBED_PROVIDERS.register``.
+"""
+
+EMBED_CANDIDATE_TAGS = frozenset(['a', 'iframe'])
+"""
+Descendant tags collected by ``scan_embed_candidates``. Embed parsers whose ``tag``
+is not in this set search the element themselves.
+"""
+
+
+class EmbedScan(object):
+    """
+    What the embed parsers have learned about the elements of one conversion, so that
+    the parsers tried on an element can share it. Only kept while the conversion is
+    running (see ``activate_embed_scan``), so it never outlives the document's tree.
+    """
+
+    def __init__(self):
+        self.element = None
+        """
+        The element most recently scanned by ``scan_embed_candidates``
+        """
+        self.candidates = None
+        """
+        The candidate tags found in ``element``
+        """
+        self.url_matches = {}
+        """
+        The ``EmbedProviderRegistry.match`` of each URL checked by the embed parsers
+        """
+
+
+_active_embed_scan = threading.local()
+
+
+@contextmanager
+def activate_embed_scan(embed_scan):
+    """
+    Makes ``embed_scan`` available to the embed parsers (in the current thread) for the
+    duration of the block.
+    """
+    previous = getattr(_active_embed_scan, 'scan', None)
+    _active_embed_scan.scan = embed_scan
+    try:
+        yield embed_scan
+    finally:
+        _active_embed_scan.scan = previous
+
+
+def get_active_embed_scan():
+    """
+    :return: the ``EmbedScan`` of the conversion running in the current thread, if any
+    :rtype: EmbedScan
+    """
+    return getattr(_active_embed_scan, 'scan', None)
+
+
+def scan_embed_candidates(element):
+    """
+    Collects the ``EMBED_CANDIDATE_TAGS`` descendants of the given element (in document
+    order) in a single walk of its subtree. During a conversion, the result for the most
+    recently scanned element is kept in the active ``EmbedScan``, so every embed parser
+    tried on an element shares one walk instead of each calling ``find_all``.
+
+    :param element: the element to scan
+    :type element: bs4.element.Tag
+    :return: a mapping of tag name to a list of matching descendant tags
+    :rtype: dict
+
+    """
+    embed_scan = get_active_embed_scan()
+    if embed_scan is not None and embed_scan.element is element:
+        return embed_scan.candidates
+    candidates = {}
+    for descendant in element.descendants:
+        if isinstance(descendant, Tag) and descendant.name in EMBED_CANDIDATE_TAGS:
+            candidates.setdefault(descendant.name, []).append(descendant)
+    if embed_scan is not None:
+        embed_scan.element = element
+        embed_scan.candidates = candidates
+    return candidates
 
 
 class AbstractEmbedParser(BaseElementParser):
@@ -45,24 +321,40 @@ class AbstractEmbedParser(BaseElementParser):
     A URL from the embed can be accessed from (given the embed's ID)
     """
 
+    provider_registry = EMBED_PROVIDERS
+    """
+    The ``EmbedProviderRegistry`` used to match ``regex`` against embed URLs
+    """
+
+    cacheable = True
+
     def get_tag_id(self, tag):
         tag_id = None
         tag_attr = tag.get(self.attr)
         if tag_attr:
             if self.regex:
-                match = re.search(self.regex, tag_attr)
-                if match:
-                    tag_id = match.group(1)
+                embed_scan = get_active_embed_scan()
+                tag_id = self.provider_registry.get_tag_id(
+                    self.regex, tag_attr, embed_scan.url_matches if embed_scan is not None else None)
             else:
                 tag_id = tag_attr
         return tag_id
 
+    def get_embed_candidates(self, element):
+        """
+        Returns the ``tag`` descendants of the given element that may hold the embed URL.
+        """
+        if self.tag in EMBED_CANDIDATE_TAGS:
+            return scan_embed_candidates(element).get(self.tag, [])
+        return element.find_all(self.tag)
+
     def _remove_embed_script(self, element):
         next_tag = element.next_sibling
         while next_tag and self.is_empty(next_tag):
             next_tag = next_tag.next_sibling
         if isinstance(next_tag, Tag):
             if next_tag.name == "script":
+                invalidate_source_spans(next_tag.parent)
                 next_tag.decompose()
             else:
                 self._remove_all_scripts(next_tag)
@@ -71,14 +363,18 @@ class AbstractEmbedParser(BaseElementParser):
 
     def _remove_all_scripts(self, element):
         for tag in element.find_all('script'):
+            invalidate_source_spans(tag.parent)
             tag.decompose()
 
+    def repeat_side_effects(self, element, *args, **kwargs):
+        self._remove_embed_script(element)
+
     def parse(self, element, *args, **kwargs):
         result = None
         match = False
         tag_id = self.get_tag_id(element)
         if not tag_id:
-            sub_tags = element.find_all(self.tag)
+            sub_tags = self.get_embed_candidates(element)
             for sub_tag in sub_tags:
                 sub_id = self.get_tag_id(sub_tag)
                 if sub_id:
@@ -715,3 +1011,20 @@ class IFrameParser(RawHtmlParser):
         if add_props:
             result["additional_properties"] = add_props
         return ParseResult(result, True)
+
+
+for _embed_parser in [
+        DailyMotionEmbedParser,
+        FlickrEmbedParser,
+        PollDaddyEmbedParser,
+        TwitterTweetEmbedParser,
+        InstagramEmbedParser,
+        VineEmbedParser,
+        FacebookPostEmbedParser,
+        FacebookVideoEmbedParser,
+        YoutubeEmbedParser,
+        VimeoEmbedParser,
+        TumblrEmbedParser,
+        SpotifyEmbedParser,
+        ImgurEmbedParser]:
+    EMBED_PROVIDERS.register(_embed_parser)
@@ -11,6 +11,7 @@ class AbstractImageParser(BaseElementParser):
     """
 
     version_required = True
+    cacheable = True
 
     def _parse_dimensions(self, element, element_json, dimension_keys=('width', 'height')):
         parse_dimensions(element, element_json)
@@ -1,5 +1,5 @@
-import six
 from html2ans.parsers.base import BaseElementParser, ParseResult
+from html2ans.source_spans import outer_html
 
 
 class RawHtmlParser(BaseElementParser):
@@ -24,8 +24,10 @@ class RawHtmlParser(BaseElementParser):
 
     """
 
+    cacheable = True
+
     def is_applicable(self, element, *args, **kwargs):
         return True
 
     def parse(self, element, *args, **kwargs):
-        return ParseResult(self.construct_output(element, "raw_html", six.text_type(element)), True)
+        return ParseResult(self.construct_output(element, "raw_html", outer_html(element)), True)
@@ -2,22 +2,26 @@ from __future__ import absolute_import, unicode_literals  # need this for python
 
 import six
 from bs4.element import NavigableString, Tag, Comment
-from ftfy import fix_text
 
 from html2ans.parsers.base import BaseElementParser, ParseResult
+from html2ans.source_spans import inner_html, outer_html
+from html2ans.text_fixing import get_active_text_fixer
 
 
 class AbstractTextParser(BaseElementParser):
     """
-    Abstract parser for text-only elements (``NavigableString``, ``p``, etc.).
+    Abstract parser for text-only elements (``NavigableString``, ``p``, etc.). The text of
+    elements that aren't inline is fixed by the active ``html2ans.text_fixing.TextFixer``.
     """
 
+    cacheable = True
+
     def construct_output(self, element, *args, **kwargs):
 
         if isinstance(element, NavigableString) or isinstance(element, six.text_type):
             content = six.text_type(element).strip()
         elif element.name in self.INLINE_TAGS:
-            content = str(element)
+            content = outer_html(element)
         else:
 
             def __remove_comments(inner_element):
@@ -29,10 +33,14 @@ class AbstractTextParser(BaseElementParser):
 
                 return out_element
 
-            # There doesn't seem to be a great way to extract the text
-            # without eliminating text formatters
-            # like <strong>, thus the strange join statement
-            content = fix_text(''.join([__remove_comments(x) for x in element.contents]).strip())
+            # sliced from the input when the tree has source spans
+            content = inner_html(element)
+            if content is None:
+                # There doesn't seem to be a great way to extract the text
+                # without eliminating text formatters
+                # like <strong>, thus the strange join statement
+                content = ''.join(__remove_comments(x) for x in element.contents)
+            content = get_active_text_fixer().fix(content.strip())
 
         if content:
             return super(AbstractTextParser, self).construct_output(element, "text", content)
@@ -220,6 +228,7 @@ class HeaderParser(BaseElementParser):
     """
 
     applicable_elements = ["h1", "h2", "h3", "h4", "h5", "h6"]
+    cacheable = True
 
     def parse(self, element, *args, **kwargs):
         result = None
@@ -254,6 +263,7 @@ class InterstitialLinkParser(BaseElementParser):
 
     """
     applicable_elements = ['a']
+    cacheable = True
 
     def parse(self, element, *args, **kwargs):
         result = self.construct_output(element, "interstitial_link", element.text)
@@ -297,9 +307,6 @@ class ListItemParser(ParagraphParser):
     """
     applicable_elements = ["li"]
 
-    def __init__(self):
-        self.TEXT_TAGS.append("li")
-
 
 class ListParser(BaseElementParser):
     """
@@ -366,6 +373,10 @@ class ListParser(BaseElementParser):
     def __init__(self, list_item_parser=None):
         self.list_item_parser = list_item_parser if list_item_parser else ListItemParser()
 
+    @property
+    def cacheable(self):
+        return getattr(self.list_item_parser, 'cacheable', False)
+
     def parse(self, element, *args, **kwargs):
         list_elements = []
 
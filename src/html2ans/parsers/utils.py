@@ -1,7 +1,9 @@
+from contextlib import contextmanager
+import threading
+
 import six
 
 from bs4.element import NavigableString, Tag
-from furl import furl
 
 
 def has_attributes(tag, filter_types=('id', 'class', 'style')):
@@ -9,7 +11,7 @@ def has_attributes(tag, filter_types=('id', 'class', 'style')):
     Helper function to check if a tag has attributes (excluding the given ``filter_types``).
     """
     if isinstance(tag, Tag) and tag.attrs:
-        return len(list(filter(lambda attr: attr not in filter_types, tag.attrs))) > 0
+        return any(attr not in filter_types for attr in tag.attrs)
     return False
 
 
@@ -26,6 +28,103 @@ def parse_dimensions(tag, tag_json, dimension_keys=('width', 'height')):
             pass
 
 
+class NodeFacts(object):
+    """
+    Emptiness, text-only status, attribute presence and non-empty child counts for
+    every node in a tree, computed in one post-order traversal using the rules (and
+    the ``EMPTY_STRINGS``, ``EMPTY_TAGS`` and ``TEXT_TAGS`` settings) of the given
+    utilities class. While active (see ``use_node_facts``), the ``is_empty``,
+    ``is_text_only`` and ``is_wrapper`` utilities read these facts instead of
+    re-walking subtrees.
+
+    Facts are only used by utilities classes sharing the same settings. They
+    describe the tree as it was when computed, and they follow the default rules:
+    don't use them with overridden ``is_empty``/``is_text_only`` implementations.
+
+    :param root: the root of the tree
+    :type root: bs4.element.Tag
+    :param utilities: the utilities class whose settings to use
+    :type utilities: type
+
+    """
+
+    EMPTY = 0
+    TEXT_ONLY = 1
+    CHILD_COUNT = 2
+    HAS_ATTRIBUTES = 3
+
+    def __init__(self, root, utilities):
+        self.root = root
+        self.empty_strings = utilities.EMPTY_STRINGS
+        self.empty_tags = utilities.EMPTY_TAGS
+        self.text_tags = utilities.TEXT_TAGS
+        self.facts = self._compute(root)
+
+    def _compute(self, root):
+        empty_strings = self.empty_strings
+        empty_tags = self.empty_tags
+        text_tags = self.text_tags
+        facts = {}
+        stack = [(root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if isinstance(node, NavigableString):
+                facts[id(node)] = (six.text_type(node).strip() in empty_strings, True, 0, False)
+            elif not children_done:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.contents))
+            else:
+                child_count = 0
+                text_only = node.name in text_tags
+                for child in node.contents:
+                    child_facts = facts[id(child)]
+                    if not child_facts[self.EMPTY]:
+                        child_count += 1
+                        text_only = text_only and child_facts[self.TEXT_ONLY]
+                attributes = has_attributes(node)
+                empty = node.name in empty_tags or not (child_count or attributes)
+                facts[id(node)] = (empty, text_only, child_count, attributes)
+        return facts
+
+    def get(self, utilities, element):
+        """
+        Returns the facts tuple for ``element`` if it is part of this tree and
+        ``utilities`` shares the settings the facts were computed with.
+        """
+        if utilities.TEXT_TAGS is self.text_tags and utilities.EMPTY_TAGS is self.empty_tags \
+                and utilities.EMPTY_STRINGS is self.empty_strings:
+            return self.facts.get(id(element))
+        return None
+
+
+_active_node_facts = threading.local()
+
+
+@contextmanager
+def use_node_facts(root, utilities):
+    """
+    Computes ``NodeFacts`` for the tree under ``root`` and makes them available to
+    the parser utilities (in the current thread) for the duration of the block.
+    """
+    node_facts = NodeFacts(root, utilities)
+    with activate_node_facts(node_facts):
+        yield node_facts
+
+
+@contextmanager
+def activate_node_facts(node_facts):
+    """
+    Makes already computed ``NodeFacts`` available to the parser utilities (in the
+    current thread) for the duration of the block.
+    """
+    previous = getattr(_active_node_facts, 'facts', None)
+    _active_node_facts.facts = node_facts
+    try:
+        yield node_facts
+    finally:
+        _active_node_facts.facts = previous
+
+
 class AbstractParserUtilities(object):
     """
     Common utility functions for parsers. These methods are grouped here (rather
@@ -65,9 +164,10 @@ class AbstractParserUtilities(object):
         'u'
     ]
 
-    TEXT_TAGS = INLINE_TAGS + ['p', 'blockquote']
+    TEXT_TAGS = INLINE_TAGS + ['p', 'blockquote', 'li']
     """
-    List of tags considered to be text. This affects the results of ``is_text_only``
+    List of tags considered to be text (``li`` is included for ``ListItemParser``). This
+    affects the results of ``is_text_only``
     which is used by most text parsers. For example, because by default ``a`` tags
     are considered text, ``<p>Here is a <a href="google.com">link</a></p>`` would
     be considered text only.
@@ -82,12 +182,15 @@ class AbstractParserUtilities(object):
         :return: True if empty
 
         """
+        facts = cls._get_node_facts(element)
+        if facts is not None:
+            return facts[NodeFacts.EMPTY]
         result = False
         if isinstance(element, NavigableString):
             result = six.text_type(element).strip() in cls.EMPTY_STRINGS
         elif element.name in cls.EMPTY_TAGS:
             result = True
-        elif not (cls.get_children(element) or has_attributes(element)):
+        elif not (cls.has_children(element) or has_attributes(element)):
             result = True
         return result
 
@@ -99,6 +202,9 @@ class AbstractParserUtilities(object):
         :param element:
         :return: True if this element only contains text
         """
+        facts = cls._get_node_facts(element)
+        if facts is not None:
+            return facts[NodeFacts.TEXT_ONLY]
         result = False
         if not element:
             result = True
@@ -107,7 +213,7 @@ class AbstractParserUtilities(object):
         elif element.name not in cls.TEXT_TAGS:
             result = False
         else:
-            result = not list(filter(lambda child: not cls.is_text_only(child), cls.get_children(element)))
+            result = all(cls.is_text_only(child) for child in cls.iter_children(element))
         return result
 
     @classmethod
@@ -119,6 +225,10 @@ class AbstractParserUtilities(object):
         """
         # is this something we should even consider unwrapping?
         if element.name in cls.WRAPPER_TAGS:
+            facts = cls._get_node_facts(element)
+            if facts is not None:
+                return not facts[NodeFacts.HAS_ATTRIBUTES] and \
+                    not (facts[NodeFacts.TEXT_ONLY] and facts[NodeFacts.CHILD_COUNT] > 1)
             # check 1: if the element has attributes, it's not a wrapper
             # e.g. <a href="google.com"></a>
             # obviously this will also catch things like <p class="fancy"><p>Some other text</p></p>
@@ -127,7 +237,7 @@ class AbstractParserUtilities(object):
                 # check 2: if the item is text only, we probably don't want to unwrap it
                 # for example, <p><img src="awesome_image" /></p> we DO want to unwrap
                 # but <p>A <a href="awesome_image">link</a> to a cool image</p> we DON'T
-                return not (cls.is_text_only(element) and len(cls.get_children(element)) > 1)
+                return not (cls.is_text_only(element) and cls.count_children(element, limit=2) > 1)
         return False
 
     @classmethod
@@ -140,20 +250,73 @@ class AbstractParserUtilities(object):
         :param filter_tags: tag names to filter from the tag's children
         :return: the unfiltered/unempty children if element is a Tag, else []
         """
+        return list(cls.iter_children(element, filter_tags, filter_types))
+
+    @classmethod
+    def iter_children(cls, element, filter_tags=None, filter_types=None):
+        """
+        Lazily yields the children ``get_children`` would return, without building a list.
+        :param element: the element to check
+        :param filter_types: class types to filter from the tag's children
+        :param filter_tags: tag names to filter from the tag's children
+        :return: an iterator over the unfiltered/unempty children
+        """
         if not filter_tags:
-            filter_tags = []
-        if not filter_types:
-            filter_types = []
-        result = []
+            filter_tags = ()
         if element and isinstance(element, Tag):
             for child in element.children:
                 if not cls.is_empty(child):
                     if isinstance(child, Tag):
                         if child.name not in filter_tags:
-                            result.append(child)
-                    elif not [isinstance(child, filter_type) for filter_type in filter_types]:
-                        result.append(child)
-        return result
+                            yield child
+                    elif not filter_types:
+                        yield child
+
+    @classmethod
+    def has_children(cls, element, filter_tags=None, filter_types=None):
+        """
+        Returns true if ``get_children`` would return anything; stops at the first child found.
+        :param element: the element to check
+        :param filter_types: class types to filter from the tag's children
+        :param filter_tags: tag names to filter from the tag's children
+        :return: True if the element has unfiltered/unempty children
+        """
+        for _ in cls.iter_children(element, filter_tags, filter_types):
+            return True
+        return False
+
+    @classmethod
+    def count_children(cls, element, filter_tags=None, filter_types=None, limit=None):
+        """
+        Counts the children ``get_children`` would return, stopping once ``limit`` is reached.
+        :param element: the element to check
+        :param filter_types: class types to filter from the tag's children
+        :param filter_tags: tag names to filter from the tag's children
+        :param limit: the count to stop at (e.g. ``limit=2`` is enough to answer "more than one?")
+        :return: the number of unfiltered/unempty children (at most ``limit``)
+        """
+        if not (filter_tags or filter_types):
+            facts = cls._get_node_facts(element)
+            if facts is not None:
+                count = facts[NodeFacts.CHILD_COUNT]
+                return count if limit is None else min(count, limit)
+        count = 0
+        for _ in cls.iter_children(element, filter_tags, filter_types):
+            count += 1
+            if count == limit:
+                break
+        return count
+
+    @classmethod
+    def _get_node_facts(cls, element):
+        """
+        Returns the precomputed facts for ``element`` (see ``NodeFacts``), or ``None``
+        if there are none to use.
+        """
+        node_facts = getattr(_active_node_facts, 'facts', None)
+        if node_facts is not None:
+            return node_facts.get(cls, element)
+        return None
 
     @staticmethod
     def _create_encoded_url(original_url):
@@ -164,4 +327,6 @@ class AbstractParserUtilities(object):
         :return: URI value properly url encoded to include in ans
         """
 
+        # imported here to keep importing the parsers fast
+        from furl import furl
         return furl(original_url).url
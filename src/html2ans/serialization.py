@@ -0,0 +1,82 @@
+"""
+Streaming JSON output for ``BaseHtmlAnsParser.generate_ans_json``: each converted element is
+serialized and written as soon as it's produced, so neither the whole list of ANS elements nor
+its JSON has to be held in memory.
+
+Elements are serialized compactly (no spaces after separators, non-ASCII characters written as
+utf-8) with ``orjson`` when it is installed, falling back to the standard library's ``json``.
+"""
+import io
+import json
+
+from html2ans.compact import json_default
+
+_orjson = None
+
+
+def get_orjson():
+    """
+    :return: the ``orjson`` module (imported the first time it's needed), or ``None`` if it
+        isn't installed
+    """
+    global _orjson
+    if _orjson is None:
+        try:
+            import orjson
+            _orjson = orjson
+        except ImportError:
+            _orjson = False
+    return _orjson or None
+
+
+def dumps(value, fast=True):
+    """
+    :param value: the ANS to serialize (dictionaries, lists or ``html2ans.compact`` objects)
+    :param fast: whether to use ``orjson`` if it is installed
+    :type fast: bool
+    :return: the value's JSON, encoded as utf-8
+    :rtype: bytes
+    """
+    orjson = get_orjson() if fast else None
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=json_default)
+        except TypeError:
+            # e.g. lone surrogates or integers over 64 bits, which json handles
+            pass
+    serialized = json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=json_default)
+    try:
+        return serialized.encode('utf-8')
+    except UnicodeEncodeError:
+        # lone surrogates can only be written escaped
+        return json.dumps(value, separators=(',', ':'), default=json_default).encode('utf-8')
+
+
+def write_json_array(elements, fp, fast=True):
+    """
+    Writes ANS elements to ``fp`` as a JSON array, one element at a time. If ``elements``
+    raises, the array written so far is left incomplete.
+
+    :param elements: an iterable of ANS elements
+    :param fp: a binary file-like object, a text file-like object (``io.TextIOBase``) or a
+        ``bytearray`` to append to
+    :param fast: whether to use ``orjson`` if it is installed
+    :type fast: bool
+    :return: the number of elements written
+    :rtype: int
+    """
+    if isinstance(fp, bytearray):
+        write = fp.extend
+    elif isinstance(fp, io.TextIOBase):
+        def write(chunk):
+            fp.write(chunk.decode('utf-8'))
+    else:
+        write = fp.write
+    count = 0
+    separator = b'['
+    for element in elements:
+        write(separator + dumps(element, fast))
+        separator = b','
+        count += 1
+    write(b'[]' if not count else b']')
+    return count
@@ -0,0 +1,223 @@
+"""
+Source spans let the element parsers take an element's html straight from the document that
+was parsed, rather than re-serializing its subtree (which walks every node and rebuilds the
+string). ``build_source_span_tree`` builds a ``BeautifulSoup`` tree with the standard library's
+``html.parser``, recording where each tag starts and ends in the input; ``outer_html`` and
+``inner_html`` slice the input when a span is available and re-serialize otherwise.
+
+Sliced html is the markup exactly as written (entities, attribute order and quoting, ``<br>`` vs ``<br/>``,
+etc.), so it can differ from re-serialized html in those details.
+
+Tags only get a span when their end tag was found where expected. With ``fall_back_on_repair``,
+tags with a repaired descendant (one closed implicitly or containing a stray end tag) don't get
+one either, so they're re-serialized from the tree. Parsers that modify the tree must call
+``invalidate_source_spans`` on the modified element (see
+``html2ans.parsers.embeds.AbstractEmbedParser``).
+"""
+import re
+from collections import namedtuple
+
+import six
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+from bs4.builder import HTMLParserTreeBuilder, ParserRejectedMarkup
+from bs4.builder._htmlparser import BeautifulSoupHTMLParser
+from bs4.element import Comment
+
+
+class SourceSpan(namedtuple('SourceSpan', ['markup', 'start', 'start_tag_end', 'end_tag_start', 'end'])):
+    """
+    Where a tag appears in ``markup``: its html is ``markup[start:end]`` and its contents are
+    ``markup[start_tag_end:end_tag_start]``.
+    """
+    pass
+
+
+_NEWLINE_RE = re.compile('\n')
+
+
+class SourceSpanHTMLParser(BeautifulSoupHTMLParser):
+    """
+    A ``BeautifulSoupHTMLParser`` that records a ``SourceSpan`` on each tag (in its
+    ``source_span`` attribute).
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.fall_back_on_repair = kwargs.pop('fall_back_on_repair', True)
+        BeautifulSoupHTMLParser.__init__(self, *args, **kwargs)
+        self.markup = u''
+        self._line_starts = [0]
+        self._start_tags = {}
+        self._repaired = set()
+        self._start_tag_span = None
+
+    def feed(self, markup):
+        self.markup = markup
+        self._line_starts = [0] + [match.end() for match in _NEWLINE_RE.finditer(markup)]
+        BeautifulSoupHTMLParser.feed(self, markup)
+
+    def _get_offset(self):
+        # getpos() without the tuple
+        return self._line_starts[self.lineno - 1] + self.offset
+
+    def handle_starttag(self, name, attrs, handle_empty_element=True):
+        start = self._get_offset()
+        start_tag_span = self._start_tag_span = (start, start + len(self.get_starttag_text()))
+        try:
+            BeautifulSoupHTMLParser.handle_starttag(self, name, attrs, handle_empty_element)
+        finally:
+            self._start_tag_span = None
+        tag = self.soup._most_recent_element
+        if isinstance(tag, Tag) and tag.name == name:
+            self._start_tags.setdefault(id(tag), start_tag_span)
+
+    def handle_startendtag(self, name, attrs):
+        start = self._get_offset()
+        start_tag_span = (start, start + len(self.get_starttag_text()))
+        # handle_starttag leaves the tag open; closing it here uses the same span
+        BeautifulSoupHTMLParser.handle_starttag(self, name, attrs, handle_empty_element=False)
+        self._start_tag_span = start_tag_span
+        try:
+            self.handle_endtag(name)
+        finally:
+            self._start_tag_span = None
+
+    def handle_endtag(self, name, check_already_closed=True):
+        soup = self.soup
+        current_tag = soup.currentTag
+        if check_already_closed and name in self.already_closed_empty_element:
+            BeautifulSoupHTMLParser.handle_endtag(self, name, check_already_closed)
+            return
+        if self._start_tag_span is not None and current_tag.name == name:
+            # an empty-element tag (e.g. <br> or <br/>) closed as soon as it was opened
+            start, end = self._start_tag_span
+            self._set_span(current_tag, start, end, end, end)
+        elif self._is_open(name):
+            # the most recent open tag with this name is closed (along with any tags
+            # opened after it, which are left without spans)
+            closed_tag = current_tag
+            if closed_tag.name != name:
+                closed_tag = next(tag for tag in reversed(soup.tagStack) if tag.name == name)
+            start_tag = self._start_tags.get(id(closed_tag))
+            if start_tag is not None:
+                end_tag_start = self._get_offset()
+                end = self.markup.find('>', end_tag_start) + 1 or len(self.markup)
+                self._set_span(closed_tag, start_tag[0], start_tag[1], end_tag_start, end)
+        else:
+            # a stray end tag the tree builder ignores
+            self._repaired.add(id(current_tag))
+        BeautifulSoupHTMLParser.handle_endtag(self, name, check_already_closed)
+
+    def _is_open(self, name):
+        open_tag_counter = self.soup.open_tag_counter
+        if open_tag_counter is None:
+            # BeautifulSoup before 4.9.1 doesn't count open tags (and looks the attribute up
+            # as a child tag, which isn't found)
+            return any(tag.name == name for tag in self.soup.tagStack)
+        return open_tag_counter.get(name)
+
+    def _set_span(self, tag, start, start_tag_end, end_tag_start, end):
+        if self.fall_back_on_repair:
+            if id(tag) in self._repaired:
+                self._mark_repaired(tag)
+                return
+            for child in tag.contents:
+                if isinstance(child, Tag) and 'source_span' not in child.__dict__:
+                    self._mark_repaired(tag)
+                    return
+        tag.source_span = SourceSpan(self.markup, start, start_tag_end, end_tag_start, end)
+
+    def _mark_repaired(self, tag):
+        if isinstance(tag.parent, Tag):
+            self._repaired.add(id(tag.parent))
+
+
+class SourceSpanTreeBuilder(HTMLParserTreeBuilder):
+    """
+    An ``html.parser`` tree builder that uses ``SourceSpanHTMLParser``.
+
+    :param fall_back_on_repair: whether tags with repaired descendants are left without a span
+    :type fall_back_on_repair: bool
+
+    """
+
+    def __init__(self, fall_back_on_repair=True, *args, **kwargs):
+        super(SourceSpanTreeBuilder, self).__init__(*args, **kwargs)
+        self.fall_back_on_repair = fall_back_on_repair
+
+    def feed(self, markup):
+        args, kwargs = self.parser_args
+        parser = SourceSpanHTMLParser(*args, fall_back_on_repair=self.fall_back_on_repair, **kwargs)
+        parser.soup = self.soup
+        try:
+            parser.feed(markup)
+            parser.close()
+        except AssertionError as error:
+            raise ParserRejectedMarkup(error)
+        parser.already_closed_empty_element = []
+
+
+def build_source_span_tree(html, start_tag=None, fall_back_on_repair=True):
+    """
+    :param html: the html to parse
+    :type html: str
+    :param start_tag: if provided, only ``start_tag`` elements (and their contents) are
+        added to the tree
+    :type start_tag: str
+    :param fall_back_on_repair: whether tags with repaired descendants are left without a span
+    :type fall_back_on_repair: bool
+    :return: the parsed document, with a ``SourceSpan`` on each tag that can be sliced
+    :rtype: bs4.BeautifulSoup
+    """
+    builder = SourceSpanTreeBuilder(fall_back_on_repair)
+    if start_tag:
+        return BeautifulSoup(html, builder=builder, parse_only=SoupStrainer(start_tag))
+    return BeautifulSoup(html, builder=builder)
+
+
+def get_source_span(element):
+    """
+    :param element: a node from the tree
+    :return: the element's ``SourceSpan``, or ``None`` if it doesn't have one
+    :rtype: SourceSpan
+    """
+    if isinstance(element, Tag):
+        # Tag.__getattr__ would search the tree for a <source_span> tag
+        return element.__dict__.get('source_span')
+    return None
+
+
+def invalidate_source_spans(element):
+    """
+    Removes the spans of the given element and its ancestors, e.g. after removing one of the
+    element's descendants, so their html is re-serialized from the tree.
+    """
+    while element is not None:
+        if isinstance(element, Tag):
+            element.__dict__.pop('source_span', None)
+        element = element.parent
+
+
+def outer_html(element):
+    """
+    :param element: a node from the tree
+    :return: the element's html, sliced from the input if possible
+    :rtype: str
+    """
+    span = get_source_span(element)
+    if span is None:
+        return six.text_type(element)
+    return span.markup[span.start:span.end]
+
+
+def inner_html(element):
+    """
+    :param element: a tag from the tree
+    :return: the html of the tag's contents, sliced from the input if possible, or ``None``
+        if the tag doesn't have a span or has a comment among its children (which the text
+        parsers leave out)
+    :rtype: str
+    """
+    span = get_source_span(element)
+    if span is None or any(isinstance(child, Comment) for child in element.contents):
+        return None
+    return span.markup[span.start_tag_end:span.end_tag_start]
@@ -0,0 +1,191 @@
+"""
+The text-fixing stage used by the text parsers (see ``html2ans.parsers.text.AbstractTextParser``).
+Text is fixed with ``ftfy.fix_text`` (mojibake, curly quotes, HTML entities, etc.), which is
+one of the slowest parts of conversion, so a ``TextFixer`` can:
+
+* skip ``ftfy`` for text that can't need fixing (``precheck``)
+* fix the whole html document once before the tree is built instead of each text element
+  (``whole_document``)
+* remember fixed text (``cache_size``)
+* not fix text at all (``enabled``)
+
+A document parser's ``text_fixer`` option sets the fixer used while it converts; otherwise
+``DEFAULT_TEXT_FIXER`` is used.
+"""
+from __future__ import unicode_literals
+
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import six
+
+ASCII_PRECHECK = 'ascii'
+"""
+Skips ``ftfy`` for printable ASCII text without ``&`` (nothing ``ftfy`` does can change it).
+"""
+
+HEURISTIC_PRECHECK = 'heuristic'
+"""
+Also skips ``ftfy`` for text whose only other characters are common typographic punctuation
+(curly quotes, dashes and ellipses, which are straightened like ``ftfy`` would) and CJK, kana
+and hangul characters, none of which typically appear in mojibake. This is a heuristic: in rare
+cases ``ftfy`` may have decoded such text differently.
+"""
+
+_NOT_ASCII_RE = re.compile('[^\t\n\x20-\x25\x27-\x7e]')
+_NOT_COMMON_RE = re.compile(
+    '[^\t\n\x20-\x25\x27-\x7e\u2013\u2014\u2018\u2019\u201c\u201d\u2026'
+    '\u3001-\u3011\u3041-\u3096\u30a1-\u30fa\u4e00-\u9fff\uac00-\ud7a3]')
+_NOT_PRINTABLE_ASCII_RE = re.compile('[^\t\n\x20-\x7e]')
+_LINE_RE = re.compile('[^\n]*\n|[^\n]+')
+
+
+class TextFixer(object):
+    """
+    Fixes text with ``ftfy.fix_text``.
+
+    :param enabled: whether to fix text at all
+    :type enabled: bool
+    :param precheck: how to decide that text can skip ``ftfy`` (``ASCII_PRECHECK``,
+        ``HEURISTIC_PRECHECK`` or ``None`` to always use ``ftfy``)
+    :type precheck: str
+    :param whole_document: whether to fix the whole html document (without unescaping HTML
+        entities) before the tree is built rather than each text element. This also fixes
+        attribute values and text the text parsers don't handle (headers, captions, raw html,
+        etc.) and doesn't unescape entities left in text. It isn't necessarily faster: with
+        a precheck, lines of printable ASCII are skipped, but every other line is fixed in
+        full, markup included.
+    :type whole_document: bool
+    :param cache_size: how many fixed texts to remember (0 to not remember any)
+    :type cache_size: int
+
+    """
+
+    def __init__(self, enabled=True, precheck=ASCII_PRECHECK, whole_document=False, cache_size=0):
+        if precheck not in (ASCII_PRECHECK, HEURISTIC_PRECHECK, None):
+            raise ValueError("Unknown precheck: {}".format(precheck))
+        self.enabled = enabled
+        self.precheck = precheck
+        self.whole_document = whole_document
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        # only includes the options that affect the fixed text (used in config fingerprints)
+        return '{}(enabled={}, precheck={}, whole_document={})'.format(
+            type(self).__name__, self.enabled, self.precheck, self.whole_document)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def fix(self, text):
+        """
+        Fixes the text of one element (unless text is fixed for the whole document).
+
+        :param text: the text to fix
+        :type text: str
+        :return: the fixed text
+        :rtype: str
+        """
+        if not self.enabled or self.whole_document:
+            return text
+        return self._fix(text)
+
+    def fix_document(self, html):
+        """
+        Fixes a whole html document if ``whole_document`` is set. Documents given as bytes
+        are left for the tree builder to decode and aren't fixed.
+
+        :param html: the html to fix
+        :type html: str
+        :return: the fixed html
+        :rtype: str
+        """
+        if not self.enabled or not self.whole_document or not isinstance(html, six.text_type):
+            return html
+        if self.precheck is None:
+            return self._fix(html, fix_entities=False)
+        # ftfy fixes each line separately, so only runs of lines that aren't all
+        # printable ASCII (which ftfy can't change without fixing entities) need it
+        fixed = []
+        pending = []
+        for line in _LINE_RE.findall(html):
+            if _NOT_PRINTABLE_ASCII_RE.search(line):
+                pending.append(line)
+                continue
+            if pending:
+                fixed.append(self._fix(''.join(pending), fix_entities=False))
+                pending = []
+            fixed.append(line)
+        if pending:
+            fixed.append(self._fix(''.join(pending), fix_entities=False))
+        return ''.join(fixed)
+
+    def _fix(self, text, **kwargs):
+        precheck = self.precheck
+        if precheck is not None and not _NOT_ASCII_RE.search(text):
+            return text
+        # ftfy takes a while to import, so it's only imported once some text needs it
+        if precheck == HEURISTIC_PRECHECK and not _NOT_COMMON_RE.search(text):
+            from ftfy.fixes import uncurl_quotes
+            return uncurl_quotes(text)
+        from ftfy import fix_text
+        if not self.cache_size:
+            return fix_text(text, **kwargs)
+        with self._lock:
+            fixed = self._cache.pop(text, None)
+            if fixed is not None:
+                self._cache[text] = fixed
+                return fixed
+        fixed = fix_text(text, **kwargs)
+        with self._lock:
+            self._cache[text] = fixed
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return fixed
+
+    def clear(self):
+        """
+        Forgets every fixed text.
+        """
+        with self._lock:
+            self._cache.clear()
+
+
+DEFAULT_TEXT_FIXER = TextFixer()
+"""
+The ``TextFixer`` used when a document parser doesn't have one (``ftfy`` with ``ASCII_PRECHECK``).
+"""
+
+_active_text_fixer = threading.local()
+
+
+@contextmanager
+def activate_text_fixer(text_fixer):
+    """
+    Makes ``text_fixer`` the fixer used by the text parsers (in the current thread) for
+    the duration of the block.
+    """
+    previous = getattr(_active_text_fixer, 'fixer', None)
+    _active_text_fixer.fixer = text_fixer
+    try:
+        yield text_fixer
+    finally:
+        _active_text_fixer.fixer = previous
+
+
+def get_active_text_fixer():
+    """
+    :return: the ``TextFixer`` activated in the current thread, or ``DEFAULT_TEXT_FIXER``
+    :rtype: TextFixer
+    """
+    return getattr(_active_text_fixer, 'fixer', None) or DEFAULT_TEXT_FIXER
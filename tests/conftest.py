@@ -1,12 +1,16 @@
 from io import open
 import json
 import os
+import sys
 import pytest
 
 from html2ans.default import DefaultHtmlAnsParser
 
 FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
 
+# uses async generators
+collect_ignore = ['test_aio.py'] if sys.version_info < (3, 6) else []
+
 
 @pytest.fixture
 def test_html2ans():
@@ -0,0 +1,56 @@
+import gc
+import weakref
+
+from html2ans.default import DefaultHtmlAnsParser
+from html2ans.parsers.embeds import (
+    EmbedScan,
+    activate_embed_scan,
+    scan_embed_candidates,
+    ArcPlayerEmbedParser,
+    ImgurEmbedParser,
+    YoutubeEmbedParser,
+)
+
+
+def test_scan_embed_candidates(make_tag):
+    tag = make_tag(
+        '<div><a href="https://imgur.com/w7zCp">Imgur</a>'
+        '<p><iframe src="https://www.youtube.com/embed/4I86iz4X4jM"></iframe>'
+        '<a href="https://t.co/W3ZWJIKOjG">Link</a></p></div>', 'div')
+    with activate_embed_scan(EmbedScan()) as embed_scan:
+        candidates = scan_embed_candidates(tag)
+        assert [a['href'] for a in candidates['a']] == ['https://imgur.com/w7zCp', 'https://t.co/W3ZWJIKOjG']
+        assert [iframe['src'] for iframe in candidates['iframe']] == ['https://www.youtube.com/embed/4I86iz4X4jM']
+        assert scan_embed_candidates(tag) is candidates
+        assert embed_scan.element is tag
+    # without a conversion running, nothing is kept
+    assert scan_embed_candidates(tag) == candidates
+    assert scan_embed_candidates(tag) is not candidates
+    assert ImgurEmbedParser().get_embed_candidates(tag) == tag.find_all('a')
+    assert YoutubeEmbedParser().get_embed_candidates(tag) == tag.find_all('iframe')
+    assert ArcPlayerEmbedParser().get_embed_candidates(tag) == []
+
+
+def test_scan_embed_candidates_new_element(make_tag):
+    first_tag = make_tag('<div><a href="https://imgur.com/w7zCp">Imgur</a></div>', 'div')
+    second_tag = make_tag('<div><iframe src="https://player.vimeo.com/video/76979871"></iframe></div>', 'div')
+    with activate_embed_scan(EmbedScan()):
+        assert list(scan_embed_candidates(first_tag)) == ['a']
+        assert list(scan_embed_candidates(second_tag)) == ['iframe']
+
+
+def test_tree_collectable_after_conversion():
+    trees = []
+
+    class TrackingParser(DefaultHtmlAnsParser):
+        def build_tree(self, html, start_tag=None):
+            tree = super(TrackingParser, self).build_tree(html, start_tag)
+            trees.append(weakref.ref(tree))
+            return tree
+
+    output = TrackingParser().generate_ans(
+        '<body><blockquote class="imgur-embed-pub"><a href="https://imgur.com/w7zCp">Imgur</a></blockquote>'
+        '<blockquote><p>Quote</p><a href="https://www.washingtonpost.com">Link</a></blockquote></body>')
+    assert [element['type'] for element in output] == ['reference', 'quote']
+    gc.collect()
+    assert trees and all(tree() is None for tree in trees)
@@ -0,0 +1,89 @@
+import re
+
+import pytest
+from html2ans.parsers.embeds import (
+    EMBED_PROVIDERS,
+    EmbedProviderRegistry,
+    _get_literal_prefix,
+    ArcPlayerEmbedParser,
+    FacebookPostEmbedParser,
+    ImgurEmbedParser,
+    TwitterTweetEmbedParser,
+    TwitterVideoEmbedParser,
+    YoutubeEmbedParser,
+)
+
+
+class OptionalSchemeEmbedParser(ImgurEmbedParser):
+    regex = r'(?:https?://)?example.com/(\w+)'
+
+
+TEST_URLS = [
+    'https://www.youtube.com/embed/4I86iz4X4jM',
+    'https://twitter.com/latimes/status/1065323995959037953?ref_src=twsrc%5Etfw',
+    'https://t.co/W3ZWJIKOjG',
+    'https://www.facebook.com/plugins/post.php?href=https://imgur.com/w7zCp',
+    'https://imgur.com/w7zCp?src=https://www.youtube.com/embed/4I86iz4X4jM',
+    'https://player.vimeo.com/video/76979871',
+    'https://herepet.tumblr.com/post/180352280783/source',
+    'https://www.washingtonpost.com',
+    '',
+]
+
+
+@pytest.mark.parametrize('url,expected_parser,expected_id', [
+    ('https://www.youtube.com/embed/4I86iz4X4jM', YoutubeEmbedParser, 'https://www.youtube.com/embed/4I86iz4X4jM'),
+    ('https://twitter.com/latimes/status/1065323995959037953', TwitterTweetEmbedParser, '1065323995959037953'),
+    ('https://www.facebook.com/plugins/post.php?href=https://imgur.com/w7zCp', FacebookPostEmbedParser, 'https://imgur.com/w7zCp'),
+    ('https://www.washingtonpost.com', None, None),
+])
+def test_registry_match(url, expected_parser, expected_id):
+    assert EMBED_PROVIDERS.match(url) == (expected_parser, expected_id)
+
+
+@pytest.mark.parametrize('url', TEST_URLS)
+def test_registry_get_tag_id_parity(url):
+    url_matches = {}
+    for parser in EMBED_PROVIDERS._parsers:
+        match = re.search(parser.regex, url)
+        assert EMBED_PROVIDERS.get_tag_id(parser.regex, url) == (match.group(1) if match else None)
+        assert EMBED_PROVIDERS.get_tag_id(parser.regex, url, url_matches) == (match.group(1) if match else None)
+    assert url_matches == {url: EMBED_PROVIDERS.match(url)}
+
+
+def test_registry_get_tag_id_shared_match():
+    registry = EmbedProviderRegistry([ImgurEmbedParser, YoutubeEmbedParser])
+    url_matches = {'https://imgur.com/w7zCp': (None, None)}
+    # the stored match is used rather than searching again
+    assert registry.get_tag_id(ImgurEmbedParser.regex, 'https://imgur.com/w7zCp', url_matches) is None
+    assert registry.get_tag_id(ImgurEmbedParser.regex, 'https://imgur.com/w7zCp') == 'https://imgur.com/w7zCp'
+
+
+@pytest.mark.parametrize('regex,prefix', [
+    (r'https?://twitter.com/\w+/status/(\d+)', 'http'),
+    (r'(https?://poll.fm/(\d+))', 'http'),
+    (r'(?i)https?://example.com/(\w+)', ''),
+    (r'(https?://)?example.com/(\w+)', ''),
+    (r'https://example.com/(\w+)|https://example.org/(\w+)', ''),
+])
+def test_registry_literal_prefix(regex, prefix):
+    assert _get_literal_prefix(regex) == prefix
+
+
+def test_registry_prefix_lookahead():
+    assert EMBED_PROVIDERS.compile().pattern.startswith('(?=http)')
+    registry = EmbedProviderRegistry([ImgurEmbedParser, OptionalSchemeEmbedParser])
+    assert not registry.compile().pattern.startswith('(?=')
+    assert registry.match('example.com/abc') == (OptionalSchemeEmbedParser, 'abc')
+
+
+def test_registry_shared_regex():
+    registry = EmbedProviderRegistry([TwitterTweetEmbedParser, TwitterVideoEmbedParser, ArcPlayerEmbedParser])
+    assert registry.match('https://twitter.com/HAZ/status/1027958659404521475') == (
+        TwitterTweetEmbedParser, '1027958659404521475')
+
+
+def test_registry_unregistered_regex():
+    registry = EmbedProviderRegistry([ImgurEmbedParser])
+    assert registry.get_tag_id(r'https?://example.com/(\w+)', 'https://example.com/abc') == 'abc'
+    assert registry.get_tag_id(r'https?://example.com/(?P<id>\w+)', 'https://example.com/abc') == 'abc'
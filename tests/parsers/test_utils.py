@@ -1,5 +1,5 @@
 import pytest
-from html2ans.parsers.utils import AbstractParserUtilities
+from html2ans.parsers.utils import AbstractParserUtilities, use_node_facts
 
 
 @pytest.mark.parametrize('tag_string,tag_name,num_children', [
@@ -20,6 +20,22 @@ def test_get_children_with_filters(tag_string, tag_name, filters, num_children,
     assert len(AbstractParserUtilities.get_children(tag, filters)) == num_children
 
 
+@pytest.mark.parametrize('tag_string,tag_name,num_children', [
+    ('<p></p>', 'p', 0),
+    ('<p>\n<br/></p>', 'p', 0),
+    ('<p><a href="somelink">Hello</a></p>', 'p', 1),
+    ('<p><img src="imgsrc"/>Text<img src="imgsrc"/></p>', 'p', 3),
+])
+def test_iter_children(tag_string, tag_name, num_children, make_tag):
+    tag = make_tag(tag_string, tag_name)
+    assert list(AbstractParserUtilities.iter_children(tag)) == AbstractParserUtilities.get_children(tag)
+    assert AbstractParserUtilities.has_children(tag) == (num_children > 0)
+    assert AbstractParserUtilities.count_children(tag) == num_children
+    assert AbstractParserUtilities.count_children(tag, limit=2) == min(num_children, 2)
+    assert AbstractParserUtilities.count_children(tag, filter_tags=('img', )) == \
+        len(AbstractParserUtilities.get_children(tag, ('img', )))
+
+
 @pytest.mark.parametrize('tag_string,tag_name', [
     ('<p><a href="somelink"><img height="80" src="imgsrc" width="40"/></a></p>', 'p'),
     ('<img height="80" src="imgsrc" width="40"/>', 'img'),
@@ -68,3 +84,26 @@ def test_is_wrapper_false(tag_string, tag_name, make_tag):
 ])
 def test_is_empty_true(tag_string, tag_name, make_tag):
     assert AbstractParserUtilities.is_empty(make_tag(tag_string, tag_name))
+
+
+@pytest.mark.parametrize('tag_string,tag_name', [
+    ('<p><a href="somelink">Hello</a></p>', 'p'),
+    ('<p><a href="somelink"><img height="80" src="imgsrc" width="40"/></a></p>', 'p'),
+    ('<div><img src="imgsrc"/></div>', 'div'),
+    ('<div width="500"><img src="imgsrc"/></div>', 'div'),
+    ('<p><p>Text</p><p>Text</p><p>Text</p></p>', 'p'),
+    ("<p>I've got <i>something</i> to say</p>", 'p'),
+    ('<div><p>\n</p><br/><!-- comment --></div>', 'div'),
+])
+def test_node_facts(tag_string, tag_name, make_tag):
+    tag = make_tag(tag_string, tag_name)
+    nodes = [tag] + list(tag.descendants)
+    expected = [(AbstractParserUtilities.is_empty(node),
+                 AbstractParserUtilities.is_text_only(node),
+                 AbstractParserUtilities.is_wrapper(node)) for node in nodes]
+    with use_node_facts(tag, AbstractParserUtilities) as node_facts:
+        assert node_facts.get(AbstractParserUtilities, tag) is not None
+        assert [(AbstractParserUtilities.is_empty(node),
+                 AbstractParserUtilities.is_text_only(node),
+                 AbstractParserUtilities.is_wrapper(node)) for node in nodes] == expected
+    assert AbstractParserUtilities._get_node_facts(tag) is None
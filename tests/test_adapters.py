@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+import pytest
+import six
+
+from bs4 import BeautifulSoup
+from bs4.element import Comment, NavigableString, Tag
+
+from html2ans.adapters import build_lxml_tree
+from html2ans.default import LxmlHtmlAnsParser
+
+
+def _node_type(node):
+    return Tag if isinstance(node, Tag) else type(node)
+
+
+TEST_HTML = (
+    '<html><head><title>Title</title></head><body>'
+    '<!-- comment --><p class="intro lead">Some <em>text</em> &amp; <a href="somelink">a link</a></p>\n  \n'
+    '<div><img src="imgsrc" width="40"/><br></div>'
+    '<blockquote class="twitter-tweet"><p>Tweet</p>'
+    '<a href="https://twitter.com/latimes/status/1065323995959037953">November 21, 2018</a></blockquote>'
+    '<script async src="https://platform.twitter.com/widgets.js">if (a < b) {}</script>'
+    '<pre>  spaced  </pre></body></html>'
+)
+
+
+@pytest.mark.parametrize('start_tag', ['body', 'div', 'blockquote', 'section'])
+def test_tree_matches_soup(start_tag):
+    soup_tag = BeautifulSoup(TEST_HTML, 'lxml').find(start_tag)
+    adapted_tag = build_lxml_tree(TEST_HTML).find(start_tag)
+    if soup_tag is None:
+        assert adapted_tag is None
+    else:
+        assert six.text_type(adapted_tag) == six.text_type(soup_tag)
+        assert adapted_tag.text == soup_tag.text
+        assert [_node_type(child) for child in adapted_tag.children] == [_node_type(child) for child in soup_tag.children]
+        assert [tag.name for tag in adapted_tag.find_all(True)] == [tag.name for tag in soup_tag.find_all(True)]
+        assert [tag.attrs for tag in adapted_tag.find_all(['p', 'a'])] == \
+            [tag.attrs for tag in soup_tag.find_all(['p', 'a'])]
+
+
+def test_adapter_types():
+    body = build_lxml_tree(TEST_HTML).find('body')
+    assert isinstance(body, Tag)
+    children = list(body.children)
+    assert type(children[0]) is Comment
+    assert children[1].attrs == {'class': ['intro', 'lead']}
+    assert type(children[2]) is NavigableString and children[2] == '\n'
+    assert children[1].next_sibling is children[2]
+    assert children[2].parent is body
+
+
+def test_adapter_decompose():
+    body = build_lxml_tree(TEST_HTML).find('body')
+    script = body.find('script')
+    previous_tag = script.previous_sibling
+    script.decompose()
+    assert body.find('script') is None
+    assert previous_tag.next_sibling.name == 'pre'
+    assert '<script' not in six.text_type(body)
+
+
+@pytest.mark.parametrize('html', ['', 'This is a navigable string', '<!-- test comment 4 -->'])
+def test_empty_documents(html, test_html2ans):
+    assert LxmlHtmlAnsParser('0.8.0').generate_ans(html) == test_html2ans.generate_ans(html)
+
+
+def test_lxml_parser(get_html_fixture, test_html2ans):
+    html = TEST_HTML + get_html_fixture('input/fandango_list.html')
+    assert LxmlHtmlAnsParser('0.8.0').generate_ans(html) == test_html2ans.generate_ans(html)
+
+
+@pytest.mark.parametrize('start_tag', ['body', 'div', 'blockquote', 'section'])
+def test_tree_start_tag(start_tag):
+    adapted_tag = build_lxml_tree(TEST_HTML, start_tag).find(start_tag)
+    soup_tag = BeautifulSoup(TEST_HTML, 'lxml').find(start_tag)
+    assert six.text_type(adapted_tag) == six.text_type(soup_tag)
+    if soup_tag is not None:
+        assert adapted_tag.parent.parent is None
+        assert adapted_tag.next_sibling is None
@@ -0,0 +1,112 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from html2ans.batch import BatchResult
+from html2ans.exc import ParsingException
+from html2ans.parsers.base import BaseElementParser, ParseResult
+
+DOCUMENTS = [
+    '<body><p>First</p></body>',
+    '<body><p>Second</p><blockquote><p>Quote</p></blockquote></body>',
+    '<body><foo>bar</foo></body>',
+    '<body><p>Fourth</p></body>',
+]
+
+
+def run(coroutine):
+    return asyncio.new_event_loop().run_until_complete(coroutine)
+
+
+async def collect(results):
+    return [result async for result in results]
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'yield_every': 1}, {'executor': ThreadPoolExecutor(1)}])
+def test_agenerate_ans(kwargs, test_html2ans):
+    html = '<body><p>One</p><div><p>Two</p><p>Three</p></div></body>'
+    assert run(test_html2ans.agenerate_ans(html, **kwargs)) == test_html2ans.generate_ans(html)
+
+
+class RecordingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super(RecordingExecutor, self).__init__(1)
+        self.functions = []
+
+    def submit(self, function, *args, **kwargs):
+        self.functions.append(function.__name__)
+        return super(RecordingExecutor, self).submit(function, *args, **kwargs)
+
+
+@pytest.mark.parametrize('html', [
+    '<body>' + '<foo>Text</foo>' * 10 + '</body>',
+    '<body><div>' + '<foo>Text</foo>' * 10 + '</div></body>',
+])
+def test_agenerate_ans_yields_control(html, test_html2ans):
+    ticks = []
+    parser = DummyTickParser(ticks)
+    test_html2ans.add_parser(parser)
+
+    async def ticker():
+        while True:
+            ticks.append(None)
+            await asyncio.sleep(0)
+
+    async def convert():
+        task = asyncio.ensure_future(ticker())
+        await asyncio.sleep(0)
+        output = await test_html2ans.agenerate_ans(html, yield_every=2)
+        task.cancel()
+        return output
+
+    assert len(run(convert())) == 10
+    # the event loop ran between every other element being parsed
+    assert len(set(parser.ticks_seen)) >= 5
+
+
+def test_agenerate_ans_builds_tree_in_executor(test_html2ans):
+    executor = RecordingExecutor()
+    html = '<body><div><p>One</p><p>Two</p></div></body>'
+    assert run(test_html2ans.agenerate_ans(html, executor=executor, yield_every=1)) == test_html2ans.generate_ans(html)
+    assert executor.functions == ['_build_start']
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+@pytest.mark.parametrize('concurrency', [1, 3])
+def test_agenerate_ans_many(ordered, concurrency, test_html2ans):
+    results = run(collect(test_html2ans.agenerate_ans_many(DOCUMENTS, concurrency=concurrency, ordered=ordered)))
+    if not ordered:
+        results.sort()
+    assert results == [BatchResult(index, test_html2ans.generate_ans(html), None) for index, html in enumerate(DOCUMENTS)]
+
+
+def test_agenerate_ans_many_async_documents(test_html2ans):
+    async def documents():
+        for html in DOCUMENTS:
+            yield html
+
+    test_html2ans.add_parser(DummyParserException())
+    results = run(collect(test_html2ans.agenerate_ans_many(documents(), concurrency=2)))
+    assert [result.index for result in results] == [0, 1, 2, 3]
+    assert results[2].output is None and isinstance(results[2].error, ParsingException)
+
+
+class DummyTickParser(BaseElementParser):
+    applicable_elements = ['foo']
+
+    def __init__(self, ticks):
+        super(DummyTickParser, self).__init__()
+        self.ticks = ticks
+        self.ticks_seen = []
+
+    def parse(self, tag):
+        self.ticks_seen.append(len(self.ticks))
+        return ParseResult({'type': 'foo', 'bar': tag.text}, True)
+
+
+class DummyParserException(BaseElementParser):
+    applicable_elements = ['foo']
+
+    def parse(self, tag):
+        raise ValueError('bad foo')
@@ -2,7 +2,8 @@ import pytest
 
 from html2ans.base import AbstractHtmlAnsParser, BaseHtmlAnsParser
 from html2ans.parsers.base import BaseElementParser, ParseResult
-from html2ans.parsers.text import ParagraphParser
+from html2ans.parsers.embeds import TwitterTweetEmbedParser
+from html2ans.parsers.text import BlockquoteParser, ParagraphParser
 
 
 def test_interface():
@@ -77,6 +78,78 @@ def test_ignore_empty_blocks(data, test_html2ans):
     assert test_html2ans.generate_ans(data) == []
 
 
+def test_parser_candidates_do_not_grow(test_html2ans):
+    parser_counts = {key: len(parsers) for key, parsers in test_html2ans.parsers.items()}
+    for _ in range(3):
+        test_html2ans.generate_ans('<body><p>Text</p><foo>bar</foo><blockquote>Quote</blockquote></body>')
+    assert {key: len(parsers) for key, parsers in test_html2ans.parsers.items()} == parser_counts
+    assert test_html2ans.get_parser_candidates('p') == \
+        tuple(test_html2ans.parsers['p']) + tuple(test_html2ans.BACKUP_PARSERS)
+    assert test_html2ans.get_parser_candidates('foo') == tuple(test_html2ans.BACKUP_PARSERS)
+
+
+def test_parser_candidates_rebuilt(test_html2ans):
+    assert test_html2ans.generate_ans('<body><foo>dummy words</foo></body>')[0]['type'] == 'raw_html'
+    parser = DummyParser()
+    test_html2ans.add_parser(parser)
+    assert test_html2ans.get_parser_candidates('foo')[0] is parser
+    assert test_html2ans.generate_ans('<body><foo>dummy words</foo></body>') == [
+        {'type': 'foo', 'bar': "dummy words"}
+    ]
+
+
+def test_parser_candidates_class_index(test_html2ans):
+    class_gated = [parser for parser in test_html2ans.parsers['blockquote'] if parser.applicable_classes]
+    assert class_gated
+
+    plain_candidates = test_html2ans.get_parser_candidates('blockquote', [])
+    assert not [parser for parser in plain_candidates if parser in class_gated]
+    assert [parser for parser in plain_candidates if isinstance(parser, BlockquoteParser)]
+
+    tweet_candidates = test_html2ans.get_parser_candidates('blockquote', ['twitter-tweet', 'other'])
+    assert [type(parser) for parser in tweet_candidates if parser in class_gated] == [TwitterTweetEmbedParser]
+    assert test_html2ans.get_parser_candidates('blockquote', 'twitter-tweet other') == tweet_candidates
+
+
+def test_class_gated_parser_added(test_html2ans):
+    test_html2ans.generate_ans('<body><foo class="dummy">dummy words</foo></body>')
+    test_html2ans.add_parser(DummyClassParser())
+    assert test_html2ans.generate_ans('<body><foo>dummy words</foo></body>')[0]['type'] == 'raw_html'
+    assert test_html2ans.generate_ans('<body><foo class="dummy">dummy words</foo></body>') == [
+        {'type': 'foo', 'bar': "dummy words"}
+    ]
+
+
+def test_class_applicable_override(test_html2ans):
+    # parsers that change how classes are matched can't be indexed by their classes
+    test_html2ans.add_parser(DummyAnyClassParser())
+    assert test_html2ans.generate_ans('<body><aside class="a">Aside</aside></body>') == [{'type': 'hit'}]
+    assert test_html2ans.generate_ans('<body><aside class="c">Aside</aside></body>')[0]['type'] == 'raw_html'
+
+
+def test_generate_ans_iter(test_html2ans):
+    html = '<body><p>One</p><div><p>Two</p><p>Three</p></div><foo>dummy words</foo></body>'
+    parser = DummyCountingParser()
+    test_html2ans.add_parser(parser)
+    ans_iter = test_html2ans.generate_ans_iter(html)
+    assert next(ans_iter)['content'] == 'One'
+    assert next(ans_iter)['content'] == 'Two'
+    assert parser.count == 0
+    assert list(ans_iter)[1:] == [{'type': 'foo', 'bar': "dummy words"}]
+    assert parser.count == 1
+    assert list(test_html2ans.generate_ans_iter(html)) == test_html2ans.generate_ans(html)
+
+
+def test_generate_ans_iter_node_facts(test_html2ans):
+    html = '<body><p>One</p><div><p>Two</p></div></body>'
+    facts_parser = BaseHtmlAnsParser(default_parsers=[ParagraphParser()], precompute_node_facts=True)
+    first_iter = facts_parser.generate_ans_iter(html)
+    second_iter = facts_parser.generate_ans_iter(html)
+    expected = test_html2ans.generate_ans(html)
+    assert [next(first_iter), next(second_iter)] == [expected[0]] * 2
+    assert [next(first_iter), next(second_iter)] == [expected[1]] * 2
+
+
 class DummyParser(BaseElementParser):
     applicable_elements = ['foo']
 
@@ -87,6 +160,32 @@ class DummyParser(BaseElementParser):
         }, True)
 
 
+class DummyClassParser(DummyParser):
+    applicable_classes = ['dummy']
+
+
+class DummyAnyClassParser(BaseElementParser):
+    applicable_elements = ['aside']
+    applicable_classes = ['a', 'b']
+
+    def is_class_applicable(self, tag):
+        return any(applicable_class in tag.attrs.get('class', []) for applicable_class in self.applicable_classes)
+
+    def parse(self, tag):
+        return ParseResult({'type': 'hit'}, True)
+
+
+class DummyCountingParser(DummyParser):
+
+    def __init__(self):
+        super(DummyCountingParser, self).__init__()
+        self.count = 0
+
+    def parse(self, tag):
+        self.count += 1
+        return super(DummyCountingParser, self).parse(tag)
+
+
 class DummyParserException(BaseElementParser):
     applicable_elements = ['foo']
 
@@ -0,0 +1,48 @@
+import pytest
+
+from html2ans.base import BaseHtmlAnsParser
+from html2ans.batch import BatchResult
+from html2ans.exc import ParsingException
+from html2ans.parsers.base import BaseElementParser
+
+DOCUMENTS = [
+    '<body><p>First</p></body>',
+    '<body><p>Second</p><blockquote><p>Quote</p></blockquote></body>',
+    '<body><foo>bar</foo></body>',
+    '<body><p>Fourth</p></body>',
+]
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_generate_ans_many(workers, test_html2ans):
+    results = list(test_html2ans.generate_ans_many(DOCUMENTS, workers=workers, chunksize=2))
+    assert results == [BatchResult(index, test_html2ans.generate_ans(html), None) for index, html in enumerate(DOCUMENTS)]
+
+
+def test_generate_ans_many_unordered(test_html2ans):
+    results = sorted(test_html2ans.generate_ans_many(DOCUMENTS, workers=2, ordered=False))
+    assert results == list(test_html2ans.generate_ans_many(DOCUMENTS, workers=0))
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_generate_ans_many_errors(workers, test_html2ans):
+    test_html2ans.add_parser(DummyParserException())
+    results = list(test_html2ans.generate_ans_many(DOCUMENTS, workers=workers))
+    assert [result.output for result in results] == [
+        test_html2ans.generate_ans(DOCUMENTS[0]), test_html2ans.generate_ans(DOCUMENTS[1]), None,
+        test_html2ans.generate_ans(DOCUMENTS[3])
+    ]
+    assert isinstance(results[2].error, ParsingException)
+
+
+def test_generate_ans_many_closed():
+    results = BaseHtmlAnsParser().generate_ans_many(DOCUMENTS * 10, workers=2)
+    assert next(results).index == 0
+    results.close()
+
+
+class DummyParserException(BaseElementParser):
+    applicable_elements = ['foo']
+
+    def parse(self, tag):
+        raise ValueError('bad foo')
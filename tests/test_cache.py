@@ -0,0 +1,164 @@
+import datetime
+import pickle
+
+import pytest
+
+from html2ans import base
+from html2ans.cache import LRUDocumentCache, LRUFragmentCache, SqliteDocumentCache, document_cache_key, fragment_cache_key
+from html2ans.default import DefaultHtmlAnsParser
+from html2ans.parsers.base import BaseElementParser, ParseResult
+from html2ans.parsers.text import ParagraphParser
+
+HTML = '<body><p>Text</p><blockquote><p>Quote</p></blockquote><img src="imgsrc"/></body>'
+TWEET = (
+    '<blockquote class="twitter-tweet"><p>Tweet</p>'
+    '<a href="https://twitter.com/user/status/1">date</a></blockquote>'
+    '<script async src="https://platform.twitter.com/widgets.js"></script>'
+)
+
+
+class CountingParser(BaseElementParser):
+    applicable_elements = ['p']
+
+    def __init__(self, cacheable):
+        self.cacheable = cacheable
+        self.parse_calls = 0
+
+    def parse(self, element, *args, **kwargs):
+        self.parse_calls += 1
+        return ParseResult({'type': 'counted', 'content': element.text}, True)
+
+
+class DateParser(BaseElementParser):
+    applicable_elements = ['p']
+
+    def parse(self, element, *args, **kwargs):
+        return ParseResult({'type': 'date', 'content': datetime.date(2020, 1, 1)}, True)
+
+
+@pytest.fixture(params=['lru', 'sqlite'])
+def document_cache(request, tmpdir):
+    if request.param == 'lru':
+        return LRUDocumentCache()
+    return SqliteDocumentCache(str(tmpdir.join('cache.db')))
+
+
+def test_document_cache(document_cache, test_html2ans):
+    parser = DefaultHtmlAnsParser('0.8.0', document_cache=document_cache)
+    expected = test_html2ans.generate_ans(HTML)
+    first = parser.generate_ans(HTML)
+    assert first == expected and len(document_cache) == 1
+    first[0]['content'] = 'changed'
+    assert parser.generate_ans(HTML) == expected
+    assert parser.generate_ans(HTML, start_tag='blockquote') == test_html2ans.generate_ans(HTML, start_tag='blockquote')
+    assert len(document_cache) == 2
+    document_cache.clear()
+    assert len(document_cache) == 0
+
+
+def test_document_cache_hit(document_cache):
+    parser = DefaultHtmlAnsParser('0.8.0', document_cache=document_cache)
+    document_cache.set(document_cache_key(parser.get_config_fingerprint(), HTML, 'body'), [{'type': 'cached'}])
+    assert parser.generate_ans(HTML) == [{'type': 'cached'}]
+    assert parser.generate_ans(HTML, with_stats=True)[0] != [{'type': 'cached'}]
+
+
+def test_document_cache_unserializable(document_cache):
+    parser = DefaultHtmlAnsParser('0.8.0', document_cache=document_cache)
+    parser.insert_parser('p', DateParser(), 0)
+    expected = [{'type': 'date', 'content': datetime.date(2020, 1, 1)}]
+    assert parser.generate_ans('<body><p><b>Bold</b> text</p></body>') == expected
+    assert parser.generate_ans('<body><p><b>Bold</b> text</p></body>') == expected
+    assert len(document_cache) == 0
+
+
+def test_config_fingerprint():
+    parser = DefaultHtmlAnsParser('0.8.0')
+    fingerprint = parser.get_config_fingerprint()
+    assert DefaultHtmlAnsParser('0.8.0').get_config_fingerprint() == fingerprint
+    assert DefaultHtmlAnsParser('0.10.0').get_config_fingerprint() != fingerprint
+    assert DefaultHtmlAnsParser('0.8.0', suppress_exceptions=True).get_config_fingerprint() != fingerprint
+    parser.insert_parser('blockquote', ParagraphParser(), 0)
+    assert parser.get_config_fingerprint() != fingerprint
+
+
+def test_lru_eviction():
+    document_cache = LRUDocumentCache(max_size=20)
+    document_cache.set('a', ['a' * 5])
+    document_cache.set('b', ['b' * 5])
+    assert document_cache.get('a') == ['aaaaa']
+    document_cache.set('c', ['c' * 5])
+    assert document_cache.get('b') is None
+    assert document_cache.get('a') == ['aaaaa'] and document_cache.get('c') == ['ccccc']
+    document_cache.set('d', ['d' * 100])
+    assert document_cache.get('d') is None
+    assert document_cache.size == 18
+
+
+def test_sqlite_max_entries(tmpdir):
+    document_cache = SqliteDocumentCache(str(tmpdir.join('cache.db')), max_entries=2)
+    for key in 'abc':
+        document_cache.set(key, [key])
+    assert document_cache.get('a') is None
+    assert document_cache.get('c') == ['c']
+    document_cache.close()
+    assert SqliteDocumentCache(str(tmpdir.join('cache.db'))).get('b') == ['b']
+
+
+def test_pickle(document_cache):
+    document_cache.set('a', ['a'])
+    assert pickle.loads(pickle.dumps(document_cache)).get('a') == ['a']
+
+
+def test_fragment_cache(test_html2ans):
+    fragment_cache = LRUFragmentCache()
+    parser = DefaultHtmlAnsParser('0.8.0', fragment_cache=fragment_cache)
+    html = '<body>{0}<p>Text</p>{0}<img src="imgsrc"/></body>'.format(TWEET)
+    expected = test_html2ans.generate_ans(html)
+    assert parser.generate_ans(html) == expected
+    assert len(fragment_cache) == 3
+    # the embed's script is still removed for the repeated (cached) tweet
+    assert parser.generate_ans(html) == expected
+    assert all(element['type'] != 'raw_html' for element in expected)
+    output = parser.generate_ans(html)
+    output[0]['referent']['id'] = 'changed'
+    assert parser.generate_ans(html) == expected
+    parser.insert_parser('p', ParagraphParser(), 0)
+    assert len(fragment_cache) == 0
+
+
+@pytest.mark.parametrize('cacheable,parse_calls', [(True, 1), (False, 3)])
+def test_fragment_cache_cacheable(cacheable, parse_calls):
+    counting_parser = CountingParser(cacheable)
+    parser = DefaultHtmlAnsParser(fragment_cache=LRUFragmentCache())
+    parser.insert_parser('p', counting_parser, 0)
+    output = parser.generate_ans('<body>{0}{0}{0}</body>'.format('<p><b>Same</b> text</p>'))
+    assert output == [{'type': 'counted', 'content': 'Same text'}] * 3
+    assert counting_parser.parse_calls == parse_calls
+
+
+def test_fragment_cache_not_cacheable_skips_key(monkeypatch):
+    key_calls = []
+
+    def counting_key(*args):
+        key_calls.append(args)
+        return fragment_cache_key(*args)
+
+    monkeypatch.setattr(base, 'fragment_cache_key', counting_key)
+    html = '<body><p><b>Same</b> text</p><blockquote><p>Quote</p></blockquote></body>'
+    parser = DefaultHtmlAnsParser(fragment_cache=LRUFragmentCache())
+    parser.insert_parser('p', CountingParser(False), 0)
+    parser.generate_ans(html)
+    assert [args[1].name for args in key_calls] == ['blockquote']
+
+
+def test_fragment_lru_eviction():
+    fragment_cache = LRUFragmentCache(max_entries=2)
+    for key in 'abc':
+        fragment_cache.set(key, True, {'key': key}, ())
+    assert fragment_cache.get('a') is None
+    assert fragment_cache.get('b') == (True, {'key': 'b'}, ())
+    fragment_cache.set('d', False, None, ())
+    assert fragment_cache.get('c') is None
+    assert fragment_cache.get('d') == (False, None, ())
+    assert pickle.loads(pickle.dumps(fragment_cache)).get('b') == (True, {'key': 'b'}, ())
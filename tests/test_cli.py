@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import gzip
+import io
+import json
+
+import pytest
+
+from html2ans.cli import main
+
+DOCUMENTS = [
+    '<body><p>First</p></body>',
+    '<body><p>Second</p><blockquote><p>Quote</p></blockquote></body>',
+]
+
+
+def read_output(path):
+    opener = gzip.open if path.endswith('.gz') else io.open
+    with opener(path, 'rb') as output_file:
+        return [json.loads(line.decode('utf-8')) for line in output_file]
+
+
+@pytest.mark.parametrize('workers', ['0', '2'])
+def test_html_files(workers, tmpdir, test_html2ans):
+    input_dir = tmpdir.mkdir('input')
+    for index, html in enumerate(DOCUMENTS):
+        input_dir.join('{}.html'.format(index)).write(html)
+    input_dir.join('notes.txt').write('not html')
+    output_path = str(tmpdir.join('output.jsonl'))
+    assert main([str(input_dir), '-o', output_path, '--workers', workers, '--ans-version', '0.8.0']) == 0
+    assert read_output(output_path) == [
+        {'id': str(input_dir.join('{}.html'.format(index))), 'content_elements': test_html2ans.generate_ans(html)}
+        for index, html in enumerate(DOCUMENTS)
+    ]
+
+
+def test_gzipped_jsonl(tmpdir, test_html2ans):
+    input_path = str(tmpdir.join('input.jsonl.gz'))
+    with gzip.open(input_path, 'wb') as input_file:
+        input_file.write(json.dumps({'id': 'first', 'body': DOCUMENTS[0]}).encode('utf-8') + b'\n\n')
+        input_file.write(json.dumps({'body': DOCUMENTS[1]}).encode('utf-8') + b'\n')
+    output_path = str(tmpdir.join('output.jsonl.gz'))
+    assert main([str(tmpdir.join('*.jsonl.gz')), '-o', output_path, '-w', '0', '--html-key', 'body',
+                 '--ans-version', '0.8.0', '--start-tag', 'blockquote']) == 0
+    assert read_output(output_path) == [
+        {'id': 'first', 'content_elements': test_html2ans.generate_ans(DOCUMENTS[0], start_tag='blockquote')},
+        {'id': input_path + ':3', 'content_elements': test_html2ans.generate_ans(DOCUMENTS[1], start_tag='blockquote')},
+    ]
+
+
+def test_errors(tmpdir):
+    input_path = tmpdir.join('input.jsonl')
+    input_path.write(json.dumps({'id': 'broken', 'html': 5}) + '\n')
+    output_path = str(tmpdir.join('output.jsonl'))
+    assert main([str(input_path), '-o', output_path, '-w', '0']) == 1
+    assert set(read_output(output_path)[0]) == {'id', 'error'}
+    with pytest.raises(SystemExit):
+        main([str(tmpdir.join('missing*.html'))])
+
+
+def test_declared_charset(tmpdir, test_html2ans):
+    html = u'<html><head><meta charset="iso-8859-1"></head><body><p><b>Café</b> crème</p></body></html>'
+    input_path = tmpdir.join('latin.html')
+    input_path.write_binary(html.encode('iso-8859-1'))
+    output_path = str(tmpdir.join('output.jsonl'))
+    assert main([str(input_path), '-o', output_path, '--workers', '0', '--ans-version', '0.8.0']) == 0
+    assert read_output(output_path)[0]['content_elements'] == test_html2ans.generate_ans(html)
@@ -0,0 +1,106 @@
+import json
+import pickle
+
+import pytest
+
+from html2ans import compact
+from html2ans.cache import LRUDocumentCache
+from html2ans.compact import ELEMENT_CLASSES, AudioElement, ListElement, ReferenceElement, Referent, TextElement, \
+    compact_element, json_default
+from html2ans.default import DefaultHtmlAnsParser
+
+HTML = (
+    '<body><p class="intro">Some <b>bold</b> text</p><h2>Header</h2>'
+    '<figure><img src="image.jpg" width="40" height="30"/><figcaption>Caption</figcaption></figure>'
+    '<blockquote class="twitter-tweet"><p>Tweet</p>'
+    '<a href="https://twitter.com/user/status/1">date</a></blockquote>'
+    '<blockquote><p>Quote</p></blockquote>'
+    '<ul><li>One</li><li><ol><li>Two</li></ol></li></ul>'
+    '<table><tr><td>1</td></tr></table>'
+    '<audio><source src="audio.mp3"/></audio>'
+    '<a href="https://www.example.com">Link</a></body>'
+)
+
+
+def test_compact_output():
+    expected = DefaultHtmlAnsParser('0.8.0').generate_ans(HTML)
+    output = DefaultHtmlAnsParser('0.8.0', compact_output=True).generate_ans(HTML)
+    assert sorted(element.ans_type for element in output) == sorted(ELEMENT_CLASSES)
+    assert output == expected
+    assert [element.to_dict() for element in output] == expected
+    assert json.loads(json.dumps(output, default=json_default)) == expected
+    assert [json.loads(element.to_json()) for element in output] == expected
+    assert pickle.loads(pickle.dumps(output)) == expected
+
+
+def test_element_access():
+    element = compact_element({'type': 'text', 'content': 'Text', 'additional_properties': {'class': ['intro']}})
+    assert isinstance(element, TextElement)
+    assert not hasattr(element, '__dict__')
+    assert element['type'] == 'text'
+    assert element['content'] == 'Text'
+    assert element.get('version') is None
+    assert 'version' not in element
+    with pytest.raises(KeyError):
+        element['version']
+    assert element.to_dict() == {'type': 'text', 'content': 'Text', 'additional_properties': {'class': ['intro']}}
+
+    element = compact_element({
+        'type': 'list', 'list_type': 'ordered', 'custom': True,
+        'items': [{'type': 'text', 'content': 'One'}, {'type': 'custom', 'content': 'Two'}],
+    })
+    assert isinstance(element, ListElement)
+    assert element['custom'] is True
+    assert isinstance(element['items'][0], TextElement)
+    assert element['items'][1] == {'type': 'custom', 'content': 'Two'}
+    assert element.to_dict()['items'] == [{'type': 'text', 'content': 'One'}, {'type': 'custom', 'content': 'Two'}]
+    assert compact_element({'type': 'custom'}) == {'type': 'custom'}
+    assert compact_element(None) is None
+
+
+def test_interning():
+    streams = [{'url': 'audio.mp3'}]
+    references = [
+        compact_element(json.loads(json.dumps({
+            'type': 'reference',
+            'referent': {'provider': 'https://publish.twitter.com/oembed?url=', 'type': 'twitter', 'id': str(index)},
+            'additional_properties': {'class': ['twitter-tweet']},
+        })))
+        for index in range(2)
+    ]
+    assert all(isinstance(reference, ReferenceElement) for reference in references)
+    assert all(isinstance(reference['referent'], Referent) for reference in references)
+    first, second = [reference['referent'] for reference in references]
+    assert first['provider'] is second['provider']
+    assert first['type'] is second['type']
+    assert first.get('service') is None
+    assert list(references[0]['additional_properties'])[0] is list(references[1]['additional_properties'])[0]
+    assert compact_element({'type': 'audio', 'streams': streams})['streams'] is streams
+    assert isinstance(compact_element({'type': 'audio', 'streams': streams}), AudioElement)
+
+
+def test_intern_limit(monkeypatch):
+    monkeypatch.setattr(compact, '_interned', {})
+    monkeypatch.setattr(compact, 'INTERN_LIMIT', 3)
+    elements = [
+        compact_element({'type': 'text', 'content': 'Text', 'additional_properties': {'data-{}'.format(index): ''}})
+        for index in range(10)
+    ]
+    assert len(compact._interned) == 3
+    assert list(elements[0]['additional_properties']) == ['data-0']
+    assert list(elements[9]['additional_properties']) == ['data-9']
+    # strings interned before the limit was reached are still shared
+    assert compact.intern_string(''.join(['data-', '0'])) is list(elements[0]['additional_properties'])[0]
+
+
+def test_document_cache():
+    document_cache = LRUDocumentCache()
+    parser = DefaultHtmlAnsParser(document_cache=document_cache, compact_output=True)
+    expected = DefaultHtmlAnsParser().generate_ans(HTML)
+    assert parser.generate_ans(HTML) == expected
+    output = parser.generate_ans(HTML)
+    assert len(document_cache) == 1
+    assert all(isinstance(element, ReferenceElement) for element in output if element['type'] == 'reference')
+    assert output == expected
+    output, _ = parser.generate_ans(HTML, with_stats=True)
+    assert output == expected
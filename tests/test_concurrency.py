@@ -0,0 +1,149 @@
+import random
+import sys
+import threading
+
+import pytest
+
+from html2ans.cache import LRUFragmentCache
+from html2ans.corpus import CorpusGenerator
+from html2ans.default import DefaultHtmlAnsParser, LxmlHtmlAnsParser, SourceSpanHtmlAnsParser
+from html2ans.exc import FrozenParserException
+from html2ans.parsers.text import ListItemParser, ParagraphParser
+from html2ans.parsers.utils import AbstractParserUtilities
+from html2ans.text_fixing import TextFixer
+
+THREADS = 8
+DOCUMENTS = [html for _, html in CorpusGenerator(seed=5, blocks=8).documents(4)] + [
+    '<body><ul><li>One</li><li><ol><li>Two</li></ol></li></ul>{}</body>'.format(
+        ''.join('<p><b>Caf\xc3\xa9 {}</b> cr\xc3\xa8me</p>'.format(index) for index in range(20))),
+]
+
+
+def _convert_concurrently(parsers, documents, rounds=2):
+    results = [[] for _ in range(THREADS)]
+    errors = []
+    barrier = threading.Barrier(THREADS) if hasattr(threading, 'Barrier') else None
+
+    def convert(thread_index):
+        try:
+            if barrier is not None:
+                barrier.wait()
+            rng = random.Random(thread_index)
+            parser = parsers[thread_index % len(parsers)]
+            for _ in range(rounds):
+                indexes = list(range(len(documents)))
+                rng.shuffle(indexes)
+                # interleave two conversions in the same thread
+                iterators = [(index, parser.generate_ans_iter(documents[index])) for index in indexes[:2]]
+                outputs = {index: [] for index in indexes[:2]}
+                while iterators:
+                    for index, iterator in list(iterators):
+                        try:
+                            outputs[index].append(next(iterator))
+                        except StopIteration:
+                            iterators.remove((index, iterator))
+                results[thread_index].extend((parser, index, output) for index, output in outputs.items())
+                for index in indexes[2:]:
+                    results[thread_index].append((parser, index, parser.generate_ans(documents[index])))
+        except Exception as exc:  # pragma: no cover
+            errors.append(exc)
+
+    # switch threads as often as possible (Python 3)
+    switch_interval = getattr(sys, 'getswitchinterval', lambda: None)()
+    if switch_interval is not None:
+        sys.setswitchinterval(1e-5)
+    try:
+        threads = [threading.Thread(target=convert, args=(index,)) for index in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        if switch_interval is not None:
+            sys.setswitchinterval(switch_interval)
+    assert not errors
+    return [result for thread_results in results for result in thread_results]
+
+
+@pytest.mark.parametrize('parser_factory', [
+    lambda: DefaultHtmlAnsParser('0.8.0'),
+    lambda: DefaultHtmlAnsParser(
+        '0.8.0', precompute_node_facts=True, fragment_cache=LRUFragmentCache(max_entries=32),
+        text_fixer=TextFixer(cache_size=16)),
+    lambda: LxmlHtmlAnsParser('0.8.0', compact_output=True),
+    lambda: SourceSpanHtmlAnsParser('0.8.0'),
+])
+def test_shared_parser(parser_factory):
+    expected = [parser_factory().generate_ans(html) for html in DOCUMENTS]
+    results = _convert_concurrently([parser_factory().freeze()], DOCUMENTS)
+    assert len(results) == THREADS * 2 * len(DOCUMENTS)
+    for _, index, output in results:
+        assert output == expected[index]
+
+
+def test_shared_parsers():
+    # state activated for one parser's conversions mustn't leak into the other's
+    parser_factories = [
+        lambda: DefaultHtmlAnsParser(text_fixer=TextFixer(enabled=False), precompute_node_facts=True),
+        lambda: DefaultHtmlAnsParser(fragment_cache=LRUFragmentCache()),
+    ]
+    parsers = [parser_factory().freeze() for parser_factory in parser_factories]
+    expected = {
+        parser: [parser_factory().generate_ans(html) for html in DOCUMENTS]
+        for parser, parser_factory in zip(parsers, parser_factories)
+    }
+    assert expected[parsers[0]] != expected[parsers[1]]
+    for parser, index, output in _convert_concurrently(parsers, DOCUMENTS):
+        assert output == expected[parser][index]
+
+
+def test_freeze():
+    parser = DefaultHtmlAnsParser()
+    fingerprint = parser.get_config_fingerprint()
+    assert parser.freeze() is parser
+    assert parser.frozen
+    assert all(isinstance(parsers, tuple) for parsers in parser.parsers.values())
+    assert parser.get_config_fingerprint() == fingerprint
+    with pytest.raises(FrozenParserException):
+        parser.add_parser(ParagraphParser())
+    with pytest.raises(FrozenParserException):
+        parser.insert_parser('p', ParagraphParser(), 0)
+    assert parser.generate_ans('<body><p>Text</p></body>') == [{'type': 'text', 'content': 'Text'}]
+
+
+def test_list_item_parser_text_tags():
+    text_tags = list(AbstractParserUtilities.TEXT_TAGS)
+    for _ in range(3):
+        ListItemParser()
+        DefaultHtmlAnsParser()
+    assert AbstractParserUtilities.TEXT_TAGS == text_tags
+    assert text_tags.count('li') == 1
+
+
+def test_freeze_while_converting_embeds():
+    # freezing a parser mustn't disturb the embed registry shared with parsers already converting
+    html = '<body><iframe src="https://www.youtube.com/embed/4I86iz4X4jM"></iframe></body>'
+    parser = DefaultHtmlAnsParser().freeze()
+    expected = parser.generate_ans(html)
+    assert expected[0]['type'] == 'reference'
+    done = threading.Event()
+    outputs = []
+
+    def freeze_parsers():
+        while not done.is_set():
+            DefaultHtmlAnsParser().freeze()
+
+    switch_interval = getattr(sys, 'getswitchinterval', lambda: None)()
+    if switch_interval is not None:
+        sys.setswitchinterval(1e-5)
+    thread = threading.Thread(target=freeze_parsers)
+    thread.start()
+    try:
+        for _ in range(300):
+            outputs.append(parser.generate_ans(html))
+    finally:
+        done.set()
+        thread.join()
+        if switch_interval is not None:
+            sys.setswitchinterval(switch_interval)
+    assert all(output == expected for output in outputs)
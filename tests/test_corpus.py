@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from html2ans.corpus import EMBED_TEMPLATES, CorpusGenerator, main
+
+
+def test_deterministic():
+    first = list(CorpusGenerator(seed=5).documents(3))
+    assert first == list(CorpusGenerator(seed=5).documents(3))
+    assert first != list(CorpusGenerator(seed=6).documents(3))
+    assert len(set(html for name, html in first)) == 3
+
+
+@pytest.mark.parametrize('provider', sorted(EMBED_TEMPLATES))
+def test_embed_templates(provider, test_html2ans):
+    output = test_html2ans.generate_ans('<body>{}</body>'.format(CorpusGenerator().embed(provider)))
+    assert len(output) == 1
+    assert output[0]['type'] == ('raw_html' if provider == 'iframe' else 'reference')
+
+
+def test_embed_mix(test_html2ans):
+    generator = CorpusGenerator(blocks=len(EMBED_TEMPLATES), embed_ratio=1)
+    output = test_html2ans.generate_ans(generator.document())
+    assert len(output) == len(EMBED_TEMPLATES)
+    # both twitter templates produce "twitter" references
+    assert len(set(element.get('referent', {}).get('type') for element in output)) == len(EMBED_TEMPLATES) - 1
+
+
+def test_options(test_html2ans):
+    generator = CorpusGenerator(blocks=40, depth=3, list_depth=3, inline_density=0, embed_ratio=0)
+    html = generator.document()
+    assert html.count('<div class="section-') == 7
+    assert '<strong>' not in html
+    output = test_html2ans.generate_ans(html)
+    assert len(output) == 40
+    assert len(CorpusGenerator(paragraph_words=500).paragraph()) > len(CorpusGenerator(paragraph_words=5).paragraph())
+
+
+def test_main(capsys):
+    assert main(['--count', '2', '--seed', '3', '--blocks', '5']) == 0
+    lines = capsys.readouterr()[0].splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {'id': name, 'html': html} for name, html in CorpusGenerator(seed=3, blocks=5).documents(2)
+    ]
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 import pytest
 
+from html2ans.default import DefaultHtmlAnsParser
+
 
 @pytest.fixture(params=[
     '',
@@ -121,3 +123,27 @@ def test_embed_parser_script_removal(html, test_html2ans):
     parsed = test_html2ans.generate_ans(html)
     assert len(parsed) == 1
     assert parsed[0].get('referent').get('type') == "twitter"
+
+
+@pytest.mark.parametrize('html', [
+    '<body><div><p>Text <b>bold</b></p><div><img src="imgsrc"/></div></div></body>',
+    '<p><p>Text</p><p>Text</p><p>Text</p></p>',
+    '<body><ul><li>One</li><li><ol><li>Two</li></ol></li></ul><blockquote><p>Quote</p></blockquote></body>',
+    '<body><p>\n</p><div class="wrapper"><p><a href="somelink"><img src="imgsrc"/></a></p></div></body>',
+    '<body>' + '<div><p>' * 30 + 'Deep <em>text</em>' + '</p></div>' * 30 + '</body>',
+])
+def test_precompute_node_facts(html, test_html2ans):
+    assert DefaultHtmlAnsParser('0.8.0', precompute_node_facts=True).generate_ans(html) == \
+        test_html2ans.generate_ans(html)
+
+
+@pytest.mark.parametrize('html,start_tag', [
+    ('<html><head><title>Title</title><script>var a = 1;</script></head>'
+     '<body><p>Text <b>bold</b></p><pre>  spaced  </pre></body></html>', 'body'),
+    ('<body><div><p>One</p></div><blockquote><p>Quote</p></blockquote></body>', 'blockquote'),
+    ('<body><p>Text</p><p>More text</p></body>', 'section'),
+    ('<p>Text</p>', 'body'),
+])
+def test_parse_start_tag_only(html, start_tag, test_html2ans):
+    assert DefaultHtmlAnsParser('0.8.0', parse_start_tag_only=True).generate_ans(html, start_tag=start_tag) == \
+        test_html2ans.generate_ans(html, start_tag=start_tag)
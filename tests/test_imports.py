@@ -0,0 +1,30 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+DEFERRED_MODULES = ['ftfy', 'furl', 'multiprocessing', 'orjson', 'sqlite3']
+
+SCRIPT = '''
+import json
+import sys
+import html2ans.default
+deferred = {deferred!r}
+print(json.dumps(sorted(module for module in deferred if module in sys.modules)))
+html2ans.default.DefaultHtmlAnsParser().generate_ans({html!r})
+print(json.dumps(sorted(module for module in deferred if module in sys.modules)))
+'''
+
+
+def _imported_modules(html):
+    output = subprocess.check_output([sys.executable, '-c', SCRIPT.format(deferred=DEFERRED_MODULES, html=html)])
+    return [json.loads(line) for line in output.decode('utf-8').splitlines()]
+
+
+@pytest.mark.parametrize('html, used_modules', [
+    ('<body><p>Plain <b>text</b></p></body>', []),
+    (u'<body><p>Caf\xc3\xa9 <b>text</b></p><audio><source src="a b.mp3"/></audio></body>', ['ftfy', 'furl']),
+])
+def test_deferred_imports(html, used_modules):
+    assert _imported_modules(html) == [[], used_modules]
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import io
+import mmap
+
+import pytest
+
+from html2ans.adapters import build_lxml_tree
+from html2ans.cache import LRUDocumentCache
+from html2ans.default import DefaultHtmlAnsParser, LxmlHtmlAnsParser, SourceSpanHtmlAnsParser
+from html2ans.inputs import as_markup, read_html
+
+pathlib = pytest.importorskip('pathlib')
+
+HTML = (
+    '<html><head><meta charset="iso-8859-1"><title>Café</title></head>'
+    '<body><p><b>Crème</b> brûlée</p><h2>Über</h2><p>Plain</p></body></html>'
+)
+
+
+@pytest.fixture
+def html_path(tmpdir):
+    path = tmpdir.join('document.html')
+    path.write_binary(HTML.encode('iso-8859-1'))
+    return pathlib.Path(str(path))
+
+
+@pytest.mark.parametrize('parser_class', [DefaultHtmlAnsParser, LxmlHtmlAnsParser, SourceSpanHtmlAnsParser])
+@pytest.mark.parametrize('memory_map', [False, True])
+def test_inputs(parser_class, memory_map, html_path):
+    parser = parser_class(memory_map=memory_map)
+    expected = parser.generate_ans(HTML)
+    assert expected[0]['content'] == '<b>Crème</b> brûlée'
+    html = HTML.encode('iso-8859-1')
+    assert parser.generate_ans(html) == expected
+    assert parser.generate_ans(bytearray(html)) == expected
+    assert parser.generate_ans(memoryview(html)) == expected
+    assert parser.generate_ans(io.BytesIO(html)) == expected
+    assert parser.generate_ans(html_path) == expected
+    assert list(parser.generate_ans_iter(html_path)) == expected
+    with html_path.open('rb') as html_file:
+        assert parser.generate_ans(html_file) == expected
+    with html_path.open('rb') as html_file:
+        assert parser.generate_ans(mmap.mmap(html_file.fileno(), 0, access=mmap.ACCESS_READ)) == expected
+
+
+def test_start_tag_only(html_path):
+    parser = DefaultHtmlAnsParser(parse_start_tag_only=True, memory_map=True)
+    # the tree is built twice when the start tag is missing
+    assert parser.generate_ans(html_path, start_tag='article') == \
+        DefaultHtmlAnsParser().generate_ans(HTML, start_tag='article')
+
+
+def test_read_html(html_path, tmpdir):
+    html = HTML.encode('iso-8859-1')
+    assert read_html(HTML) is HTML
+    assert read_html(html) is html
+    assert read_html(html_path) == html
+    mapped = read_html(html_path, memory_map=True)
+    assert isinstance(mapped, mmap.mmap)
+    assert as_markup(mapped) == html
+    # files that can't be mapped are read
+    assert read_html(io.BytesIO(html), memory_map=True) == html
+    with io.open(str(html_path), encoding='iso-8859-1') as text_file:
+        assert read_html(text_file, memory_map=True) == HTML
+    empty_path = tmpdir.join('empty.html')
+    empty_path.write_binary(b'')
+    assert read_html(pathlib.Path(str(empty_path)), memory_map=True) == b''
+    assert DefaultHtmlAnsParser().generate_ans(pathlib.Path(str(empty_path))) == []
+    assert LxmlHtmlAnsParser().generate_ans(b'') == []
+
+
+def test_lxml_encodings():
+    html = '﻿<body><p><b>漢字</b> and text</p></body>'
+    for encoding in ['utf-8', 'utf-16-le', 'utf-16-be']:
+        tree = build_lxml_tree(html.encode(encoding))
+        assert tree.find('b').string == '漢字'
+    # chunks split multi-byte characters
+    html = '<body>{}</body>'.format('<p><i>漢字</i> café — text</p>' * 5000)
+    assert LxmlHtmlAnsParser().generate_ans(html.encode('utf-8')) == DefaultHtmlAnsParser().generate_ans(html)
+
+
+def test_document_cache(html_path):
+    document_cache = LRUDocumentCache()
+    parser = DefaultHtmlAnsParser(document_cache=document_cache, memory_map=True)
+    expected = parser.generate_ans(HTML.encode('iso-8859-1'))
+    # keyed by the document's bytes rather than its path
+    assert parser.generate_ans(html_path) == expected
+    assert len(document_cache) == 1
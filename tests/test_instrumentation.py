@@ -0,0 +1,84 @@
+from html2ans.default import DefaultHtmlAnsParser
+from html2ans.instrumentation import ParserInstrumentation
+from html2ans.parsers.base import BaseElementParser
+
+HTML = '<body><p>Text</p><p>More text</p><blockquote><p>Quote</p></blockquote><foo>bar</foo></body>'
+
+
+def test_instrumentation(test_html2ans):
+    instrumentation = ParserInstrumentation()
+    parser = DefaultHtmlAnsParser('0.8.0', instrumentation=instrumentation, suppress_exceptions=True)
+    parser.insert_parser('foo', DummyParserException(), 0)
+    test_html2ans.insert_parser('foo', DummyParserException(), 0)
+    test_html2ans.suppress_exceptions = True
+    assert parser.generate_ans(HTML) == test_html2ans.generate_ans(HTML)
+
+    report = instrumentation.report()
+    assert report['elements_seen'] == report['elements_sampled'] == 4
+    stats = {parser_stats['parser']: parser_stats for parser_stats in report['parsers']}
+    assert stats['ParagraphParser']['matches'] == 2
+    assert stats['ParagraphParser']['applicable_hits'] == stats['ParagraphParser']['parse_calls'] == 2
+    assert stats['BlockquoteParser']['matches'] == 1
+    assert stats['DummyParserException']['exceptions'] == 1
+    assert stats['RawHtmlParser']['matches'] == 1
+    assert all(parser_stats['time'] > 0 for parser_stats in report['parsers'])
+    assert [parser_stats['time'] for parser_stats in report['parsers']] == \
+        sorted((parser_stats['time'] for parser_stats in report['parsers']), reverse=True)
+
+    instrumentation.reset()
+    assert instrumentation.report() == {'elements_seen': 0, 'elements_sampled': 0, 'parsers': []}
+
+
+def test_instrumentation_sampling(test_html2ans):
+    instrumentation = ParserInstrumentation(sample_rate=0.5, seed=1)
+    parser = DefaultHtmlAnsParser('0.8.0', instrumentation=instrumentation)
+    html = '<body>' + '<p>Text</p>' * 200 + '</body>'
+    assert parser.generate_ans(html) == test_html2ans.generate_ans(html)
+    report = instrumentation.report()
+    assert report['elements_seen'] == 200
+    assert 50 < report['elements_sampled'] < 150
+    assert report['parsers'][0]['matches'] == report['elements_sampled']
+
+    instrumentation.sample_rate = 0
+    instrumentation.reset()
+    parser.generate_ans(html)
+    assert instrumentation.report()['elements_sampled'] == 0
+
+
+class DummyParserException(BaseElementParser):
+    applicable_elements = ['foo']
+
+    def parse(self, tag):
+        raise Exception()
+
+
+def test_conversion_stats(test_html2ans):
+    html = (
+        '<html><head><title>Title</title></head><body><p>Text</p><div class="wrapper"><p>More <b>text</b></p></div>'
+        '<foo>bar</foo><iframe src="https://www.example.com/widget"></iframe><h2>Header</h2></body></html>'
+    )
+    output_elements, stats = test_html2ans.generate_ans(html, with_stats=True)
+    assert output_elements == test_html2ans.generate_ans(html)
+    assert stats.node_count == 12
+    assert stats.elements_by_type == {'text': 2, 'raw_html': 2, 'header': 1}
+    # the iframe is matched by IFrameParser in DEFAULT_PARSERS, not the backup one
+    assert stats.backup_elements == 1
+    assert stats.tree_build_time > 0 and stats.conversion_time > 0
+    assert set(stats.as_dict()) == {
+        'node_count', 'tree_build_time', 'conversion_time', 'elements_by_type', 'backup_elements'}
+    # with_stats is keyword-only, so extra positional arguments are still passed through
+    assert test_html2ans.generate_ans(html, 'body', 'extra') == output_elements
+
+
+def test_conversion_stats_instrumented(test_html2ans):
+    instrumentation = ParserInstrumentation()
+    parser = DefaultHtmlAnsParser(
+        '0.8.0', instrumentation=instrumentation, precompute_node_facts=True, suppress_exceptions=True)
+    parser.insert_parser('foo', DummyParserException(), 0)
+    output_elements, stats = parser.generate_ans(HTML, with_stats=True)
+    assert output_elements == test_html2ans.generate_ans(HTML)
+    assert stats.backup_elements == 1
+    # foo is attempted with its primary parser, then with the backup parsers
+    assert instrumentation.report()['elements_seen'] == 5
+    assert {parser_stats['parser']: parser_stats for parser_stats in instrumentation.report()['parsers']}[
+        'DummyParserException']['exceptions'] == 1
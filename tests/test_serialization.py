@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import io
+import json
+
+import pytest
+
+from html2ans import serialization
+from html2ans.default import DefaultHtmlAnsParser
+from html2ans.serialization import dumps, write_json_array
+
+HTML = (
+    '<body><p>Caf\xe9 <b>cr\xe8me</b></p><h2>Header</h2><img src="image.jpg" width="40"/>'
+    '<ul><li>One</li></ul><table><tr><td>1</td></tr></table></body>'
+)
+
+
+@pytest.fixture(params=[True, False], ids=['fast', 'json'])
+def fast(request):
+    if request.param and serialization.get_orjson() is None:
+        pytest.skip("orjson isn't installed")
+    return request.param
+
+
+@pytest.mark.parametrize('compact_output', [False, True])
+def test_generate_ans_json(fast, compact_output):
+    parser = DefaultHtmlAnsParser('0.8.0', compact_output=compact_output)
+    expected = DefaultHtmlAnsParser('0.8.0').generate_ans(HTML)
+
+    binary_file = io.BytesIO()
+    assert parser.generate_ans_json(HTML, binary_file, fast_encoder=fast) == len(expected)
+    assert json.loads(binary_file.getvalue().decode('utf-8')) == expected
+    assert 'Caf\xe9'.encode('utf-8') in binary_file.getvalue()
+
+    text_file = io.StringIO()
+    parser.generate_ans_json(HTML, text_file, fast_encoder=fast)
+    assert text_file.getvalue() == binary_file.getvalue().decode('utf-8')
+
+    buffer = bytearray(b'prefix:')
+    parser.generate_ans_json(HTML, buffer, fast_encoder=fast)
+    assert bytes(buffer) == b'prefix:' + binary_file.getvalue()
+
+
+def test_empty(fast):
+    binary_file = io.BytesIO()
+    assert DefaultHtmlAnsParser().generate_ans_json('<body></body>', binary_file, fast_encoder=fast) == 0
+    assert binary_file.getvalue() == b'[]'
+
+
+def test_dumps(fast):
+    assert dumps({'content': 'Caf\xe9'}, fast) == '{"content":"Caf\xe9"}'.encode('utf-8')
+    # orjson can't serialize these, so json is used instead
+    assert json.loads(dumps({'content': '\ud800', 'id': 2 ** 70}, fast).decode('utf-8')) == \
+        {'content': '\ud800', 'id': 2 ** 70}
+    with pytest.raises(TypeError):
+        dumps({'content': object()}, fast)
+
+
+def test_incomplete_output():
+    def elements():
+        yield {'type': 'text', 'content': 'Text'}
+        raise ValueError()
+
+    binary_file = io.BytesIO()
+    with pytest.raises(ValueError):
+        write_json_array(elements(), binary_file)
+    assert binary_file.getvalue() == b'[{"type":"text","content":"Text"}'
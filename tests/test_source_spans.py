@@ -0,0 +1,73 @@
+import pytest
+
+from html2ans.default import DefaultHtmlAnsParser, SourceSpanHtmlAnsParser
+from html2ans.source_spans import build_source_span_tree, get_source_span, inner_html, invalidate_source_spans, \
+    outer_html
+
+TWEET = (
+    '<blockquote class="twitter-tweet"><p>Tweet</p>'
+    '<a href="https://twitter.com/user/status/1">date</a></blockquote>'
+)
+
+
+def test_spans():
+    html = '<body>\n<p class=intro>Some <b>bold</b> &amp; <br>text<img src="a.jpg"/></p></body>'
+    tree = build_source_span_tree(html)
+    paragraph = tree.find('p')
+    assert outer_html(paragraph) == '<p class=intro>Some <b>bold</b> &amp; <br>text<img src="a.jpg"/></p>'
+    assert inner_html(paragraph) == 'Some <b>bold</b> &amp; <br>text<img src="a.jpg"/>'
+    assert outer_html(tree.find('br')) == '<br>'
+    assert outer_html(tree.find('img')) == '<img src="a.jpg"/>'
+    assert inner_html(tree.find('img')) == ''
+    assert outer_html(tree.body) == html[:-7].lstrip() + '</body>'
+    # strings are always re-serialized
+    assert outer_html(tree.find('b').string) == 'bold'
+
+
+def test_repaired_markup():
+    html = '<body><div><p>One<p>Two</div><span>Stray</i> end</span><ul><li>Item</ul><p>Fine</p></body>'
+    tree = build_source_span_tree(html)
+    assert [tag.name for tag in tree.find_all(True) if get_source_span(tag)] == ['p']
+    assert outer_html(tree.find('span')) == '<span>Stray end</span>'
+
+    tree = build_source_span_tree(html, fall_back_on_repair=False)
+    assert outer_html(tree.find('div')) == '<div><p>One<p>Two</div>'
+    assert outer_html(tree.find('span')) == '<span>Stray</i> end</span>'
+    assert get_source_span(tree.find('li')) is None
+
+
+def test_comments():
+    tree = build_source_span_tree('<body><p>Text <!-- comment --><b>bold</b></p></body>')
+    assert get_source_span(tree.p) is not None
+    assert inner_html(tree.p) is None
+
+
+def test_invalidate():
+    tree = build_source_span_tree('<body><table><tr><td>1<script>x = 1;</script></td></tr></table></body>')
+    script = tree.find('script')
+    invalidate_source_spans(script.parent)
+    script.decompose()
+    assert get_source_span(tree.find('table')) is None
+    assert outer_html(tree.find('table')) == '<table><tr><td>1</td></tr></table>'
+
+
+@pytest.mark.parametrize('html', [
+    '<body><p>Text with <a href="https://www.example.com">a link</a></p><h2>Header</h2></body>',
+    '<body><table class="data"><tr><td>1</td><td>2</td></tr></table><em>Formatted</em></body>',
+    '<body>{}<table><tr><td>1<script src="widgets.js"></script></td></tr></table></body>'.format(TWEET),
+    '<body><div><p>Unclosed <b>bold</p><table><tr><td>1</td></table></div></body>',
+])
+def test_source_span_parser(html):
+    assert SourceSpanHtmlAnsParser().generate_ans(html) == \
+        DefaultHtmlAnsParser(soup_parse_lib='html.parser').generate_ans(html)
+
+
+def test_source_span_parser_slices():
+    html = '<body><table data-id=1><tr><td>&nbsp;</td></tr></table><p><i>It</i>&#39;s</p></body>'
+    assert SourceSpanHtmlAnsParser().generate_ans(html) == [
+        {'type': 'raw_html', 'content': '<table data-id=1><tr><td>&nbsp;</td></tr></table>',
+         'additional_properties': {'data-id': '1'}},
+        {'type': 'text', 'content': '<i>It</i>&#39;s'},
+    ]
+    assert SourceSpanHtmlAnsParser().get_config_fingerprint() != \
+        SourceSpanHtmlAnsParser(fall_back_on_repair=False).get_config_fingerprint()
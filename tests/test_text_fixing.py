@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import pickle
+
+import pytest
+from ftfy import fix_text
+
+from html2ans.default import DefaultHtmlAnsParser
+from html2ans.text_fixing import ASCII_PRECHECK, HEURISTIC_PRECHECK, TextFixer, activate_text_fixer, get_active_text_fixer, \
+    DEFAULT_TEXT_FIXER
+
+MOJIBAKE = 'The Mona Lisa doesnÃ¢â‚¬â„¢t have eyebrows.'
+TEXTS = [
+    'Plain text <a href="https://www.example.com">with a link</a>.',
+    'Fish &amp; chips',
+    'Curly “quotes” – and dashes…',
+    '漢字とひらがな',
+    'ＬＯＵＤ　ＮＯＩＳＥＳ',
+    'line\r\nbreaks\x1b[36m',
+    MOJIBAKE,
+]
+
+
+@pytest.mark.parametrize('text_fixer', [
+    TextFixer(precheck=None),
+    TextFixer(),
+    TextFixer(precheck=HEURISTIC_PRECHECK),
+    TextFixer(cache_size=2),
+])
+def test_fix(text_fixer):
+    for _ in range(2):
+        assert [text_fixer.fix(text) for text in TEXTS] == [fix_text(text) for text in TEXTS]
+    assert text_fixer.fix(MOJIBAKE) == "The Mona Lisa doesn't have eyebrows."
+
+
+def test_cache():
+    text_fixer = TextFixer(cache_size=2)
+    for text in TEXTS:
+        text_fixer.fix(text)
+    assert list(text_fixer._cache) == TEXTS[-2:]
+    assert pickle.loads(pickle.dumps(text_fixer)).fix(MOJIBAKE) == fix_text(MOJIBAKE)
+    text_fixer.clear()
+    assert not text_fixer._cache
+
+
+def test_disabled():
+    text_fixer = TextFixer(enabled=False, whole_document=True)
+    assert text_fixer.fix(MOJIBAKE) == MOJIBAKE
+    assert text_fixer.fix_document(MOJIBAKE) == MOJIBAKE
+
+
+def test_invalid_precheck():
+    with pytest.raises(ValueError):
+        TextFixer(precheck='unicode')
+
+
+def test_whole_document():
+    html = '<body><p><b>Mona</b> {}</p></body>'.format(MOJIBAKE)
+    text_fixer = TextFixer(whole_document=True)
+    assert text_fixer.fix(MOJIBAKE) == MOJIBAKE
+    assert text_fixer.fix_document(html) == fix_text(html, fix_entities=False)
+    output = DefaultHtmlAnsParser(text_fixer=text_fixer).generate_ans(html)
+    assert output == DefaultHtmlAnsParser().generate_ans(html)
+    assert output[0]['content'] == "<b>Mona</b> The Mona Lisa doesn't have eyebrows."
+
+
+@pytest.mark.parametrize('precheck', [None, ASCII_PRECHECK, HEURISTIC_PRECHECK])
+def test_whole_document_lines(precheck):
+    html = '<body>\n{}\n</body>\n'.format('\n'.join('<p>{}</p>'.format(text) for text in TEXTS + ['Fish &amp; chips']))
+    assert TextFixer(precheck=precheck, whole_document=True).fix_document(html) == fix_text(html, fix_entities=False)
+
+
+def test_document_parser_text_fixer():
+    html = '<body><p>{}</p><p><b>Bold</b> “quotes”</p></body>'.format(MOJIBAKE)
+    parser = DefaultHtmlAnsParser(text_fixer=TextFixer(enabled=False))
+    assert [element['content'] for element in parser.generate_ans(html)] == \
+        [MOJIBAKE, '<b>Bold</b> “quotes”']
+    assert DefaultHtmlAnsParser().generate_ans(html) == \
+        DefaultHtmlAnsParser(text_fixer=TextFixer(precheck=None)).generate_ans(html)
+    assert parser.get_config_fingerprint() != DefaultHtmlAnsParser().get_config_fingerprint()
+    assert get_active_text_fixer() is DEFAULT_TEXT_FIXER
+
+
+def test_activate_text_fixer():
+    text_fixer = TextFixer()
+    with activate_text_fixer(text_fixer):
+        assert get_active_text_fixer() is text_fixer
+        with activate_text_fixer(None):
+            assert get_active_text_fixer() is DEFAULT_TEXT_FIXER
+        assert get_active_text_fixer() is text_fixer
+    assert get_active_text_fixer() is DEFAULT_TEXT_FIXER